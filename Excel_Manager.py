@@ -8,17 +8,34 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QH
                             QInputDialog, QListWidget, QAbstractItemView, QHeaderView,
                             QDialog, QCheckBox, QFileDialog, QStatusBar, QAction, QMenu,
                             QToolBar, QSizePolicy, QSpacerItem, QSplitter, QTextEdit,
-                            QScrollArea, QDateEdit, QShortcut)
+                            QScrollArea, QDateEdit, QShortcut, QTableView,
+                            QStyledItemDelegate, QStyleOptionViewItem, QStyle, QProgressDialog)
 from PyQt5.QtGui import QIcon, QPixmap, QImage, QFont, QTextDocument, QColor, QPainter, QKeySequence
-from PyQt5.QtCore import Qt, QSize, QTimer, QRect, QDate
+from PyQt5.QtCore import (Qt, QSize, QTimer, QRect, QDate, QAbstractTableModel, QModelIndex,
+                          QRunnable, QThreadPool, QThread, pyqtSignal)
 from PyQt5.QtPrintSupport import QPrinter, QPrintDialog
 from barcode import EAN13
 import qrcode
 from barcode import Code128
-from barcode.writer import ImageWriter
-import io
-from PIL import Image
 import json
+import io
+import gzip
+import importlib
+import itertools
+import re
+import random
+import codecs
+import bisect
+import hashlib
+import zlib
+import time
+import threading
+import multiprocessing
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
+from urllib.request import pathname2url
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait as wait_futures
 from datetime import datetime
 from pypinyin import lazy_pinyin, Style
 
@@ -254,21 +271,825 @@ class UserManager:
     def close(self):
         self.conn.close()
 
+def drop_fts_index(cursor):
+    """删除全文索引及同步触发器"""
+    for trigger in ('data_fts_ai', 'data_fts_ad', 'data_fts_au'):
+        cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    cursor.execute('DROP TABLE IF EXISTS data_fts')
+
+
+def create_fts_index(conn, columns):
+    """按给定列(重新)创建外部内容FTS5表和插入/删除/更新触发器，并从data表重建索引"""
+    cursor = conn.cursor()
+    drop_fts_index(cursor)
+    if not columns:
+        return
+
+    col_list = ', '.join(f'"{col}"' for col in columns)
+    new_values = ', '.join(f'new."{col}"' for col in columns)
+    old_values = ', '.join(f'old."{col}"' for col in columns)
+
+    cursor.execute(f'''
+        CREATE VIRTUAL TABLE data_fts USING fts5(
+            {col_list}, content='data', content_rowid='rowid', tokenize='trigram'
+        )
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER data_fts_ai AFTER INSERT ON data BEGIN
+            INSERT INTO data_fts(rowid, {col_list}) VALUES (new.rowid, {new_values});
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER data_fts_ad AFTER DELETE ON data BEGIN
+            INSERT INTO data_fts(data_fts, rowid, {col_list}) VALUES ('delete', old.rowid, {old_values});
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER data_fts_au AFTER UPDATE ON data BEGIN
+            INSERT INTO data_fts(data_fts, rowid, {col_list}) VALUES ('delete', old.rowid, {old_values});
+            INSERT INTO data_fts(rowid, {col_list}) VALUES (new.rowid, {new_values});
+        END
+    ''')
+    cursor.execute("INSERT INTO data_fts(data_fts) VALUES ('rebuild')")
+    conn.commit()
+    print(f"[DEBUG] 已重建FTS5全文索引，列数: {len(columns)}")
+
+
+def _resolve_initials_style():
+    """导入时确定一次首字母的取法
+
+    支持FIRST_LETTER时其结果就是全拼的第一个字母，直接由全拼截取（返回None），省去第二次转换；
+    旧版本pypinyin只有INITIALS时返回该风格，都不可用时同样由全拼截取。
+    """
+    if getattr(Style, 'FIRST_LETTER', None) is not None:
+        return None
+    style = getattr(Style, 'INITIALS', None)
+    if style is not None:
+        try:
+            lazy_pinyin('中', style=style)
+            return style
+        except Exception:
+            pass
+    return None
+
+
+def _han_run_pattern():
+    """按pypinyin自身的汉字范围切分文本，保证与lazy_pinyin的分段一致"""
+    try:
+        from pypinyin.constants import RE_HANS
+        pattern = RE_HANS.pattern
+        if pattern.startswith('^') and pattern.endswith('$'):
+            return re.compile(pattern[1:-1])
+    except Exception:
+        pass
+    return re.compile('[\u3007\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+')
+
+
+class PinyinTransliterator:
+    """进程内共享的拼音转换服务
+
+    文本先按汉字/非汉字切段：非汉字段原样保留，单个汉字查字表，多字词组交给lazy_pinyin（保留多音字词组读音）。
+    整串结果和单字结果都缓存：整串用有界LRU，单字表 字 -> (首字母, 全拼) 可持久化到JSON文件。
+    """
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self.initials_style = _resolve_initials_style()
+        self._han_run = _han_run_pattern()
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._tone_cache = OrderedDict()
+        self._chars = {}
+        self._chars_dirty = False
+
+    def _convert_run(self, run):
+        """转换一段连续汉字，返回 ((首字母, 全拼), ...)"""
+        if len(run) == 1:
+            entry = self._chars.get(run)
+            if entry is None:
+                entry = self._chars[run] = self._pair(run, lazy_pinyin(run))[0]
+                self._chars_dirty = True
+            return (entry,)
+        # 词组在不同文本中反复出现，同样走LRU
+        with self._lock:
+            cached = self._cache.get(run)
+        if cached is not None:
+            return cached
+        fulls = lazy_pinyin(run)
+        if len(fulls) != len(run):
+            # 个别字无读音时pypinyin会合并输出，退回逐字查表
+            return tuple(item for char in run for item in self._convert_run(char))
+        result = self._pair(run, fulls)
+        self._remember(run, result)
+        return result
+
+    def _pair(self, run, fulls):
+        if self.initials_style is None:
+            return tuple((full[:1], full) for full in fulls)
+        initials = lazy_pinyin(run, style=self.initials_style)
+        return tuple(zip(initials, fulls))
+
+    def syllables(self, text):
+        """返回文本的 ((首字母, 全拼), ...)，非汉字段以 (原文, 原文) 出现"""
+        with self._lock:
+            cached = self._cache.get(text)
+            if cached is not None:
+                self._cache.move_to_end(text)
+                return cached
+        items = []
+        pos = 0
+        for match in self._han_run.finditer(text):
+            if match.start() > pos:
+                segment = text[pos:match.start()]
+                items.append((segment, segment))
+            items.extend(self._convert_run(match.group()))
+            pos = match.end()
+        if pos < len(text):
+            items.append((text[pos:], text[pos:]))
+        result = tuple(items)
+        self._remember(text, result)
+        return result
+
+    def _remember(self, text, result, cache=None):
+        cache = self._cache if cache is None else cache
+        with self._lock:
+            cache[text] = result
+            if len(cache) > self.max_entries:
+                cache.popitem(last=False)
+
+    def initials(self, text):
+        """拼音首字母，等价于 lazy_pinyin(text, style=Style.FIRST_LETTER) 拼接"""
+        if not text:
+            return ""
+        return ''.join(initial for initial, _ in self.syllables(text))
+
+    def full(self, text):
+        """全拼，等价于 lazy_pinyin(text) 拼接"""
+        if not text:
+            return ""
+        return ''.join(full for _, full in self.syllables(text))
+
+    def tones(self, text):
+        """带声调的小写拼音（TONE3，轻声记为5），每个音节以声调数字结尾，用于排序"""
+        if not text:
+            return ""
+        with self._lock:
+            cached = self._tone_cache.get(text)
+            if cached is not None:
+                self._tone_cache.move_to_end(text)
+                return cached
+        result = ''.join(lazy_pinyin(text, style=Style.TONE3, neutral_tone_with_five=True)).lower()
+        self._remember(text, result, self._tone_cache)
+        return result
+
+    def load_char_table(self, path):
+        """载入持久化的单字拼音表，文件不存在或损坏时忽略"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                table = json.load(f)
+            with self._lock:
+                for char, (initial, full) in table.items():
+                    self._chars.setdefault(char, (initial, full))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[DEBUG] 载入拼音字表失败: {str(e)}")
+
+    def save_char_table(self, path):
+        """保存单字拼音表（仅在有新增时写盘）"""
+        if not self._chars_dirty:
+            return
+        try:
+            with self._lock:
+                table = {char: list(entry) for char, entry in self._chars.items()}
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(table, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            self._chars_dirty = False
+        except Exception as e:
+            print(f"[DEBUG] 保存拼音字表失败: {str(e)}")
+
+
+transliterator = PinyinTransliterator()
+
+
+def pinyin_initials(text):
+    """获取拼音首字母（经由共享的转换缓存）"""
+    try:
+        return transliterator.initials(text)
+    except Exception as e:
+        print(f"[DEBUG] 获取拼音首字母失败: {str(e)}")
+        return ""
+
+
+def pinyin_full(text):
+    """获取全拼（经由共享的转换缓存）"""
+    try:
+        return transliterator.full(text)
+    except Exception as e:
+        print(f"[DEBUG] 获取全拼失败: {str(e)}")
+        return ""
+
+
+def pinyin_sort_key(value):
+    """中文按拼音排序的排序键
+
+    带声调的拼音在前（同音字按声调排列，声调数字同时起到音节分隔作用），原文在后按码位区分同音同调字。
+    注册为SQL函数 pinyin_sort_key，启用拼音字段后同样的结果存入 <列>_sortkey 排序列。
+    """
+    if not isinstance(value, str):
+        return value
+    try:
+        tones = transliterator.tones(value)
+    except Exception as e:
+        print(f"[DEBUG] 获取拼音排序键失败: {str(e)}")
+        tones = value.lower()
+    return f"{tones}\x00{value}"
+
+
+def sql_order_key(value, text_key=None):
+    """与SQLite排序规则一致的Python排序键：NULL < 数值 < 文本 < BLOB，文本可指定排序键函数"""
+    if value is None:
+        return (0, 0)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, text_key(value) if text_key else value)
+    return (3, value)
+
+
+def pinyin_initials_batch(values):
+    """批量计算拼音首字母（在进程池中执行）"""
+    return [pinyin_initials(value) for value in values]
+
+
+def pinyin_sort_key_batch(values):
+    """批量计算拼音排序键（在进程池中执行）"""
+    return [pinyin_sort_key(value) for value in values]
+
+
+PINYIN_CHECKPOINT_KEY = 'pinyin_checkpoint'
+IMAGE_DISK_CACHE_KEY = 'image_disk_cache'  # 值为'1'时启用二维码磁盘缓存
+
+
+def _compute_pinyin_values(batch_func, values, executor=None, min_parallel=512):
+    """用batch_func计算一批不重复文本的拼音首字母/排序键，数量足够多时分片交给进程池"""
+    if executor is None or len(values) < min_parallel:
+        return batch_func(values)
+    parts = max(1, getattr(executor, '_max_workers', 1)) * 4
+    size = (len(values) + parts - 1) // parts
+    chunks = [values[i:i + size] for i in range(0, len(values), size)]
+    return list(itertools.chain.from_iterable(executor.map(batch_func, chunks)))
+
+
+def migrate_pinyin_columns(conn, executor=None, chunk_size=2000, progress_callback=None, cancel_event=None,
+                           deadline=None, total=None):
+    """为已有数据分批补全拼音列及拼音排序列，可中断、可续跑
+
+    从config中记录的rowid检查点继续，每批在一个事务中用executemany写回并推进检查点。
+    写回时校验原值未变，避免覆盖期间被编辑过的行。全部完成后删除检查点并返回True，
+    被取消或超过deadline（time.monotonic()时刻）时返回False。total 为已知的待补全行数，给出时不再重新计数。
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT value FROM config WHERE key=?", (PINYIN_CHECKPOINT_KEY,))
+    result = cursor.fetchone()
+    if result is None:
+        return True
+    checkpoint = int(result[0] or 0)
+
+    cursor.execute('PRAGMA table_info(data)')
+    all_columns = [row[1] for row in cursor.fetchall()]
+    columns = [col for col in all_columns if not col.endswith('_pinyin') and f"{col}_pinyin" in all_columns]
+    sortkey_indexes = [i for i, col in enumerate(columns) if f"{col}_sortkey" in all_columns]
+    if total is None:
+        cursor.execute('SELECT COUNT(*) FROM data WHERE rowid > ?', (checkpoint,))
+        total = cursor.fetchone()[0]
+    done = 0
+
+    if columns:
+        select_sql = f"SELECT rowid, {', '.join(columns)} FROM data WHERE rowid > ? ORDER BY rowid LIMIT ?"
+        set_clause = ', '.join([f"{col}_pinyin=?" for col in columns] +
+                               [f"{columns[i]}_sortkey=?" for i in sortkey_indexes])
+        unchanged = ' AND '.join(f"{col} IS ?" for col in columns)
+        update_sql = f"UPDATE data SET {set_clause} WHERE rowid=? AND {unchanged}"
+
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                return False
+            cursor.execute(select_sql, (checkpoint, chunk_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            values = list({value for row in rows for value in row[1:]
+                           if isinstance(value, str) and value.strip()})
+            initials = dict(zip(values, _compute_pinyin_values(pinyin_initials_batch, values, executor)))
+            sort_keys = {}
+            if sortkey_indexes:
+                texts = list({row[i + 1] for row in rows for i in sortkey_indexes if isinstance(row[i + 1], str)})
+                sort_keys = dict(zip(texts, _compute_pinyin_values(pinyin_sort_key_batch, texts, executor)))
+            params = []
+            for row in rows:
+                pinyins = [initials.get(value) if isinstance(value, str) else None for value in row[1:]]
+                pinyins.extend(sort_keys.get(row[i + 1], row[i + 1]) for i in sortkey_indexes)
+                params.append(pinyins + [row[0]] + list(row[1:]))
+
+            cursor.executemany(update_sql, params)
+            checkpoint = rows[-1][0]
+            cursor.execute("INSERT OR REPLACE INTO config VALUES (?, ?)", (PINYIN_CHECKPOINT_KEY, str(checkpoint)))
+            conn.commit()
+            done += len(rows)
+            if progress_callback:
+                progress_callback(done, total)
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+
+    cursor.execute("DELETE FROM config WHERE key=?", (PINYIN_CHECKPOINT_KEY,))
+    conn.commit()
+    return True
+
+
+class PinyinInitialsIndex:
+    """拼音首字母/全拼的n-gram倒排索引
+
+    每个含中文的单元格生成首字母串和全拼串，分别按二元/三元组建立 gram -> rowid数组(升序) 的倒排表。
+    查询时对关键词的各个gram求交集，再用子串匹配校验候选行，无需逐行重新转换拼音。
+    """
+    INITIALS = 0
+    FULL_PINYIN = 1
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = ({}, {})  # (首字母, 全拼) 各自的 gram -> array('I')，rowid升序
+        self._rows = {}            # rowid -> ((首字母, 全拼), ...)
+
+    @staticmethod
+    def _grams(text):
+        grams = set()
+        for n in (2, 3):
+            for i in range(len(text) - n + 1):
+                grams.add(text[i:i + n])
+        return grams
+
+    def _row_grams(self, cells, field):
+        grams = set()
+        for cell in cells:
+            grams |= self._grams(cell[field])
+        return grams
+
+    def __len__(self):
+        return len(self._rows)
+
+    def build(self, rows):
+        """从 (rowid, cells) 序列批量构建，rowid需按升序给出"""
+        postings = ({}, {})
+        row_cells = {}
+        for rowid, cells in rows:
+            if not cells:
+                continue
+            row_cells[rowid] = cells
+            for field, field_postings in enumerate(postings):
+                for gram in self._row_grams(cells, field):
+                    field_postings.setdefault(gram, []).append(rowid)
+        with self._lock:
+            self._postings = tuple({gram: array('I', ids) for gram, ids in field_postings.items()}
+                                   for field_postings in postings)
+            self._rows = row_cells
+
+    def add_row(self, rowid, cells):
+        with self._lock:
+            self._remove_locked(rowid)
+            if not cells:
+                return
+            self._rows[rowid] = cells
+            for field, postings in enumerate(self._postings):
+                for gram in self._row_grams(cells, field):
+                    ids = postings.get(gram)
+                    if ids is None:
+                        postings[gram] = array('I', [rowid])
+                    elif ids[-1] < rowid:
+                        ids.append(rowid)
+                    else:
+                        pos = bisect.bisect_left(ids, rowid)
+                        if pos == len(ids) or ids[pos] != rowid:
+                            ids.insert(pos, rowid)
+
+    def remove_row(self, rowid):
+        with self._lock:
+            self._remove_locked(rowid)
+
+    def _remove_locked(self, rowid):
+        cells = self._rows.pop(rowid, None)
+        if not cells:
+            return
+        for field, postings in enumerate(self._postings):
+            for gram in self._row_grams(cells, field):
+                ids = postings.get(gram)
+                if ids is None:
+                    continue
+                pos = bisect.bisect_left(ids, rowid)
+                if pos < len(ids) and ids[pos] == rowid:
+                    del ids[pos]
+                if not ids:
+                    del postings[gram]
+
+    def search(self, keyword, field=INITIALS):
+        """返回首字母(或全拼)包含关键词的rowid列表（升序），关键词少于2个字符时返回None"""
+        keyword = keyword.lower()
+        if len(keyword) < 2:
+            return None
+        n = 3 if len(keyword) >= 3 else 2
+        grams = {keyword[i:i + n] for i in range(len(keyword) - n + 1)}
+
+        with self._lock:
+            lists = []
+            postings = self._postings[field]
+            for gram in grams:
+                ids = postings.get(gram)
+                if not ids:
+                    return []
+                lists.append(ids)
+            lists.sort(key=len)
+
+            result = []
+            smallest, others = lists[0], lists[1:]
+            for rowid in smallest:
+                if not all(self._contains(ids, rowid) for ids in others):
+                    continue
+                # gram命中只是候选，需确认整串出现在同一单元格中
+                if any(keyword in cell[field] for cell in self._rows[rowid]):
+                    result.append(rowid)
+            return result
+
+    @staticmethod
+    def _contains(ids, rowid):
+        pos = bisect.bisect_left(ids, rowid)
+        return pos < len(ids) and ids[pos] == rowid
+
+class SearchPlan:
+    """一次全列搜索的执行计划
+
+    sql/params 为数据库查询（可为空），rowids 为拼音倒排索引直接命中的记录。
+    terms 为 (匹配范围, 小写关键词) 列表，用于判断能否在上一次结果上细化：
+    'all' 全部列、'data' 非拼音列、'pinyin' 拼音列、'initials'/'full' 拼音索引。
+    """
+
+    def __init__(self, keyword, columns, sql=None, params=(), rowids=(), terms=()):
+        self.keyword = keyword
+        self.columns = list(columns)
+        self.sql = sql
+        self.params = tuple(params)
+        self.rowids = list(rowids)
+        self.terms = list(terms)
+
+    def add_index_hits(self, scope, term, rowids):
+        """追加拼音索引命中的记录"""
+        self.terms.append((scope, term.lower()))
+        known = set(self.rowids)
+        self.rowids.extend(rowid for rowid in rowids if rowid not in known)
+
+    def can_refine(self, previous):
+        """每个匹配条件都包含上一次的某个同范围条件时，新结果必然是上一次结果的子集"""
+        if previous is None or previous.columns != self.columns:
+            return False
+        for scope, term in self.terms:
+            if not any(prev_scope == scope and prev_term in term for prev_scope, prev_term in previous.terms):
+                return False
+        return True
+
+    def matches(self, row, index=None):
+        """判断一行数据 (rowid, *values) 是否满足本次搜索；给出拼音索引时也检查拼音命中"""
+        if row[0] in self._index_hits():
+            return True
+        for scope, term in self.terms:
+            if scope in ('initials', 'full'):
+                if index is not None:
+                    field = PinyinInitialsIndex.INITIALS if scope == 'initials' else PinyinInitialsIndex.FULL_PINYIN
+                    if row[0] in (index.search(term, field) or ()):
+                        return True
+                continue
+            for col, value in zip(self.columns, row[1:]):
+                if value is None:
+                    continue
+                is_pinyin = col.endswith('_pinyin')
+                if (scope == 'data' and is_pinyin) or (scope == 'pinyin' and not is_pinyin):
+                    continue
+                if term in str(value).lower():
+                    return True
+        return False
+
+    def _index_hits(self):
+        hits = getattr(self, '_index_hit_set', None)
+        if hits is None:
+            hits = self._index_hit_set = set(self.rowids)
+        return hits
+
+    def iter_pages(self, cursor, page_size=500):
+        """在给定游标上执行搜索，按页返回结果"""
+        found = set()
+        if self.sql:
+            cursor.execute(self.sql, self.params)
+            while True:
+                rows = cursor.fetchmany(page_size)
+                if not rows:
+                    break
+                found.update(row[0] for row in rows)
+                yield rows
+
+        rowids = [rowid for rowid in self.rowids if rowid not in found]
+        for start in range(0, len(rowids), page_size):
+            chunk = rowids[start:start + page_size]
+            placeholders = ', '.join(['?'] * len(chunk))
+            cursor.execute(f'SELECT rowid, * FROM data WHERE rowid IN ({placeholders}) ORDER BY rowid', chunk)
+            yield cursor.fetchall()
+
+    def refine(self, rows, page_size=500):
+        """在上一次的搜索结果中过滤，按页返回（空页也返回，便于调用方检查取消）"""
+        for start in range(0, len(rows), page_size):
+            yield [row for row in rows[start:start + page_size] if self.matches(row)]
+
+def open_read_connection(db_file, timeout=30):
+    """以只读方式打开数据库（mode=ro URI + query_only），WAL模式下可与写连接并发读取"""
+    uri = f"file:{pathname2url(os.path.abspath(db_file))}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, timeout=timeout, check_same_thread=False)
+    conn.execute('PRAGMA query_only=ON')
+    conn.create_function('pinyin_sort_key', 1, pinyin_sort_key)
+    return conn
+
+
+class ReadConnectionPool:
+    """只读连接池：查询各自借用一个读连接，不与写连接共用游标
+
+    连接按需创建，最多size个；全部借出时等待归还。连接可跨线程使用，但同一时刻只属于一个借用者。
+    """
+
+    def __init__(self, db_file, size=4):
+        self.db_file = db_file
+        self.size = size
+        self._condition = threading.Condition()
+        self._idle = []
+        self._created = 0
+        self._closed = False
+
+    @contextmanager
+    def connection(self):
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    def _acquire(self):
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("连接池已关闭")
+                if self._idle:
+                    return self._idle.pop()
+                if self._created < self.size:
+                    self._created += 1
+                    break
+                self._condition.wait()
+        try:
+            return open_read_connection(self.db_file)
+        except Exception:
+            with self._condition:
+                self._created -= 1
+                self._condition.notify()
+            raise
+
+    def _release(self, conn):
+        with self._condition:
+            if self._closed:
+                conn.close()
+                return
+            self._idle.append(conn)
+            self._condition.notify()
+
+    def close(self):
+        """关闭空闲连接，借出的连接在归还时关闭"""
+        with self._condition:
+            self._closed = True
+            for conn in self._idle:
+                conn.close()
+            self._idle = []
+            self._condition.notify_all()
+
+
+SNAPSHOT_SUFFIX = '.snap'
+
+
+class BackupChunkStore:
+    """增量备份的去重块存储
+
+    数据库镜像按固定大小切块，每块以内容的SHA-256命名、zlib压缩后存放在 chunks/<前两位>/<哈希>，
+    已存在的块不再写入。快照清单（.snap）第一行为JSON头，之后每行一个块哈希，
+    由各块依次拼接即可还原完整的数据库文件；不再被任何清单引用的块由 collect_garbage 清理。
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, root):
+        self.root = root
+
+    def _chunk_path(self, digest):
+        return os.path.join(self.root, digest[:2], digest)
+
+    def put(self, data):
+        """保存一个块，返回(哈希, 新写入的字节数)，块已存在时写入字节数为0"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._chunk_path(digest)
+        if os.path.exists(path):
+            return digest, 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        payload = zlib.compress(data, 1)
+        temp_path = f"{path}.{threading.get_ident()}.part"
+        with open(temp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(temp_path, path)
+        return digest, len(payload)
+
+    def get(self, digest):
+        """读取一个块并校验内容"""
+        with open(self._chunk_path(digest), 'rb') as f:
+            data = zlib.decompress(f.read())
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"备份块已损坏: {digest}")
+        return data
+
+    def write_snapshot(self, source, manifest_path, header):
+        """把文件对象source按块存入，并写出快照清单，返回清单头"""
+        digests = []
+        size = stored = 0
+        while True:
+            data = source.read(self.CHUNK_SIZE)
+            if not data:
+                break
+            digest, written = self.put(data)
+            digests.append(digest)
+            size += len(data)
+            stored += written
+
+        header = dict(header, size=size, stored=stored, chunks=len(digests), chunk_size=self.CHUNK_SIZE)
+        temp_path = manifest_path + '.part'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(header, ensure_ascii=False) + '\n')
+                f.writelines(digest + '\n' for digest in digests)
+            os.replace(temp_path, manifest_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return header
+
+    @staticmethod
+    def read_header(manifest_path):
+        """只读取快照清单的JSON头"""
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.loads(f.readline())
+
+    @staticmethod
+    def iter_digests(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            f.readline()
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield line
+
+    def restore_snapshot(self, manifest_path, target_path):
+        """按清单拼接各块，还原出完整的数据库文件"""
+        header = self.read_header(manifest_path)
+        size = 0
+        with open(target_path, 'wb') as f:
+            for digest in self.iter_digests(manifest_path):
+                data = self.get(digest)
+                f.write(data)
+                size += len(data)
+        if size != header.get('size'):
+            raise ValueError(f"快照不完整: {os.path.basename(manifest_path)}")
+        return header
+
+    def collect_garbage(self, manifest_paths):
+        """删除不再被任何快照清单引用的块，返回删除的块数"""
+        referenced = set()
+        for path in manifest_paths:
+            referenced.update(self.iter_digests(path))
+        if not os.path.isdir(self.root):
+            return 0
+
+        removed = 0
+        for prefix in os.listdir(self.root):
+            prefix_dir = os.path.join(self.root, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for name in os.listdir(prefix_dir):
+                if name not in referenced and not name.endswith('.part'):
+                    try:
+                        os.remove(os.path.join(prefix_dir, name))
+                        removed += 1
+                    except OSError:
+                        pass
+        return removed
+
+
+class TableSchema:
+    """data表结构的缓存快照
+
+    保存列名、列类型、拼音伴随列以及预先拼好的插入/更新/搜索SQL，写入和搜索路径直接复用，
+    不再反复执行 PRAGMA table_info。表结构变化（重建表、ALTER TABLE、恢复备份）后由UserDatabase丢弃重建。
+    列表属性为共享快照，调用方不应修改。
+    """
+
+    def __init__(self, table_info):
+        self.columns = [row[1] for row in table_info]
+        self.types = {row[1]: (row[2] or 'TEXT').upper() for row in table_info}
+        self.column_set = frozenset(self.columns)
+        # 非拼音列及其对应的拼音首字母列、拼音排序列（排序列只为文本列建立，排在所有列之后）
+        data_columns = [col for col in self.columns if not col.endswith('_pinyin')]
+        self.sortkey_columns = {col: f"{col}_sortkey" for col in data_columns
+                                if f"{col}_sortkey" in self.column_set}
+        sortkey_set = set(self.sortkey_columns.values())
+        self.data_columns = [col for col in data_columns if col not in sortkey_set]
+        self.pinyin_columns = {col: f"{col}_pinyin" for col in self.data_columns
+                               if f"{col}_pinyin" in self.column_set}
+        # 参与搜索和全文索引的列（排序列的内容只用于排序，不参与搜索）
+        self.search_columns = [col for col in self.columns if col not in sortkey_set]
+        # 搜索列的LIKE搜索，参数为每列一个 %关键词%
+        self.like_search_sql = None
+        if self.search_columns:
+            conditions = ' OR '.join(f"{col} LIKE ?" for col in self.search_columns)
+            self.like_search_sql = f"SELECT rowid, * FROM data WHERE {conditions}"
+        self._insert_sql = {}
+        self._update_sql = {}
+        # 列配置（get_columns_config），首次读取后缓存
+        self.columns_config = None
+
+    @classmethod
+    def load(cls, cursor):
+        cursor.execute('PRAGMA table_info(data)')
+        return cls(cursor.fetchall())
+
+    def like_search_params(self, keyword):
+        return [f"%{keyword}%"] * len(self.search_columns)
+
+    def insert_sql(self, columns):
+        """按列名元组返回（并缓存）INSERT语句"""
+        sql = self._insert_sql.get(columns)
+        if sql is None:
+            placeholders = ', '.join(['?'] * len(columns))
+            sql = self._insert_sql[columns] = f"INSERT INTO data ({', '.join(columns)}) VALUES ({placeholders})"
+        return sql
+
+    def update_sql(self, columns):
+        """按列名元组返回（并缓存）按rowid更新的UPDATE语句"""
+        sql = self._update_sql.get(columns)
+        if sql is None:
+            set_clause = ', '.join(f"{col}=?" for col in columns)
+            sql = self._update_sql[columns] = f"UPDATE data SET {set_clause} WHERE rowid=?"
+        return sql
+
+
 class UserDatabase:
-    def __init__(self, db_file):
+    def __init__(self, db_file, setup=True):
+        """setup为False时只连接已初始化的数据库并读取拼音状态，不修改表结构（供后台线程使用）"""
         self.db_file = db_file
+        # 唯一的写连接；查询走只读连接池，在WAL模式下不被写入和备份阻塞
         self.conn = sqlite3.connect(db_file)
         self.cursor = self.conn.cursor()
+        self.read_pool = ReadConnectionPool(db_file)
+        self.initials_index = None  # 拼音首字母倒排索引，登录后构建
+        self._schema = None  # data表结构缓存，见schema属性
+        self._change_listeners = []  # 行级变更监听，见add_change_listener
+        self.fts_enabled = False
+        if not setup:
+            self._init_pinyin_columns(auto_enable=False)
+            return
         self._create_tables()
         # 设置WAL模式
         self.cursor.execute("PRAGMA journal_mode=WAL")
         # 初始化拼音字段
         self._init_pinyin_columns()
+        # 初始化全文索引
+        self._init_fts_index()
     
     def _create_tables(self):
         pass
+
+    @property
+    def schema(self):
+        """data表结构缓存，首次访问时读取"""
+        if self._schema is None:
+            self._schema = TableSchema.load(self.cursor)
+        return self._schema
+
+    def invalidate_schema(self):
+        """表结构变化后丢弃缓存，下次访问时重新读取"""
+        self._schema = None
     
     def initialize_database(self, columns_config):
+        self.invalidate_schema()
         self.cursor.execute('DROP TABLE IF EXISTS data')
         
         columns = []
@@ -306,71 +1127,68 @@ class UserDatabase:
                                   ('required_column', col['name']))
         
         self.conn.commit()
+        self.invalidate_schema()
+        self._init_fts_index()
+        if self.initials_index is not None:
+            # 新建的表为空
+            self.initials_index = PinyinInitialsIndex()
     
     def get_columns_config(self):
-        self.cursor.execute('SELECT key, value FROM config WHERE key LIKE "col_%"')
-        config = {}
-        for key, value in self.cursor.fetchall():
-            config[key] = value
-        
-        if not config:
+        """读取列配置：config表与表结构各读一次，结果随表结构缓存（不含拼音伴随列和排序列）"""
+        schema = self.schema
+        if schema.columns_config is None:
+            schema.columns_config = self._load_columns_config(schema)
+        if not schema.columns_config:
             return None
+        return [dict(col_config) for col_config in schema.columns_config]
+
+    def _load_columns_config(self, schema):
+        self.cursor.execute('SELECT key, value FROM config')
+        config = dict(self.cursor.fetchall())
         
-        self.cursor.execute('PRAGMA table_info(data)')
-        columns = [row[1] for row in self.cursor.fetchall()]
+        if not any(key.startswith('col_') for key in config):
+            return []
         
+        unique_column = config.get('unique_column')
+        required_column = config.get('required_column')
         columns_config = []
-        for col in columns:
+        for col in schema.data_columns:
             col_config = {
                 'name': col,
                 'label': config.get(f'col_{col}_label', col),
-                'type': 'TEXT'  # 默认类型
+                'type': schema.types.get(col, 'TEXT')
             }
-            
-            # 检查是否是条形码列
-            self.cursor.execute('SELECT value FROM config WHERE key=?', (f"barcode_column_{col}",))
-            if self.cursor.fetchone():
+            if f"barcode_column_{col}" in config:
                 col_config['is_barcode'] = True
-            
-            # 检查是否是二维码列
-            self.cursor.execute('SELECT value FROM config WHERE key=?', (f"qrcode_column_{col}",))
-            if self.cursor.fetchone():
+            if f"qrcode_column_{col}" in config:
                 col_config['is_qrcode'] = True
-            
-            # 检查是否是唯一列
-            self.cursor.execute('SELECT value FROM config WHERE key="unique_column"')
-            result = self.cursor.fetchone()
-            if result and result[0] == col:
+            if unique_column == col:
                 col_config['is_unique'] = True
-            
-            # 检查是否是必填列
-            self.cursor.execute('SELECT value FROM config WHERE key="required_column"')
-            result = self.cursor.fetchone()
-            if result and result[0] == col:
+            if required_column == col:
                 col_config['is_required'] = True
-            
-            # 获取列类型
-            self.cursor.execute('PRAGMA table_info(data)')
-            for col_info in self.cursor.fetchall():
-                if col_info[1] == col:
-                    col_config['type'] = col_info[2].upper()
-                    break
-            
             columns_config.append(col_config)
         
         return columns_config
 
-    def _init_pinyin_columns(self):
+    def _init_pinyin_columns(self, auto_enable=True):
         """初始化拼音字段系统"""
+        self.pinyin_migration_pending = False
         try:
             # 检查是否已启用拼音字段功能
             self.cursor.execute("SELECT value FROM config WHERE key='pinyin_enabled'")
             result = self.cursor.fetchone()
             self.pinyin_enabled = result and result[0] == '1'
             
-            if not self.pinyin_enabled:
+            # 存在检查点说明已有数据的拼音还未补全（上次迁移被中断）
+            self.cursor.execute("SELECT value FROM config WHERE key=?", (PINYIN_CHECKPOINT_KEY,))
+            self.pinyin_migration_pending = self.cursor.fetchone() is not None
+            
+            if not self.pinyin_enabled and auto_enable:
                 # 自动评估是否启用拼音字段
                 self._auto_enable_pinyin()
+            elif self.pinyin_enabled and auto_enable:
+                # 较早启用拼音字段的数据库还没有拼音排序列
+                self._upgrade_sortkey_columns()
                 
         except:
             self.pinyin_enabled = False
@@ -391,90 +1209,273 @@ class UserDatabase:
     def _enable_pinyin_system(self):
         """启用拼音字段系统"""
         try:
+            # 列结构变化前先移除全文索引，避免批量生成拼音时逐行维护旧索引
+            self._drop_fts_index()
+            
             # 为所有文本列添加拼音字段
-            self.cursor.execute('PRAGMA table_info(data)')
-            columns = [row[1] for row in self.cursor.fetchall()]
+            columns = self.schema.columns
+            existing_columns = set(columns)
             
-            for col in columns:
-                pinyin_col = f"{col}_pinyin"
-                # 检查是否已存在拼音列
-                self.cursor.execute(f"PRAGMA table_info(data)")
-                existing_columns = [row[1] for row in self.cursor.fetchall()]
-                
-                if pinyin_col not in existing_columns:
-                    # 添加拼音列
-                    self.cursor.execute(f"ALTER TABLE data ADD COLUMN {pinyin_col} TEXT")
+            try:
+                for col in columns:
+                    pinyin_col = f"{col}_pinyin"
+                    # 检查是否已存在拼音列
+                    if pinyin_col not in existing_columns:
+                        # 添加拼音列
+                        self.cursor.execute(f"ALTER TABLE data ADD COLUMN {pinyin_col} TEXT")
+                        existing_columns.add(pinyin_col)
+            finally:
+                self.invalidate_schema()
+            try:
+                self._add_sortkey_columns()
+            finally:
+                self.invalidate_schema()
             
-            # 标记拼音系统已启用
+            # 标记拼音系统已启用，现有数据的拼音由后台任务从检查点开始补全
             self.cursor.execute("INSERT OR REPLACE INTO config VALUES ('pinyin_enabled', '1')")
+            self.cursor.execute("INSERT OR REPLACE INTO config VALUES (?, '0')", (PINYIN_CHECKPOINT_KEY,))
             self.conn.commit()
             self.pinyin_enabled = True
-            
-            # 为现有数据生成拼音
-            self._generate_pinyin_for_existing_data()
+            self.pinyin_migration_pending = True
             
         except Exception as e:
             print(f"[DEBUG] 启用拼音系统失败: {str(e)}")
             self.pinyin_enabled = False
+        
+        # 按新的列结构重建全文索引
+        self._init_fts_index()
     
+    def _add_sortkey_columns(self):
+        """为文本列添加拼音排序列 <列>_sortkey，返回新增的列数（由调用方提交并丢弃表结构缓存）"""
+        schema = self.schema
+        added = 0
+        for col in schema.data_columns:
+            if schema.types.get(col) == 'TEXT' and col not in schema.sortkey_columns:
+                self.cursor.execute(f"ALTER TABLE data ADD COLUMN {col}_sortkey TEXT")
+                added += 1
+        return added
+
+    def _upgrade_sortkey_columns(self):
+        """为已启用拼音字段的旧数据库补建拼音排序列，现有数据的排序键由后台任务从检查点开始补全"""
+        try:
+            schema = self.schema
+            if all(schema.types.get(col) != 'TEXT' or col in schema.sortkey_columns
+                   for col in schema.data_columns):
+                return
+            # 与启用拼音系统相同：补全期间不逐行维护全文索引，完成后统一重建
+            self._drop_fts_index()
+            try:
+                added = self._add_sortkey_columns()
+            finally:
+                self.invalidate_schema()
+            self.cursor.execute("INSERT OR REPLACE INTO config VALUES (?, '0')", (PINYIN_CHECKPOINT_KEY,))
+            self.conn.commit()
+            self.pinyin_migration_pending = True
+            print(f"[DEBUG] 已添加拼音排序列: {added}")
+        except Exception as e:
+            print(f"[DEBUG] 添加拼音排序列失败: {str(e)}")
+
     def _generate_pinyin_for_existing_data(self):
-        """为现有数据生成拼音字段"""
+        """在当前连接上同步补全现有数据的拼音字段（主窗口使用后台任务PinyinMigrationTask）"""
         if not self.pinyin_enabled:
             return
             
         try:
-            self.cursor.execute('PRAGMA table_info(data)')
-            columns = [row[1] for row in self.cursor.fetchall()]
-            
-            # 获取所有数据
-            self.cursor.execute('SELECT rowid, * FROM data')
-            all_data = self.cursor.fetchall()
-            
-            for row_data in all_data:
-                rowid = row_data[0]
-                update_data = {}
-                
-                for i, value in enumerate(row_data[1:], 1):
-                    if i-1 < len(columns):
-                        col_name = columns[i-1]
-                        pinyin_col = f"{col_name}_pinyin"
-                        
-                        if value and isinstance(value, str) and pinyin_col in columns:
-                            # 生成拼音首字母
-                            pinyin_initials = self._get_pinyin_initials(str(value))
-                            update_data[pinyin_col] = pinyin_initials
-                
-                if update_data:
-                    set_clause = ', '.join([f"{key}=?" for key in update_data.keys()])
-                    sql = f"UPDATE data SET {set_clause} WHERE rowid=?"
-                    self.cursor.execute(sql, tuple(update_data.values()) + (rowid,))
-            
-            self.conn.commit()
-            print(f"[DEBUG] 已为 {len(all_data)} 条记录生成拼音字段")
-            
+            if migrate_pinyin_columns(self.conn):
+                self.finish_pinyin_migration()
         except Exception as e:
             print(f"[DEBUG] 生成拼音字段失败: {str(e)}")
 
+    def finish_pinyin_migration(self):
+        """拼音补全完成后启用依赖拼音列的搜索和全文索引"""
+        self.pinyin_migration_pending = False
+        self._init_fts_index()
+
+    def _init_fts_index(self):
+        """初始化FTS5全文索引（trigram分词），与data表结构保持一致"""
+        self.fts_enabled = False
+        try:
+            self.cursor.execute("SELECT name FROM sqlite_master WHERE name IN ('data', 'data_fts', 'data_fts_au')")
+            existing = {row[0] for row in self.cursor.fetchall()}
+            if 'data' not in existing:
+                return
+
+            columns = self.schema.search_columns
+            fts_columns = []
+            if 'data_fts' in existing:
+                self.cursor.execute('PRAGMA table_info(data_fts)')
+                fts_columns = [row[1] for row in self.cursor.fetchall()]
+
+            # 索引列与数据列不一致（新建/改表/拼音列变化）时重建
+            if fts_columns != columns or 'data_fts_au' not in existing:
+                if getattr(self, 'pinyin_migration_pending', False):
+                    # 拼音补全期间不建索引，避免每次写回都维护索引，完成后再统一重建
+                    print("[DEBUG] 拼音补全未完成，暂缓重建FTS5全文索引")
+                    return
+                self._rebuild_fts_index(columns)
+            self.fts_enabled = True
+        except sqlite3.Error as e:
+            print(f"[DEBUG] FTS5全文索引不可用，使用LIKE搜索: {str(e)}")
+            self.fts_enabled = False
+
+    def _drop_fts_index(self):
+        """删除全文索引及同步触发器"""
+        drop_fts_index(self.cursor)
+        self.fts_enabled = False
+
+    def _rebuild_fts_index(self, columns):
+        """按当前列重建外部内容FTS5表和插入/删除/更新触发器"""
+        self.fts_enabled = False
+        create_fts_index(self.conn, columns)
+
+    def add_change_listener(self, callback):
+        """注册行级变更监听：每次单行写入提交后调用 callback(op, rowid, old_row)
+
+        op 为 'insert'/'update'/'delete'，old_row 为修改或删除前的 (rowid, *values)，插入时为None。
+        """
+        self._change_listeners.append(callback)
+
+    def remove_change_listener(self, callback):
+        if callback in self._change_listeners:
+            self._change_listeners.remove(callback)
+
+    def _notify_change(self, op, rowid, old_row=None):
+        for callback in list(self._change_listeners):
+            try:
+                callback(op, rowid, old_row)
+            except Exception as e:
+                print(f"[DEBUG] 处理数据变更通知失败: {str(e)}")
+
+    def _current_row(self, rowid):
+        """在写连接上读取修改前的行（仅在有监听时需要）"""
+        if not self._change_listeners:
+            return None
+        self.cursor.execute('SELECT rowid, * FROM data WHERE rowid=?', (rowid,))
+        return self.cursor.fetchone()
+
     def insert_data(self, data):
         """插入数据，同时生成拼音字段"""
         # 添加拼音字段
         data_with_pinyin = self._add_pinyin_to_data(data)
-        columns = ', '.join(data_with_pinyin.keys())
-        placeholders = ', '.join(['?'] * len(data_with_pinyin))
-        sql = f"INSERT INTO data ({columns}) VALUES ({placeholders})"
+        sql = self.schema.insert_sql(tuple(data_with_pinyin))
         self.cursor.execute(sql, tuple(data_with_pinyin.values()))
         self.conn.commit()
-        return self.cursor.lastrowid
+        rowid = self.cursor.lastrowid
+        if self.initials_index is not None:
+            self.initials_index.add_row(rowid, self._row_pinyin_cells(data.items()))
+        self._notify_change('insert', rowid)
+        return rowid
     
+    def bulk_insert(self, records, chunk_size=5000, progress_callback=None):
+        """批量插入数据（字典的可迭代对象），返回插入的记录数
+
+        按chunk_size分批使用executemany，每批一个事务；导入期间关闭同步写盘，
+        暂停全文索引触发器，结束后统一重建索引。拼音按批次对不重复的值统一计算。
+        """
+        schema = self.schema
+        columns = schema.data_columns
+        known_columns = set(columns)
+        pinyin_columns = []
+        sortkey_columns = []
+        if self.pinyin_enabled:
+            pinyin_columns = list(schema.pinyin_columns)
+            sortkey_columns = list(schema.sortkey_columns)
+        
+        insert_columns = (columns + [schema.pinyin_columns[col] for col in pinyin_columns] +
+                          [schema.sortkey_columns[col] for col in sortkey_columns])
+        sql = schema.insert_sql(tuple(insert_columns))
+        
+        self.cursor.execute('PRAGMA synchronous')
+        old_synchronous = self.cursor.fetchone()[0]
+        self.cursor.execute('SELECT COALESCE(MAX(rowid), 0) FROM data')
+        last_rowid = self.cursor.fetchone()[0]
+        had_fts = getattr(self, 'fts_enabled', False)
+        inserted = 0
+        try:
+            self.conn.commit()
+            self.cursor.execute('PRAGMA synchronous=OFF')
+            if had_fts:
+                self._drop_fts_index()
+            
+            batch = []
+            for record in records:
+                unknown = set(record) - known_columns
+                if unknown:
+                    raise ValueError(f"数据表中没有列: {', '.join(sorted(unknown))}")
+                batch.append([record.get(col) for col in columns])
+                if len(batch) >= chunk_size:
+                    inserted += self._insert_batch(sql, batch, columns, pinyin_columns, sortkey_columns)
+                    batch = []
+                    if progress_callback:
+                        progress_callback(inserted)
+            if batch:
+                inserted += self._insert_batch(sql, batch, columns, pinyin_columns, sortkey_columns)
+                if progress_callback:
+                    progress_callback(inserted)
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            self.cursor.execute(f'PRAGMA synchronous={old_synchronous}')
+            if had_fts:
+                self._init_fts_index()
+        
+        if self.initials_index is not None and inserted:
+            # 只把新插入的行加入拼音索引
+            columns = self.schema.columns
+            self.cursor.execute('SELECT rowid, * FROM data WHERE rowid > ? ORDER BY rowid', (last_rowid,))
+            for row in self.cursor:
+                self.initials_index.add_row(row[0], self._row_pinyin_cells(zip(columns, row[1:])))
+        return inserted
+
+    def _insert_batch(self, sql, batch, columns, pinyin_columns, sortkey_columns=()):
+        """在一个事务中插入一批数据，拼音首字母和排序键按列对不重复的值计算一次"""
+        if pinyin_columns:
+            indexes = [columns.index(col) for col in pinyin_columns]
+            initials_cache = {}
+            for row in batch:
+                for i in indexes:
+                    value = row[i]
+                    if isinstance(value, str) and value.strip():
+                        initials = initials_cache.get(value)
+                        if initials is None:
+                            initials = initials_cache[value] = self._get_pinyin_initials(value)
+                        row.append(initials)
+                    else:
+                        row.append(None)
+        if sortkey_columns:
+            indexes = [columns.index(col) for col in sortkey_columns]
+            sort_keys = {}
+            for row in batch:
+                for i in indexes:
+                    value = row[i]
+                    if value is None:
+                        row.append(None)
+                        continue
+                    # 文本列会把数值按文本存储，排序键按存储后的文本计算
+                    value = str(value)
+                    sort_key = sort_keys.get(value)
+                    if sort_key is None:
+                        sort_key = sort_keys[value] = pinyin_sort_key(value)
+                    row.append(sort_key)
+        self.cursor.executemany(sql, batch)
+        self.conn.commit()
+        return len(batch)
+
     def update_data(self, rowid, data):
         """更新数据，同时更新拼音字段"""
         # 添加拼音字段
         data_with_pinyin = self._add_pinyin_to_data(data)
-        set_clause = ', '.join([f"{key}=?" for key in data_with_pinyin.keys()])
-        sql = f"UPDATE data SET {set_clause} WHERE rowid=?"
+        sql = self.schema.update_sql(tuple(data_with_pinyin))
+        old_row = self._current_row(rowid)
         self.cursor.execute(sql, tuple(data_with_pinyin.values()) + (rowid,))
         self.conn.commit()
-        return self.cursor.rowcount > 0
+        updated = self.cursor.rowcount > 0
+        if updated and self.initials_index is not None:
+            self._refresh_initials_index_row(rowid)
+        if updated:
+            self._notify_change('update', rowid, old_row)
+        return updated
     
     def _add_pinyin_to_data(self, data):
         """为数据添加拼音字段"""
@@ -483,26 +1484,69 @@ class UserDatabase:
             
         data_with_pinyin = data.copy()
         
-        # 获取现有列信息
-        self.cursor.execute('PRAGMA table_info(data)')
-        existing_columns = [row[1] for row in self.cursor.fetchall()]
-        
+        # 只有拼音列存在时才添加
+        pinyin_columns = self.schema.pinyin_columns
+        sortkey_columns = self.schema.sortkey_columns
         for key, value in data.items():
             if isinstance(value, str) and value.strip():
-                pinyin_key = f"{key}_pinyin"
-                # 只有拼音列存在时才添加
-                if pinyin_key in existing_columns:
+                pinyin_key = pinyin_columns.get(key)
+                if pinyin_key is not None:
                     pinyin_initials = self._get_pinyin_initials(value)
                     data_with_pinyin[pinyin_key] = pinyin_initials
+            # 排序键随值一起更新（包括清空），文本列会把数值按文本存储
+            sortkey_key = sortkey_columns.get(key)
+            if sortkey_key is not None:
+                data_with_pinyin[sortkey_key] = None if value is None else pinyin_sort_key(str(value))
         
         return data_with_pinyin
 
     def delete_data(self, rowid):
         sql = "DELETE FROM data WHERE rowid=?"
+        old_row = self._current_row(rowid)
         self.cursor.execute(sql, (rowid,))
         self.conn.commit()
-        return self.cursor.rowcount > 0
+        deleted = self.cursor.rowcount > 0
+        if deleted and self.initials_index is not None:
+            self.initials_index.remove_row(rowid)
+        if deleted:
+            self._notify_change('delete', rowid, old_row)
+        return deleted
     
+    def _row_pinyin_cells(self, items):
+        """为含中文的单元格生成 (首字母, 全拼) 列表，items为 (列名, 值) 序列"""
+        cells = []
+        for col, value in items:
+            if col.endswith(('_pinyin', '_sortkey')) or not value or not isinstance(value, str):
+                continue
+            if any('\u4e00' <= char <= '\u9fff' for char in value):
+                initials = pinyin_initials(value).lower()
+                full = pinyin_full(value).lower()
+                cells.append((initials, full))
+        return tuple(cells)
+
+    def build_initials_index(self):
+        """构建拼音首字母/全拼倒排索引（登录后在数据库线程调用一次，之后随增删改增量维护）"""
+        index = PinyinInitialsIndex()
+        try:
+            columns = self.schema.columns
+            if columns:
+                with self.read_pool.connection() as conn:
+                    cursor = conn.execute('SELECT rowid, * FROM data ORDER BY rowid')
+                    index.build((row[0], self._row_pinyin_cells(zip(columns, row[1:]))) for row in cursor)
+            print(f"[DEBUG] 拼音索引已构建，含中文记录数: {len(index)}")
+        except Exception as e:
+            print(f"[DEBUG] 构建拼音索引失败: {str(e)}")
+        self.initials_index = index
+        return index
+
+    def _refresh_initials_index_row(self, rowid):
+        """按数据库中的最新内容刷新某行的拼音索引"""
+        row = self.get_data_by_id(rowid)
+        if row is None:
+            self.initials_index.remove_row(rowid)
+            return
+        self.initials_index.add_row(rowid, self._row_pinyin_cells(zip(self.schema.columns, row[1:])))
+
     def check_unique(self, column, value, exclude_rowid=None):
         sql = f"SELECT COUNT(*) FROM data WHERE {column}=?"
         params = [value]
@@ -511,35 +1555,75 @@ class UserDatabase:
             sql += " AND rowid!=?"
             params.append(exclude_rowid)
         
-        self.cursor.execute(sql, tuple(params))
-        return self.cursor.fetchone()[0] == 0
+        return self._read_one(sql, tuple(params))[0] == 0
     
+    def _fts_plan(self, keyword, columns, terms):
+        """生成FTS5全文索引搜索计划，按bm25相关度排序
+
+        trigram分词至少需要3个字符，关键词过短或索引不可用时返回None，由调用方回退到LIKE搜索
+        """
+        if not getattr(self, 'fts_enabled', False):
+            return None
+
+        phrases = []
+        for term in terms:
+            if term and term not in phrases:
+                phrases.append(term)
+        if not phrases or any(len(term) < 3 for term in phrases):
+            return None
+
+        # 每个关键词作为短语查询，避免FTS5语法字符被解析
+        match_expr = ' OR '.join('"' + term.replace('"', '""') + '"' for term in phrases)
+        sql = '''
+            SELECT data.rowid, data.* FROM data_fts
+            JOIN data ON data.rowid = data_fts.rowid
+            WHERE data_fts MATCH ?
+            ORDER BY bm25(data_fts)
+        '''
+        return SearchPlan(keyword, columns, sql, (match_expr,),
+                          terms=[('all', term.lower()) for term in phrases])
+
+    def _search_fts(self, terms):
+        """使用FTS5全文索引搜索，不可用时返回None"""
+        plan = self._fts_plan(terms[0], self._data_columns(), terms)
+        if plan is None:
+            return None
+        try:
+            return self.run_search_plan(plan)
+        except sqlite3.Error as e:
+            print(f"[DEBUG] FTS5搜索失败，回退到LIKE搜索: {str(e)}")
+            return None
+
+    def _data_columns(self):
+        return self.schema.search_columns
+
+    def run_search_plan(self, plan):
+        """在只读连接上执行搜索计划并返回全部结果"""
+        rows = []
+        with self.read_pool.connection() as conn:
+            for page in plan.iter_pages(conn.cursor()):
+                rows.extend(page)
+        return rows
+
     def search_data(self, keyword):
-        self.cursor.execute('PRAGMA table_info(data)')
-        columns = [row[1] for row in self.cursor.fetchall()]
-        
-        conditions = []
-        params = []
-        for col in columns:
-            conditions.append(f"{col} LIKE ?")
-            params.append(f"%{keyword}%")
-        
-        sql = f"SELECT rowid, * FROM data WHERE {' OR '.join(conditions)}"
-        self.cursor.execute(sql, params)
-        return self.cursor.fetchall()
+        rows = self._search_fts([keyword])
+        if rows is not None:
+            return rows
+
+        schema = self.schema
+        return self._read_all(schema.like_search_sql, schema.like_search_params(keyword))
 
     def search_data_enhanced(self, keyword):
         """增强搜索：支持中文、英文、拼音、拼音首字母模糊搜索"""
-        self.cursor.execute('PRAGMA table_info(data)')
-        columns = [row[1] for row in self.cursor.fetchall()]
+        columns = self.schema.search_columns
         
-        # 生成拼音和拼音首字母
-        from pypinyin import lazy_pinyin, Style
+        # 中文转拼音及拼音首字母
+        full = pinyin_full(keyword)
+        initials = pinyin_initials(keyword)
         
-        # 中文转拼音
-        pinyin_full = ''.join(lazy_pinyin(keyword))
-        # 中文转拼音首字母
-        pinyin_initials = ''.join(lazy_pinyin(keyword, style=Style.FIRST_LETTER))
+        rows = self._search_fts([keyword, full, initials])
+        if rows is not None:
+            return rows
         
         conditions = []
         params = []
@@ -550,116 +1634,415 @@ class UserDatabase:
             params.append(f"%{keyword}%")
             
             # 拼音全拼搜索
-            if pinyin_full and pinyin_full != keyword:
+            if full and full != keyword:
                 conditions.append(f"{col} LIKE ?")
-                params.append(f"%{pinyin_full}%")
+                params.append(f"%{full}%")
             
             # 拼音首字母搜索
-            if pinyin_initials and pinyin_initials != keyword:
+            if initials and initials != keyword:
                 conditions.append(f"{col} LIKE ?")
-                params.append(f"%{pinyin_initials}%")
+                params.append(f"%{initials}%")
         
         if not conditions:
             return []
         
         sql = f"SELECT DISTINCT rowid, * FROM data WHERE {' OR '.join(conditions)}"
-        self.cursor.execute(sql, params)
-        return self.cursor.fetchall()
+        return self._read_all(sql, params)
 
     def search_data_all_columns(self, keyword):
         """搜索所有列，包含完整数据"""
-        self.cursor.execute('PRAGMA table_info(data)')
-        columns = [row[1] for row in self.cursor.fetchall()]
+        rows = self._search_fts([keyword])
+        if rows is not None:
+            return rows
         
-        if not columns:
+        schema = self.schema
+        if not schema.search_columns:
             return []
         
-        # 构建搜索条件
-        conditions = []
-        params = []
-        for col in columns:
-            conditions.append(f"{col} LIKE ?")
-            params.append(f"%{keyword}%")
-        
-        sql = f"SELECT rowid, * FROM data WHERE {' OR '.join(conditions)}"
-        self.cursor.execute(sql, params)
-        return self.cursor.fetchall()
+        return self._read_all(schema.like_search_sql, schema.like_search_params(keyword))
 
 
     def get_all_data(self):
-        self.cursor.execute('SELECT rowid, * FROM data')
-        return self.cursor.fetchall()
-    
+        return list(self.iter_rows())
+
+    SORT_INDEX_THRESHOLD = 3  # 同一列排序达到该次数后为其建立索引
+
+    def sort_spec(self, column):
+        """返回列的排序表达式及对应的Python文本排序键：文本列按拼音排序，其他列按列亲和性直接比较
+
+        文本列有已补全的拼音排序列时直接按该列排序（可建索引），否则在查询时调用 pinyin_sort_key 计算。
+        """
+        if self.schema.types.get(column, 'TEXT') != 'TEXT':
+            return column, None
+        sortkey_col = self.schema.sortkey_columns.get(column)
+        if sortkey_col is not None and not self.pinyin_migration_pending:
+            return sortkey_col, pinyin_sort_key
+        return f"pinyin_sort_key({column})", pinyin_sort_key
+
+    def row_key(self, row, order_by=None):
+        """返回一行 (rowid, *values) 在键集分页中的位置键：按rowid排序时为rowid，按列排序时为 (列值, rowid)"""
+        if order_by is None:
+            return row[0]
+        return (row[1 + self.schema.columns.index(order_by)], row[0])
+
+    def fetch_page(self, where=None, order_by=None, after_key=None, limit=256, params=(), descending=False):
+        """键集分页读取一页数据 (rowid, *values)，after_key为上一页最后一行的位置键（见row_key），None为第一页
+
+        order_by为None时按rowid排序；为列名时按 (列值, rowid) 整体升序或降序，文本列按拼音排序键，
+        与SQLite一致升序时NULL在前、降序时NULL在后。where/params为附加的过滤条件。
+        NULL与非NULL分段查询，非NULL段使用行值比较，列上有索引时无需扫描和临时排序。
+        """
+        direction = 'DESC' if descending else 'ASC'
+        op = '<' if descending else '>'
+        base = [f"({where})"] if where else []
+
+        def page(conditions, args, order, size):
+            sql = "SELECT rowid, * FROM data"
+            if conditions:
+                sql += f" WHERE {' AND '.join(conditions)}"
+            return self._read_all(f"{sql} ORDER BY {order} LIMIT ?", list(params) + args + [size])
+
+        if order_by is None:
+            conditions, args = list(base), []
+            if after_key is not None:
+                conditions.append(f"rowid {op} ?")
+                args.append(after_key)
+            return page(conditions, args, f"rowid {direction}", limit)
+
+        expr, text_key = self.sort_spec(order_by)
+        value, rowid = after_key if after_key is not None else (None, None)
+        if text_key is not None and isinstance(value, str):
+            value = text_key(value)
+        # 升序先NULL段后非NULL段，降序相反；从after_key所在的分段开始
+        phases = ['null', 'value'] if not descending else ['value', 'null']
+        if after_key is not None:
+            phases = phases[phases.index('null' if value is None else 'value'):]
+
+        rows = []
+        for phase in phases:
+            conditions, args = list(base), []
+            if phase == 'null':
+                conditions.append(f"{expr} IS NULL")
+                if after_key is not None:
+                    conditions.append(f"rowid {op} ?")
+                    args.append(rowid)
+                order = f"rowid {direction}"
+            else:
+                if after_key is not None:
+                    conditions.append(f"({expr}, rowid) {op} (?, ?)")
+                    args.extend([value, rowid])
+                else:
+                    conditions.append(f"{expr} IS NOT NULL")
+                order = f"{expr} {direction}, rowid {direction}"
+            rows.extend(page(conditions, args, order, limit - len(rows)))
+            if len(rows) >= limit:
+                break
+            # 进入下一段时不再带游标条件
+            after_key = None
+        return rows
+
+    def iter_rows(self, where=None, order_by=None, after_key=None, limit=None, params=(), descending=False,
+                  page_size=500):
+        """按键集分页逐行产出 (rowid, *values) 的生成器，参数同fetch_page，limit为最多产出的行数（None为全部）
+
+        每页是一次独立的短查询，页与页之间不持有读事务；内存占用和首行延迟只与page_size有关。
+        """
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = page_size if remaining is None else min(page_size, remaining)
+            rows = self.fetch_page(where, order_by, after_key, size, params, descending)
+            yield from rows
+            if len(rows) < size:
+                return
+            if remaining is not None:
+                remaining -= len(rows)
+            after_key = self.row_key(rows[-1], order_by)
+
+    def record_sort(self, column):
+        """记录一次按列排序；达到阈值后建立该列的索引（在后台线程调用）"""
+        key = f"sort_count_{column}"
+        self.cursor.execute("SELECT value FROM config WHERE key=?", (key,))
+        result = self.cursor.fetchone()
+        count = int(result[0]) + 1 if result else 1
+        self.cursor.execute("INSERT OR REPLACE INTO config VALUES (?, ?)", (key, str(count)))
+        self.conn.commit()
+        if count >= self.SORT_INDEX_THRESHOLD:
+            self.ensure_sort_index(column)
+        return count
+
+    def ensure_sort_index(self, column):
+        """为经常排序的列建立索引：文本列索引其拼音排序列，排序列未建立或未补全时跳过"""
+        expr, _ = self.sort_spec(column)
+        if expr not in self.schema.column_set:
+            return False
+        self.cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_data_{expr} ON data({expr})")
+        self.conn.commit()
+        return True
+
     def get_data_by_id(self, rowid):
-        self.cursor.execute('SELECT rowid, * FROM data WHERE rowid=?', (rowid,))
-        return self.cursor.fetchone()
+        return self._read_one('SELECT rowid, * FROM data WHERE rowid=?', (rowid,))
     
+    def get_data_by_ids(self, rowids, chunk_size=500):
+        """按rowid列表批量获取数据，保持rowid升序"""
+        rows = []
+        rowids = sorted(rowids)
+        with self.read_pool.connection() as conn:
+            for start in range(0, len(rowids), chunk_size):
+                chunk = rowids[start:start + chunk_size]
+                placeholders = ', '.join(['?'] * len(chunk))
+                rows.extend(conn.execute(
+                    f'SELECT rowid, * FROM data WHERE rowid IN ({placeholders}) ORDER BY rowid', chunk).fetchall())
+        return rows
+
     def get_data_count(self):
-        self.cursor.execute('SELECT COUNT(*) FROM data')
-        return self.cursor.fetchone()[0]
+        return self._read_one('SELECT COUNT(*) FROM data')[0]
+
+    def get_stats(self, numeric_columns):
+        """一次扫描统计记录总数及各数值列的 (总和, 平均值, 最小值, 最大值, 非空数)"""
+        expressions = ['COUNT(*)']
+        for col in numeric_columns:
+            expressions.extend([f'SUM({col})', f'AVG({col})', f'MIN({col})', f'MAX({col})', f'COUNT({col})'])
+        row = self._read_one(f"SELECT {', '.join(expressions)} FROM data")
+        stats = {col: row[1 + i * 5:6 + i * 5] for i, col in enumerate(numeric_columns)}
+        return row[0], stats
     
-    def export_to_csv(self, filename):
-        self.cursor.execute('SELECT * FROM data')
-        data = self.cursor.fetchall()
-        
-        self.cursor.execute('PRAGMA table_info(data)')
-        columns = [row[1] for row in self.cursor.fetchall()]
-        
-        with open(filename, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(columns)
-            writer.writerows(data)
-        
-        return True
+    def export_rows(self, rowids=None, page_size=2000, columns=None):
+        """返回逐行产出列值元组的生成器（不含rowid），rowids为None时导出全表
 
-    def auto_detect_columns(self, data):
-        """自动检测数据结构并返回列配置"""
+        columns默认为全部数据列（不含拼音伴随列和排序列），给出rowids时按其顺序产出。
+        列信息在调用时确定，生成器只使用只读连接池，可交给后台线程消费。
+        """
+        schema = self.schema
+        if columns is None or list(columns) == schema.data_columns[:len(columns)]:
+            # 数据列总在表的最前面，直接切片
+            end = 1 + len(schema.data_columns if columns is None else columns)
+            pick = lambda row: row[1:end]
+        else:
+            indexes = [1 + schema.columns.index(col) for col in columns]
+            pick = lambda row: tuple(row[i] for i in indexes)
+        if rowids is None:
+            return (pick(row) for row in self.iter_rows(page_size=page_size))
+        rowids = list(rowids)
+
+        def selected():
+            for start in range(0, len(rowids), page_size):
+                chunk = rowids[start:start + page_size]
+                found = {row[0]: row for row in self.get_data_by_ids(chunk)}
+                for rowid in chunk:
+                    row = found.get(rowid)
+                    if row is not None:
+                        yield pick(row)
+        return selected()
+
+    def export_to_csv(self, filename, compression=None, progress_callback=None, cancel_event=None):
+        """流式导出全表数据列到CSV，compression为None时按扩展名（.gz/.zst）决定，返回导出的行数"""
+        if compression is None:
+            compression = export_compression(filename)
+        return write_csv_export(filename, self.schema.data_columns, self.export_rows(), compression,
+                                progress_callback, cancel_event)
+
+    SCHEMA_SAMPLE_SIZE = 1000  # 类型推断使用的样本行数
+
+    def auto_detect_columns(self, data, kinds=None):
+        """自动检测数据结构并返回列配置
+
+        列表数据按样本推断类型；kinds 为导入时对全部记录累计的各列可用类型（见 track_column_kinds），
+        给出时以它为准，样本只用于统计空值率和不同值个数。
+        """
         columns_config = []
         
         if isinstance(data, dict):  # 处理类似rules.json的结构
             for key, value in data.items():
                 if isinstance(value, list) and value and isinstance(value[0], dict):
                     columns_config.append({
-                        'name': key.replace(' ', '_').lower(),
+                        'name': normalize_column_name(key),
                         'label': key,
                         'type': 'TEXT'
                     })
         elif isinstance(data, list) and data and isinstance(data[0], dict):  # 处理CSV或列表JSON
-            sample_item = data[0]
-            for key, value in sample_item.items():
-                col_type = 'TEXT'
-                if isinstance(value, (int, float)):
-                    col_type = 'INTEGER' if isinstance(value, int) else 'REAL'
+            for key, stats in self.infer_column_stats(data, kinds).items():
                 columns_config.append({
-                    'name': key.replace(' ', '_').lower(),
+                    'name': normalize_column_name(key),
                     'label': key,
-                    'type': col_type
+                    'type': stats['type']
                 })
         
         return columns_config
 
+    def infer_column_stats(self, records, column_kinds=None):
+        """根据样本记录推断每列的类型，并统计空值率和不同值个数
+
+        类型按 EAN13 > INTEGER > REAL > DATE > TEXT 的顺序，取能容纳全部非空值的第一种。
+        column_kinds 给出全部记录上累计的可用类型时，列集合和类型都以它为准（样本中没有出现的列也包括在内），
+        样本只用于统计；否则只依据样本。样本中没有出现的列，统计值为None。
+        """
+        columns = {}
+        for record in records:
+            if not isinstance(record, dict):
+                continue
+            for key in record:
+                if key not in columns:
+                    columns[key] = {'count': 0, 'nulls': 0, 'values': set(),
+                                    'kinds': set(INFERABLE_KINDS)}
+            for key, stats in columns.items():
+                value = record.get(key)
+                stats['count'] += 1
+                if value is None or (isinstance(value, str) and not value.strip()):
+                    stats['nulls'] += 1
+                    continue
+                stats['values'].add(value if isinstance(value, (str, int, float)) else str(value))
+                kinds = stats['kinds']
+                if kinds:
+                    kinds &= self._value_kinds(value)
+        
+        result = {}
+        for key in (columns if column_kinds is None else column_kinds):
+            stats = columns.get(key)
+            if column_kinds is None:
+                # 样本中全为空值的列没有可依据的类型
+                allowed = stats['kinds'] if stats['count'] > stats['nulls'] else set()
+            else:
+                # 全文件都没有非空值时类型集合保持初始值，同样按文本处理
+                allowed = column_kinds[key]
+                if allowed == set(INFERABLE_KINDS):
+                    allowed = set()
+            col_type = 'TEXT'
+            for kind in INFERABLE_KINDS:
+                if kind in allowed:
+                    col_type = kind
+                    break
+            result[key] = {
+                'type': col_type,
+                'count': stats['count'] if stats else 0,
+                'null_rate': (stats['nulls'] / stats['count'] if stats['count'] else 0.0) if stats else None,
+                'cardinality': len(stats['values']) if stats else None
+            }
+        return result
+
+    @staticmethod
+    def _value_kinds(value):
+        """返回单个值可以匹配的类型集合"""
+        if isinstance(value, bool):
+            return set()
+        if isinstance(value, int):
+            # 超出SQLite整数范围的值无法按数字保存
+            return {'INTEGER', 'REAL'} if -2 ** 63 <= value < 2 ** 63 else set()
+        if isinstance(value, float):
+            return {'REAL'}
+        if not isinstance(value, str):
+            return set()
+        
+        text = value.strip()
+        if text.isdigit() and text.isascii():
+            kinds = {'REAL'}
+            if len(text) == 13 and validate_ean13_code(text):
+                kinds.add('EAN13')
+            # 前导零或超长数字（编号类）保留为文本
+            if (text == '0' or not text.startswith('0')) and len(text) <= 15:
+                kinds.add('INTEGER')
+            else:
+                kinds.discard('REAL')
+            return kinds
+        if _INTEGER_RE.match(text):
+            digits = text.lstrip('+-')
+            # 带符号的前导零编号同样保留为文本
+            return {'INTEGER', 'REAL'} if digits == '0' or not digits.startswith('0') else set()
+        if _REAL_RE.match(text):
+            return {'REAL'}
+        if parse_date_value(text):
+            return {'DATE'}
+        return set()
+
+    @staticmethod
+    def coerce_value(col_type, value):
+        """按列类型转换导入的值，无法转换时保留原始文本，保证不丢数据"""
+        if value is None:
+            return None if col_type in ('INTEGER', 'REAL', 'DATE') else ""
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            return str(value)
+        if not isinstance(value, str):
+            if col_type == 'INTEGER' and isinstance(value, float) and value.is_integer():
+                return int(value)
+            return value if col_type in ('INTEGER', 'REAL') else str(value)
+        
+        text = value.strip()
+        if col_type in ('INTEGER', 'REAL', 'DATE') and not text:
+            return None
+        if col_type == 'INTEGER':
+            digits = text.lstrip('+-')
+            # 带前导零的编号保留为文本
+            if _INTEGER_RE.match(text) and (digits == '0' or not digits.startswith('0')):
+                return int(text)
+        elif col_type == 'REAL':
+            if _REAL_RE.match(text):
+                return float(text)
+        elif col_type == 'DATE':
+            return parse_date_value(text) or value
+        return value
+
     def get_cursor(self):
         """获取数据库游标"""
         return self.cursor
 
     def close(self):
+        self.read_pool.close()
         self.conn.close()
 
-    def backup_database(self, backup_type="auto", max_backups=30):
-        """备份当前数据库"""
+    def _read_all(self, sql, params=()):
+        """在只读连接上执行查询并返回全部结果"""
+        with self.read_pool.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def _read_one(self, sql, params=()):
+        """在只读连接上执行查询并返回第一行"""
+        with self.read_pool.connection() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def get_config_value(self, key, default=None):
+        """读取config表中的一项设置，不存在时返回default"""
+        try:
+            row = self._read_one("SELECT value FROM config WHERE key=?", (key,))
+        except sqlite3.Error:
+            return default
+        return row[0] if row else default
+
+    def set_config_value(self, key, value):
+        """写入config表中的一项设置"""
+        self.cursor.execute("INSERT OR REPLACE INTO config VALUES (?, ?)", (key, str(value)))
+        self.conn.commit()
+
+    def backup_database(self, backup_type="auto", max_backups=30, incremental=None):
+        """备份当前数据库
+
+        手动备份为完整的 .db 文件，便于单独拷走；自动备份和恢复前的回滚备份默认为增量快照
+        （.snap清单 + 去重块存储），只有内容变化的块会新写入。自动备份时数据库自上次快照后
+        没有变化则不再生成新快照，直接返回上次的快照。
+        """
+        if incremental is None:
+            incremental = backup_type != "manual"
         backups_dir = os.path.join(os.path.dirname(self.db_file), "backups")
         os.makedirs(backups_dir, exist_ok=True)
         
         # 创建带时间戳的备份文件名
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_name = f"{os.path.splitext(os.path.basename(self.db_file))[0]}_{backup_type}_{timestamp}.db"
-        backup_path = os.path.join(backups_dir, backup_name)
+        db_name = os.path.splitext(os.path.basename(self.db_file))[0]
+        backup_name = f"{db_name}_{backup_type}_{timestamp}"
+        suffix = SNAPSHOT_SUFFIX if incremental else ".db"
+        # 增量快照很快，同一秒内可能有多次备份，文件名加序号避免覆盖
+        counter = 1
+        while os.path.exists(os.path.join(backups_dir, backup_name + suffix)):
+            backup_name = f"{db_name}_{backup_type}_{timestamp}_{counter}"
+            counter += 1
         
         try:
-            # 使用WAL模式备份
-            backup_conn = sqlite3.connect(backup_path)
-            self.conn.backup(backup_conn)
-            backup_conn.close()
+            if incremental:
+                backup_path = self._snapshot_database(backups_dir, backup_name, backup_type)
+            else:
+                # 使用WAL模式备份
+                backup_path = os.path.join(backups_dir, backup_name + suffix)
+                backup_conn = sqlite3.connect(backup_path)
+                self.conn.backup(backup_conn)
+                backup_conn.close()
             
             # 清理多余的备份文件
             self._cleanup_old_backups(backups_dir, max_backups)
@@ -668,12 +2051,104 @@ class UserDatabase:
         except Exception as e:
             print(f"备份失败: {str(e)}")
             return None
+
+    def _database_stamp(self):
+        """数据库文件及WAL文件的(大小, 修改时间)，用于判断自上次快照后是否有写入"""
+        stamp = []
+        for path in (self.db_file, self.db_file + '-wal'):
+            try:
+                st = os.stat(path)
+                stamp.append([st.st_size, st.st_mtime_ns])
+            except OSError:
+                stamp.append([0, 0])
+        return stamp
+
+    def _latest_snapshot(self, backups_dir):
+        """本数据库最近一次增量快照的(路径, 清单头)，没有时返回(None, None)"""
+        db_name = os.path.splitext(os.path.basename(self.db_file))[0]
+        latest = (None, None)
+        for f in os.listdir(backups_dir):
+            if not (f.endswith(SNAPSHOT_SUFFIX) and f.startswith(db_name + "_")):
+                continue
+            path = os.path.join(backups_dir, f)
+            try:
+                header = BackupChunkStore.read_header(path)
+            except (OSError, ValueError):
+                continue
+            if header.get('db') == db_name and (latest[1] is None or header['created'] > latest[1]['created']):
+                latest = (path, header)
+        return latest
+
+    @contextmanager
+    def _consistent_image(self, backups_dir, retries=3):
+        """产出内容一致的数据库文件对象，供增量快照按块读取
+
+        WAL模式下先做TRUNCATE检查点再开启读事务：读事务开始时WAL为空，则事务期间任何检查点都不会
+        改写数据库文件，可以直接顺序读取原文件，其他连接的写入照常追加到WAL。检查点被长时间的读写
+        阻塞时，退回用备份接口复制到临时文件再读取。
+        """
+        conn = self.conn
+        if conn.in_transaction:
+            conn.commit()
+        wal_mode = conn.execute('PRAGMA journal_mode').fetchone()[0].lower() == 'wal'
+        wal_path = self.db_file + '-wal'
+        for attempt in range(retries):
+            if wal_mode and conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone()[0]:
+                time.sleep(0.2 * (attempt + 1))
+                continue
+            conn.execute('BEGIN')
+            try:
+                conn.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+                if not wal_mode or not os.path.exists(wal_path) or os.path.getsize(wal_path) == 0:
+                    stamp = self._database_stamp()
+                    with open(self.db_file, 'rb') as f:
+                        yield f, stamp
+                    return
+            finally:
+                conn.rollback()
+
+        print("[DEBUG] 检查点被阻塞，增量备份改用临时完整副本")
+        temp_path = os.path.join(backups_dir, f".snapshot_{threading.get_ident()}.tmp")
+        try:
+            stamp = self._database_stamp()
+            temp_conn = sqlite3.connect(temp_path)
+            try:
+                conn.backup(temp_conn)
+            finally:
+                temp_conn.close()
+            with open(temp_path, 'rb') as f:
+                yield f, stamp
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _snapshot_database(self, backups_dir, backup_name, backup_type):
+        """生成增量快照：只把内容变化过的块写入块存储，清单记录全部块的哈希"""
+        db_name = os.path.splitext(os.path.basename(self.db_file))[0]
+        if backup_type == "auto":
+            latest_path, latest = self._latest_snapshot(backups_dir)
+            if latest is not None and latest.get('stamp') == self._database_stamp():
+                print(f"[DEBUG] 数据库自上次快照后未变化，跳过自动备份: {os.path.basename(latest_path)}")
+                return latest_path
+
+        store = BackupChunkStore(os.path.join(backups_dir, "chunks"))
+        manifest_path = os.path.join(backups_dir, backup_name + SNAPSHOT_SUFFIX)
+        with self._consistent_image(backups_dir) as (image, stamp):
+            header = store.write_snapshot(image, manifest_path, {
+                'format': 1,
+                'db': db_name,
+                'type': backup_type,
+                'created': datetime.now().isoformat(timespec='microseconds'),
+                'stamp': stamp,
+            })
+        print(f"[DEBUG] 增量快照完成: {header['chunks']} 块，新写入 {header['stored'] / 1024:.1f} KB")
+        return manifest_path
     
     def _cleanup_old_backups(self, backups_dir, max_backups):
-        """清理旧的备份文件"""
+        """清理旧的备份文件（完整备份与增量快照一起计数），删除快照后回收不再引用的块"""
         backups = []
         for f in os.listdir(backups_dir):
-            if f.endswith(".db"):
+            if f.endswith(".db") or f.endswith(SNAPSHOT_SUFFIX):
                 full_path = os.path.join(backups_dir, f)
                 backups.append((full_path, os.path.getmtime(full_path)))
         
@@ -681,35 +2156,76 @@ class UserDatabase:
         backups.sort(key=lambda x: x[1])
         
         # 删除多余的备份文件
+        removed_snapshot = False
         while len(backups) > max_backups:
             old_backup = backups.pop(0)
             try:
                 os.remove(old_backup[0])
+                removed_snapshot = removed_snapshot or old_backup[0].endswith(SNAPSHOT_SUFFIX)
             except:
                 pass
+
+        if removed_snapshot:
+            store = BackupChunkStore(os.path.join(backups_dir, "chunks"))
+            removed = store.collect_garbage([path for path, _ in backups if path.endswith(SNAPSHOT_SUFFIX)])
+            print(f"[DEBUG] 已清理不再引用的备份块: {removed}")
     
     def get_backups_list(self):
-        """获取所有备份文件列表"""
+        """获取所有备份文件列表（含增量快照，其size为数据库大小，stored为该快照新写入的字节数）"""
         backups_dir = os.path.join(os.path.dirname(self.db_file), "backups")
         if not os.path.exists(backups_dir):
             return []
         
         backups = []
         for f in os.listdir(backups_dir):
-            if f.endswith(".db") and os.path.splitext(f)[0].startswith(os.path.splitext(os.path.basename(self.db_file))[0]):
+            incremental = f.endswith(SNAPSHOT_SUFFIX)
+            if (f.endswith(".db") or incremental) and os.path.splitext(f)[0].startswith(os.path.splitext(os.path.basename(self.db_file))[0]):
                 full_path = os.path.join(backups_dir, f)
                 file_info = {
                     "path": full_path,
                     "name": f,
                     "size": os.path.getsize(full_path),
                     "mtime": os.path.getmtime(full_path),
-                    "type": "auto" if "_auto_" in f else "manual" if "_manual_" in f else "rollback" if "_rollback_" in f else "unknown"
+                    "type": "auto" if "_auto_" in f else "manual" if "_manual_" in f else "rollback" if "_rollback_" in f else "unknown",
+                    "incremental": incremental
                 }
+                if incremental:
+                    try:
+                        header = BackupChunkStore.read_header(full_path)
+                    except (OSError, ValueError):
+                        continue
+                    file_info["size"] = header.get("size", 0)
+                    file_info["stored"] = header.get("stored", 0)
                 backups.append(file_info)
         
         # 按修改时间倒序排列(新的在前面)
         backups.sort(key=lambda x: x["mtime"], reverse=True)
         return backups
+
+    @contextmanager
+    def open_backup(self, backup_path):
+        """打开备份以供读取；增量快照先由块存储还原到临时文件，用完后删除"""
+        if not backup_path.endswith(SNAPSHOT_SUFFIX):
+            conn = sqlite3.connect(backup_path)
+            try:
+                yield conn
+            finally:
+                conn.close()
+            return
+
+        backups_dir = os.path.dirname(backup_path)
+        temp_path = os.path.join(backups_dir, f".restore_{threading.get_ident()}.tmp")
+        try:
+            BackupChunkStore(os.path.join(backups_dir, "chunks")).restore_snapshot(backup_path, temp_path)
+            conn = sqlite3.connect(temp_path)
+            try:
+                yield conn
+            finally:
+                conn.close()
+        finally:
+            for path in (temp_path, temp_path + '-wal', temp_path + '-shm'):
+                if os.path.exists(path):
+                    os.remove(path)
     
     def restore_from_backup(self, backup_path):
         """从备份恢复数据库"""
@@ -717,19 +2233,16 @@ class UserDatabase:
             # 先创建恢复前的备份
             self.backup_database(backup_type="rollback")
             
-            # 关闭当前连接
-            self.conn.close()
-            
-            # 删除原数据库文件
-            if os.path.exists(self.db_file):
-                os.remove(self.db_file)
+            # 通过SQLite备份接口把备份内容写回当前数据库，不删除文件，
+            # 其他线程的连接无需断开，WAL文件也不会与新文件错配
+            with self.open_backup(backup_path) as source:
+                source.backup(self.conn)
             
-            # 复制备份文件
-            shutil.copy2(backup_path, self.db_file)
-            
-            # 重新连接
-            self.conn = sqlite3.connect(self.db_file)
-            self.cursor = self.conn.cursor()
+            # 备份中的表结构可能不同
+            self.invalidate_schema()
+            self._init_fts_index()
+            if self.initials_index is not None:
+                self.build_initials_index()
             
             return True
         except Exception as e:
@@ -741,28 +2254,46 @@ class UserDatabase:
 
     def search_data_all_columns_enhanced(self, keyword):
         """增强的全列搜索：智能选择搜索策略"""
-        # 检查数据量决定搜索策略
-        count = self.get_data_count()
+        return self.run_search_plan(self.build_search_plan(keyword))
+
+    def build_search_plan(self, keyword):
+        """按智能搜索策略生成搜索计划（执行可放到后台线程的独立连接上）"""
+        columns = self._data_columns()
+        
+        plan = None
+        # 拼音列补全完成前不能依赖拼音列
+        pinyin_ready = self.pinyin_enabled and not self.pinyin_migration_pending
+        # 优先使用全文索引；未启用拼音列时，拼音缩写交给拼音倒排索引匹配
+        is_possible_initials = keyword.isascii() and keyword.isalpha() and not any(char in keyword.lower() for char in 'aeiou')
+        if pinyin_ready or not is_possible_initials:
+            pinyin_full = self._get_pinyin_full(keyword)
+            pinyin_initials = self._get_pinyin_initials(keyword)
+            plan = self._fts_plan(keyword, columns, [keyword, pinyin_full, pinyin_initials])
+        
+        if plan is None:
+            # 检查数据量决定搜索策略
+            count = self.get_data_count()
+            
+            # 小数据量使用方案3，大数据量使用方案2
+            if count <= 100 or not pinyin_ready:
+                plan = self._python_filter_plan(keyword, columns)  # 方案3
+            else:
+                plan = self._pinyin_columns_plan(keyword, columns)  # 方案2
         
-        # 小数据量使用方案3，大数据量使用方案2
-        if count <= 100 or not self.pinyin_enabled:
-            return self._search_with_python_filter(keyword)  # 方案3
-        else:
-            return self._search_with_pinyin_columns(keyword)  # 方案2
+        # 输入全拼时，通过倒排索引补充拼音匹配的中文记录（索引在后台构建完成前跳过）
+        if self.initials_index is not None and keyword.isascii() and keyword.isalpha() and not is_possible_initials:
+            rowids = self.initials_index.search(keyword, PinyinInitialsIndex.FULL_PINYIN) or []
+            plan.add_index_hits('full', keyword, rowids)
+        return plan
 
-    def _search_with_pinyin_columns(self, keyword):
+    def _pinyin_columns_plan(self, keyword, columns):
         """使用拼音字段进行高效搜索（方案2）"""
-        self.cursor.execute('PRAGMA table_info(data)')
-        columns = [row[1] for row in self.cursor.fetchall()]
-        
-        if not columns:
-            return []
-        
-        # 检查是否为拼音缩写
-        is_pinyin_initials = keyword.isalpha() and 2 <= len(keyword) <= 6
+        # 检查是否为拼音缩写（isalpha对汉字也为真，需限定ASCII）
+        is_pinyin_initials = keyword.isascii() and keyword.isalpha() and 2 <= len(keyword) <= 6
         
         conditions = []
         params = []
+        terms = [('data', keyword.lower())]
         
         for col in columns:
             # 跳过拼音列本身
@@ -780,30 +2311,37 @@ class UserDatabase:
                     conditions.append(f"{pinyin_col} LIKE ?")
                     params.append(f"%{keyword}%")
         
+        if is_pinyin_initials:
+            terms.append(('pinyin', keyword.lower()))
+        
         if not conditions:
-            return []
+            return SearchPlan(keyword, columns)
         
         sql = f"SELECT DISTINCT rowid, * FROM data WHERE {' OR '.join(conditions)}"
-        self.cursor.execute(sql, params)
-        return self.cursor.fetchall()
+        return SearchPlan(keyword, columns, sql, params, terms=terms)
     
-    def _search_with_python_filter(self, keyword):
+    def _python_filter_plan(self, keyword, columns):
         """使用Python过滤进行搜索（方案3）"""
-        self.cursor.execute('PRAGMA table_info(data)')
-        columns = [row[1] for row in self.cursor.fetchall()]
+        # 检查输入是否为纯字母（可能是拼音缩写，isalpha对汉字也为真，需限定ASCII）
+        is_possible_initials = keyword.isascii() and keyword.isalpha() and 2 <= len(keyword) <= 6
         
-        if not columns:
-            return []
+        # 如果是可能的拼音缩写，直接在拼音倒排索引中求交集，无需逐行转换拼音（索引未就绪时按LIKE搜索）
+        if (self.initials_index is not None and is_possible_initials
+                and not any(char in keyword.lower() for char in 'aeiou')):
+            rowids = self.initials_index.search(keyword) or []
+            return SearchPlan(keyword, columns, rowids=rowids, terms=[('initials', keyword.lower())])
         
         # 生成拼音和拼音首字母
-        pinyin_full = ''.join(lazy_pinyin(keyword))
+        pinyin_full = self._get_pinyin_full(keyword)
         pinyin_initials = self._get_pinyin_initials(keyword)
         
-        # 检查输入是否为纯字母（可能是拼音缩写）
-        is_possible_initials = keyword.isalpha() and 2 <= len(keyword) <= 6
-        
         conditions = []
         params = []
+        terms = [('data', keyword.lower())]
+        if pinyin_full and pinyin_full != keyword:
+            terms.append(('data', pinyin_full.lower()))
+        if pinyin_initials and pinyin_initials != keyword:
+            terms.append(('data', pinyin_initials.lower()))
         
         for col in columns:
             # 跳过拼音列本身
@@ -824,67 +2362,537 @@ class UserDatabase:
                 conditions.append(f"{col} LIKE ?")
                 params.append(f"%{pinyin_initials}%")
         
-        # 如果是可能的拼音缩写，获取所有数据并在Python中过滤
-        if is_possible_initials and not any(char in keyword for char in 'aeiou'):
-            # 获取所有数据
-            sql_all = "SELECT rowid, * FROM data"
-            self.cursor.execute(sql_all)
-            all_data = self.cursor.fetchall()
-            
-            # 过滤匹配拼音缩写的数据
-            filtered_data = []
-            for row in all_data:
-                if self._match_chinese_by_initials(row, keyword, columns):
-                    filtered_data.append(row)
-            
-            return filtered_data
-        
         if not conditions:
-            return []
+            return SearchPlan(keyword, columns)
         
         sql = f"SELECT DISTINCT rowid, * FROM data WHERE {' OR '.join(conditions)}"
-        self.cursor.execute(sql, params)
-        return self.cursor.fetchall()
+        return SearchPlan(keyword, columns, sql, params, terms=terms)
 
-    def _match_chinese_by_initials(self, row_data, initials, columns):
-        """检查行数据中的中文是否匹配拼音首字母缩写"""
+    def _get_pinyin_initials(self, keyword):
+        """获取拼音首字母（共享转换缓存）"""
+        return pinyin_initials(keyword)
+
+    def _get_pinyin_full(self, keyword):
+        """获取全拼（共享转换缓存）"""
+        return pinyin_full(keyword)
+
+# 导入时可推断的列类型，按优先顺序排列，都不符合时为TEXT
+INFERABLE_KINDS = ('EAN13', 'INTEGER', 'REAL', 'DATE')
+_INTEGER_RE = re.compile(r'^[+-]?\d{1,15}$')
+_REAL_RE = re.compile(r'^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$')
+_DATE_RE = re.compile(r'^(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})$')
+
+
+def normalize_column_name(key):
+    """把数据文件中的字段名转换为数据库列名"""
+    return str(key).replace(' ', '_').lower()
+
+
+def parse_date_value(text):
+    """解析 YYYY-MM-DD / YYYY/MM/DD / YYYY.MM.DD 格式的日期，返回ISO格式文本，无法解析时返回None"""
+    match = _DATE_RE.match(text)
+    if not match:
+        return None
+    try:
+        return datetime(*(int(part) for part in match.groups())).strftime('%Y-%m-%d')
+    except ValueError:
+        return None
+
+
+def validate_ean13_code(code):
+    """校验13位数字的EAN13校验位"""
+    if len(code) != 13 or not code.isdigit():
+        return False
+    total = sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(code[:12]))
+    return (10 - total % 10) % 10 == int(code[12])
+
+
+def reservoir_sample(iterable, size, rng=None):
+    """蓄水池抽样：一次遍历，从任意长度的序列中等概率抽取最多size个元素"""
+    rng = rng or random.Random()
+    sample = []
+    for index, item in enumerate(iterable):
+        if index < size:
+            sample.append(item)
+        else:
+            slot = rng.randrange(index + 1)
+            if slot < size:
+                sample[slot] = item
+    return sample
+
+
+def track_column_kinds(records, kinds):
+    """逐条产出记录，同时把每列全部非空值都能匹配的类型累计到kinds（列名 -> 类型集合）
+
+    导入时第一遍读取经过它再做抽样，列类型即由整个文件决定：只要有一个值不符合，
+    该列就退回TEXT，不会把样本之外的值交给SQLite的类型亲和性转换而丢失前导零或精度。
+    """
+    for record in records:
+        if isinstance(record, dict):
+            for key, value in record.items():
+                allowed = kinds.setdefault(key, set(INFERABLE_KINDS))
+                if not allowed or value is None or (isinstance(value, str) and not value.strip()):
+                    continue
+                allowed &= UserDatabase._value_kinds(value)
+        yield record
+
+
+class JsonStreamParser:
+    """增量JSON解析器：按块读取二进制文件，逐个解析顶层数组（或顶层对象中各数组）的元素
+
+    内存占用只与单个元素的大小有关，与文件大小无关。
+    """
+
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, binary_file):
+        self._file = binary_file
+        self._decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        self._json = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    def position(self):
+        """已读取的字节数"""
+        return self._file.tell()
+
+    def _fill(self):
+        if self._eof:
+            return False
+        data = self._file.read(self.CHUNK_SIZE)
+        if not data:
+            self._eof = True
+        text = self._decoder.decode(data, final=self._eof)
+        self._buf = self._buf[self._pos:] + text
+        self._pos = 0
+        return True
+
+    def _peek(self):
+        """跳过空白，返回下一个字符（文件结束时返回空串）"""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in ' \t\r\n':
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ''
+
+    def _expect(self, chars):
+        ch = self._peek()
+        if not ch or ch not in chars:
+            raise ValueError(f"JSON格式错误: 期望 {chars!r}，实际为 {ch!r}")
+        self._pos += 1
+        return ch
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buf, self._pos)
+                # 数字可能被块边界截断，未到文件末尾时读入更多内容再确认
+                if end < len(self._buf) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._fill()
+
+    def _array_items(self):
+        self._expect('[')
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            if self._expect(',]') == ']':
+                return
+
+    def iter_items(self):
+        """产出 (分组键, 元素)：顶层为数组时分组键为None，顶层为对象时为数组所在的键"""
+        ch = self._peek()
+        if ch == '[':
+            for item in self._array_items():
+                yield None, item
+        elif ch == '{':
+            self._pos += 1
+            if self._peek() == '}':
+                return
+            while True:
+                key = self._value()
+                self._expect(':')
+                if self._peek() == '[':
+                    for item in self._array_items():
+                        yield key, item
+                else:
+                    self._value()
+                if self._expect(',}') == '}':
+                    return
+        elif ch:
+            raise ValueError('不支持的JSON结构')
+
+
+def iter_csv_records(binary_file):
+    """逐行读取CSV文件，产出记录字典（兼容带BOM的UTF-8）"""
+    text = io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline='')
+    try:
+        yield from csv.DictReader(text)
+    finally:
+        # 不关闭底层文件，由调用方负责
+        text.detach()
+
+
+def _xlsx_value(value):
+    """把单元格的值转换为导入用的值：日期时间转为文本（无时间部分时为 YYYY-MM-DD），其他原样返回"""
+    if isinstance(value, datetime):
+        if value.hour == value.minute == value.second == value.microsecond == 0:
+            return value.strftime('%Y-%m-%d')
+        return value.isoformat(sep=' ')
+    if hasattr(value, 'isoformat'):  # date / time
+        return value.isoformat()
+    return value
+
+
+class XlsxSheetReader:
+    """流式读取xlsx工作表（openpyxl只读模式，不把整个工作表载入内存）
+
+    第一个非空行为表头，之后逐行产出 {表头: 值} 记录，整行为空的行跳过。
+    空白表头按位置命名为“列N”，重复的表头加序号，避免丢列。
+    """
+
+    def __init__(self, filename, sheet_name=None):
+        openpyxl = import_optional('openpyxl')
+        if openpyxl is None:
+            raise RuntimeError("导入xlsx文件需要安装 openpyxl")
+        self.workbook = openpyxl.load_workbook(filename, read_only=True, data_only=True)
+        self.sheet = self.workbook[sheet_name] if sheet_name else self.workbook.worksheets[0]
+        self.rows_read = 0
+
+    @classmethod
+    def sheet_names(cls, filename):
+        reader = cls(filename)
         try:
-            # 跳过rowid
-            for i, value in enumerate(row_data[1:], 1):
-                if i-1 < len(columns) and value and isinstance(value, str):
-                    # 只处理可能包含中文的文本
-                    if any('\u4e00' <= char <= '\u9fff' for char in str(value)):
-                        # 生成该中文的拼音首字母
-                        chinese_initials = self._get_pinyin_initials(str(value))
-                        if initials.lower() in chinese_initials.lower():
-                            return True
-        except:
+            return list(reader.workbook.sheetnames)
+        finally:
+            reader.close()
+
+    @property
+    def total_rows(self):
+        """工作表声明的行数（文件中没有尺寸信息时为0）"""
+        return self.sheet.max_row or 0
+
+    @staticmethod
+    def _headers(values):
+        headers = []
+        seen = set()
+        for i, value in enumerate(values):
+            header = str(_xlsx_value(value)).strip() if value is not None else ''
+            header = header or f"列{i + 1}"
+            name = header
+            n = 2
+            while name in seen:
+                name = f"{header}_{n}"
+                n += 1
+            seen.add(name)
+            headers.append(name)
+        return headers
+
+    def iter_records(self):
+        headers = None
+        for values in self.sheet.iter_rows(values_only=True):
+            self.rows_read += 1
+            if all(value is None or (isinstance(value, str) and not value.strip()) for value in values):
+                continue
+            if headers is None:
+                headers = self._headers(values)
+                continue
+            yield {header: _xlsx_value(value) for header, value in zip(headers, values)}
+
+    def close(self):
+        self.workbook.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def import_optional(module_name, package=None):
+    """按需导入可选依赖，缺失时尝试自动安装，仍不可用时返回None"""
+    try:
+        return importlib.import_module(module_name)
+    except ImportError:
+        pass
+    print(f"{package or module_name} 未安装，正在尝试自动安装...")
+    if install_package(package or module_name):
+        importlib.invalidate_caches()
+        try:
+            return importlib.import_module(module_name)
+        except ImportError:
             pass
-        return False
+    return None
 
-    def _get_pinyin_initials(self, keyword):
-        """安全地获取拼音首字母，兼容不同版本的pypinyin"""
+
+class ExportCancelled(Exception):
+    """导出被用户取消，count为取消前已写出的行数"""
+
+    def __init__(self, count):
+        super().__init__(count)
+        self.count = count
+
+
+EXPORT_COMPRESSION_SUFFIXES = {'.gz': 'gzip', '.zst': 'zstd'}
+
+
+def export_compression(filename):
+    """按扩展名确定导出文件的压缩方式：.gz为gzip，.zst为zstd，其他不压缩（None）"""
+    return EXPORT_COMPRESSION_SUFFIXES.get(os.path.splitext(filename)[1].lower())
+
+
+def _compressed_writer(raw, compression):
+    if compression is None:
+        return raw
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6)
+    if compression == 'zstd':
+        zstandard = import_optional('zstandard')
+        if zstandard is None:
+            raise RuntimeError("导出zstd压缩文件需要安装 zstandard")
+        return zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=False)
+    raise ValueError(f"不支持的压缩方式: {compression}")
+
+
+@contextmanager
+def open_export_stream(filename, compression=None, buffer_size=1 << 20):
+    """打开导出文件的UTF-8文本写入流（带写缓冲，可gzip/zstd压缩）
+
+    内容先写入同目录下的临时文件，正常结束后替换目标文件；出错或取消时删除临时文件，不留下写了一半的文件。
+    """
+    tmp_path = filename + '.part'
+    raw = open(tmp_path, 'wb', buffering=buffer_size)
+    stream = None
+    try:
+        stream = io.TextIOWrapper(_compressed_writer(raw, compression), encoding='utf-8', newline='')
+        yield stream
+        stream.close()
+        raw.close()
+        os.replace(tmp_path, filename)
+    except BaseException:
+        for f in (stream, raw):
+            if f is not None:
+                try:
+                    f.close()
+                except Exception:
+                    pass
         try:
-            # 方法1: 使用FIRST_LETTER常量
-            try:
-                return ''.join(lazy_pinyin(keyword, style=Style.FIRST_LETTER))
-            except:
-                pass
-            
-            # 方法2: 使用备选常量名
-            try:
-                return ''.join(lazy_pinyin(keyword, style=Style.INITIALS))
-            except:
-                pass
-            
-            # 方法3: 手动处理
-            pinyin_list = lazy_pinyin(keyword)
-            initials = ''.join([p[0] for p in pinyin_list if p])
-            return initials
-            
-        except Exception as e:
-            print(f"[DEBUG] 获取拼音首字母失败: {str(e)}")
-            return ""
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def iter_export_batches(rows, batch_size=5000, progress_callback=None, cancel_event=None):
+    """把导出行分批产出：每批之前检查取消（抛出ExportCancelled），之后用累计行数报告进度"""
+    rows = iter(rows)
+    done = 0
+    while True:
+        if cancel_event is not None and cancel_event.is_set():
+            raise ExportCancelled(done)
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+        done += len(batch)
+        if progress_callback:
+            progress_callback(done)
+
+
+def write_csv_export(filename, headers, rows, compression=None, progress_callback=None, cancel_event=None):
+    """把行的可迭代对象按批流式写入CSV文件，返回写入的行数"""
+    count = 0
+    with open_export_stream(filename, compression) as stream:
+        writer = csv.writer(stream)
+        writer.writerow(headers)
+        for batch in iter_export_batches(rows, progress_callback=progress_callback, cancel_event=cancel_event):
+            writer.writerows(batch)
+            count += len(batch)
+    return count
+
+
+def write_json_export(filename, keys, rows, compression=None, progress_callback=None, cancel_event=None):
+    """把行按 {键: 值} 对象流式写入JSON数组，格式与 json.dump(..., indent=2) 相同，返回写入的行数"""
+    count = 0
+    with open_export_stream(filename, compression) as stream:
+        stream.write('[')
+        for batch in iter_export_batches(rows, progress_callback=progress_callback, cancel_event=cancel_event):
+            for row in batch:
+                item = json.dumps(dict(zip(keys, row)), indent=2, ensure_ascii=False)
+                stream.write(('\n  ' if count == 0 else ',\n  ') + item.replace('\n', '\n  '))
+                count += 1
+        stream.write('\n]' if count else ']')
+    return count
+
+
+ARROW_FORMAT_SUFFIXES = {'.parquet': 'parquet', '.arrow': 'arrow', '.feather': 'arrow', '.ipc': 'arrow'}
+ARROW_COLUMN_TYPES = {'INTEGER': 'int64', 'REAL': 'float64', 'DATE': 'date32', 'BLOB': 'binary'}  # 其余为string
+
+
+def arrow_export_format(filename):
+    """按扩展名判断是否导出为列式文件：返回 'parquet'/'arrow'，其他返回None"""
+    return ARROW_FORMAT_SUFFIXES.get(os.path.splitext(filename)[1].lower())
+
+
+def _arrow_value(value, col_type):
+    """把单个值转换为列类型对应的Python值，无法转换时返回None"""
+    if value is None:
+        return None
+    if col_type in ('INTEGER', 'REAL'):
+        number = UserDatabase.coerce_value(col_type, value)
+        if isinstance(number, bool) or not isinstance(number, (int, float)):
+            return None
+        if col_type == 'REAL':
+            return float(number)
+        return number if isinstance(number, int) else None
+    if col_type == 'DATE':
+        text = parse_date_value(str(value).strip())
+        return datetime.strptime(text, '%Y-%m-%d').date() if text else None
+    if col_type == 'BLOB':
+        return value if isinstance(value, bytes) else str(value).encode('utf-8')
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    return str(value)
+
+
+def _arrow_array(pa, values, col_type, arrow_type):
+    """把一批值整体转换为Arrow数组，返回 (数组, 无法转换而写为null的个数)
+
+    先按列类型整体转换，只有遇到混入的异常值（如整数列里保留下来的文本）时才逐个转换。
+    """
+    try:
+        if col_type == 'DATE':
+            return pa.array(values, type=pa.string()).cast(arrow_type), 0
+        return pa.array(values, type=arrow_type), 0
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, TypeError, ValueError, OverflowError):
+        converted = [_arrow_value(value, col_type) for value in values]
+        invalid = sum(1 for value, new in zip(values, converted) if value is not None and new is None)
+        return pa.array(converted, type=arrow_type), invalid
+
+
+def write_arrow_export(filename, fields, rows, file_format='parquet', progress_callback=None, cancel_event=None,
+                       batch_size=50000):
+    """把行按批写入Parquet（每批一个行组）或Arrow IPC文件，返回写入的行数
+
+    fields为 [(列名, 列类型, 标签), ...]，列类型INTEGER/REAL/DATE/BLOB映射为对应的Arrow类型，其余为string；
+    标签写入字段和表结构的元数据。与文本导出相同，先写临时文件，成功后替换目标文件。
+    """
+    pa = import_optional('pyarrow')
+    if pa is None:
+        raise RuntimeError("导出Parquet/Arrow文件需要安装 pyarrow")
+    arrow_types = [getattr(pa, ARROW_COLUMN_TYPES.get(col_type, 'string'))() for _, col_type, _ in fields]
+    schema = pa.schema(
+        [pa.field(name, arrow_type, metadata={'label': label, 'type': col_type})
+         for (name, col_type, label), arrow_type in zip(fields, arrow_types)],
+        metadata={'labels': json.dumps({name: label for name, _, label in fields}, ensure_ascii=False),
+                  'generator': f"{ProjectInfo.NAME} {ProjectInfo.VERSION}"})
+
+    tmp_path = filename + '.part'
+    sink = writer = None
+    count = 0
+    invalid = [0] * len(fields)
+    try:
+        if file_format == 'parquet':
+            import pyarrow.parquet as pq
+            writer = pq.ParquetWriter(tmp_path, schema)
+        else:
+            import pyarrow.ipc
+            sink = pa.OSFile(tmp_path, 'wb')
+            writer = pa.ipc.new_file(sink, schema)
+        for batch in iter_export_batches(rows, batch_size, progress_callback, cancel_event):
+            arrays = []
+            for i, values in enumerate(zip(*batch)):
+                array, bad = _arrow_array(pa, values, fields[i][1], arrow_types[i])
+                arrays.append(array)
+                invalid[i] += bad
+            record_batch = pa.RecordBatch.from_arrays(arrays, schema=schema)
+            if file_format == 'parquet':
+                writer.write_table(pa.Table.from_batches([record_batch]))
+            else:
+                writer.write_batch(record_batch)
+            count += len(batch)
+        writer.close()
+        writer = None
+        if sink is not None:
+            sink.close()
+        os.replace(tmp_path, filename)
+    except BaseException:
+        for f in (writer, sink):
+            if f is not None:
+                try:
+                    f.close()
+                except Exception:
+                    pass
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    for (name, col_type, _), bad in zip(fields, invalid):
+        if bad:
+            print(f"[DEBUG] 导出列 {name} 有 {bad} 个值无法转换为 {col_type}，已写为空值")
+    return count
+
+
+XLSX_MAX_ROWS = 1048576  # Excel单个工作表的最大行数（含表头）
+
+
+def write_xlsx_export(filename, headers, rows, types=None, progress_callback=None, cancel_event=None):
+    """用openpyxl的只写工作簿流式写入xlsx（内存占用与行数无关），返回写入的行数
+
+    types为各列的列类型，DATE列的文本写为日期单元格；超过单个工作表的行数上限时续写到新的工作表。
+    """
+    openpyxl = import_optional('openpyxl')
+    if openpyxl is None:
+        raise RuntimeError("导出xlsx文件需要安装 openpyxl")
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+    date_indexes = [i for i, col_type in enumerate(types or ()) if col_type == 'DATE']
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = None
+    sheet_rows = XLSX_MAX_ROWS
+    count = 0
+    tmp_path = filename + '.part'
+    try:
+        for batch in iter_export_batches(rows, progress_callback=progress_callback, cancel_event=cancel_event):
+            for row in batch:
+                if sheet_rows >= XLSX_MAX_ROWS:
+                    sheet = workbook.create_sheet('数据' if sheet is None else f"数据{len(workbook.worksheets) + 1}")
+                    sheet.append(list(headers))
+                    sheet_rows = 1
+                # 控制字符无法写入xlsx（只写工作表遇到异常后不能继续写入），先去掉
+                row = [ILLEGAL_CHARACTERS_RE.sub('', value)
+                       if isinstance(value, str) and ILLEGAL_CHARACTERS_RE.search(value) else value
+                       for value in row]
+                for i in date_indexes:
+                    text = parse_date_value(row[i].strip()) if isinstance(row[i], str) else None
+                    if text:
+                        row[i] = datetime.strptime(text, '%Y-%m-%d').date()
+                sheet.append(row)
+                sheet_rows += 1
+                count += 1
+        if sheet is None:
+            workbook.create_sheet('数据').append(list(headers))
+        workbook.save(tmp_path)
+        os.replace(tmp_path, filename)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return count
+
 
 class LoginWindow(QMainWindow):
     def __init__(self, user_manager):
@@ -1218,27 +3226,54 @@ class LoginWindow(QMainWindow):
         """导入数据文件并创建新用户"""
         filename, _ = QFileDialog.getOpenFileName(
             self, '选择数据文件', '', 
-            'JSON文件 (*.json);;CSV文件 (*.csv);;所有文件 (*)'
+            'JSON文件 (*.json);;CSV文件 (*.csv);;Excel工作簿 (*.xlsx);;所有文件 (*)'
         )
         
         if not filename:
             return
         
+        is_xlsx = filename.lower().endswith('.xlsx')
+        if not (filename.endswith('.json') or filename.endswith('.csv') or is_xlsx):
+            QMessageBox.warning(self, '警告', '不支持的文件格式')
+            return
+        
         try:
-            # 读取文件内容
-            if filename.endswith('.json'):
-                with open(filename, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-            elif filename.endswith('.csv'):
-                with open(filename, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    data = list(reader)
+            # 一个工作表导入为一个用户数据表，多个工作表时选择其一
+            sheet_name = None
+            if is_xlsx:
+                sheet_names = XlsxSheetReader.sheet_names(filename)
+                if len(sheet_names) > 1:
+                    sheet_name, ok = QInputDialog.getItem(self, '选择工作表', '要导入的工作表:', sheet_names, 0, False)
+                    if not ok:
+                        return
+            
+            # 流式读取文件内容：全部记录用于确定列类型，抽取的样本用于统计
+            kinds = {}
+            if is_xlsx:
+                with XlsxSheetReader(filename, sheet_name) as reader:
+                    sample = reservoir_sample(track_column_kinds(reader.iter_records(), kinds),
+                                              UserDatabase.SCHEMA_SAMPLE_SIZE)
             else:
-                QMessageBox.warning(self, '警告', '不支持的文件格式')
-                return
+                with open(filename, 'rb') as f:
+                    if filename.endswith('.json'):
+                        items = JsonStreamParser(f).iter_items()
+                        first = next(items, None)
+                        items = itertools.chain([first], items) if first else iter(())
+                        if first is None or first[0] is None:
+                            records = (item for _, item in items if isinstance(item, dict))
+                            sample = reservoir_sample(track_column_kinds(records, kinds),
+                                                      UserDatabase.SCHEMA_SAMPLE_SIZE)
+                        else:
+                            # 顶层为对象时只记录每个数组的第一个元素
+                            sample = {}
+                            for key, item in items:
+                                sample.setdefault(key, [item])
+                    else:
+                        sample = reservoir_sample(track_column_kinds(iter_csv_records(f), kinds),
+                                                  UserDatabase.SCHEMA_SAMPLE_SIZE)
             
             # 分析数据结构和内容
-            if not data:
+            if not sample:
                 QMessageBox.warning(self, '警告', '文件内容为空')
                 return
             
@@ -1248,7 +3283,7 @@ class LoginWindow(QMainWindow):
             
             # 分析数据结构并生成列配置
             user_db = UserDatabase('')  # 临时实例用于调用方法
-            columns_config = user_db.auto_detect_columns(data)
+            columns_config = user_db.auto_detect_columns(sample, kinds)
             
             if not columns_config:
                 print("[DEBUG] 无法识别数据结构，使用默认配置")
@@ -1260,30 +3295,51 @@ class LoginWindow(QMainWindow):
             user_db = UserDatabase(db_file)
             user_db.initialize_database(columns_config)
             
-            # 插入数据
+            # 按字节位置（xlsx按行数）显示导入进度
+            total_bytes = max(os.path.getsize(filename), 1)
+            progress = QProgressDialog('正在导入数据...', None, 0, 100, self)
+            progress.setWindowTitle('导入数据')
+            progress.setWindowModality(Qt.WindowModal)
+            progress.setMinimumDuration(500)
+            
+            # 第二遍读取文件，逐条规范化后分批写入数据库
             try:
-                if isinstance(data, dict):
-                    for key, items in data.items():
-                        if isinstance(items, list):
-                            for item in items:
-                                if isinstance(item, dict):
-                                    # 转换键名以匹配列名
-                                    normalized_item = {}
-                                    for k, v in item.items():
-                                        col_name = k.replace(' ', '_').lower()
-                                        normalized_item[col_name] = str(v) if v is not None else ""
-                                    user_db.insert_data(normalized_item)
-                elif isinstance(data, list):
-                    for item in data:
-                        normalized_item = {}
-                        for k, v in item.items():
-                            col_name = k.replace(' ', '_').lower()
-                            normalized_item[col_name] = str(v) if v is not None else ""
-                        user_db.insert_data(normalized_item)
+                with (XlsxSheetReader(filename, sheet_name) if is_xlsx else open(filename, 'rb')) as f:
+                    if is_xlsx:
+                        items = f.iter_records()
+                    elif filename.endswith('.json'):
+                        items = (item for _, item in JsonStreamParser(f).iter_items()
+                                 if isinstance(item, dict))
+                    else:
+                        items = iter_csv_records(f)
+                    
+                    column_types = {col['name']: col['type'] for col in columns_config}
+                    
+                    def normalized_items():
+                        """转换键名以匹配列名，并按推断的列类型转换值"""
+                        for item in items:
+                            normalized_item = {}
+                            for k, v in item.items():
+                                col_name = normalize_column_name(k)
+                                normalized_item[col_name] = UserDatabase.coerce_value(
+                                    column_types.get(col_name, 'TEXT'), v)
+                            yield normalized_item
+                    
+                    def report_progress(count):
+                        if is_xlsx:
+                            done, total = f.rows_read, max(f.total_rows, 1)
+                        else:
+                            done, total = f.tell(), total_bytes
+                        progress.setValue(min(99, done * 100 // total))
+                        progress.setLabelText(f'正在导入数据... 已导入 {count} 条')
+                    
+                    imported_count = user_db.bulk_insert(normalized_items(), progress_callback=report_progress)
             except Exception as e:
                 user_db.close()
                 os.remove(db_file)
                 raise e
+            finally:
+                progress.close()
             
             user_db.close()
             
@@ -1292,7 +3348,7 @@ class LoginWindow(QMainWindow):
             if self.user_manager.add_user(username, db_file, settings):
                 QMessageBox.information(
                     self, '成功', 
-                    f'数据导入成功\n已创建用户: {username}\n导入记录数: {len(data) if isinstance(data, list) else "多组数据"}'
+                    f'数据导入成功\n已创建用户: {username}\n导入记录数: {imported_count}'
                 )
                 self.load_users()
             else:
@@ -1339,21 +3395,22 @@ class LoginWindow(QMainWindow):
             user_db = UserDatabase(db_file)
             user_db.initialize_database(columns_config)
             
-            # 转换数据结构并插入
-            for category, rules in data.items():
-                if isinstance(rules, list):
-                    for rule in rules:
-                        if isinstance(rule, dict):
-                            # 转换数据格式
-                            record = {
-                                'category': category,
-                                'name': rule.get('name', ''),
-                                'fan': rule.get('fan', 0),
-                                'exclude': ', '.join(rule.get('exclude', [])),
-                                'condition': rule.get('condition', '')
-                            }
-                            user_db.insert_data(record)
-            
+            # 转换数据结构并批量插入
+            def rule_records():
+                for category, rules in data.items():
+                    if isinstance(rules, list):
+                        for rule in rules:
+                            if isinstance(rule, dict):
+                                # 转换数据格式
+                                yield {
+                                    'category': category,
+                                    'name': rule.get('name', ''),
+                                    'fan': rule.get('fan', 0),
+                                    'exclude': ', '.join(rule.get('exclude', [])),
+                                    'condition': rule.get('condition', '')
+                                }
+            
+            user_db.bulk_insert(rule_records())
             user_db.close()
             
             # 添加用户到管理器
@@ -1525,7 +3582,7 @@ class ColumnConfigDialog(QDialog):
         
         # 数据类型 - 增加EAN13选项
         data_type = QComboBox()
-        data_type.addItems(['文本(TEXT)', '整数(INTEGER)', '小数(REAL)', '二进制(BLOB)', 'EAN13条码'])
+        data_type.addItems(['文本(TEXT)', '整数(INTEGER)', '小数(REAL)', '日期(DATE)', '二进制(BLOB)', 'EAN13条码'])
         self.table.setCellWidget(row, 2, data_type)
         
         # 必填
@@ -1605,16 +3662,13 @@ class ColumnConfigDialog(QDialog):
             
             # 数据类型
             data_type = QComboBox()
-            data_type.addItems(['文本(TEXT)', '整数(INTEGER)', '小数(REAL)', '二进制(BLOB)', 'EAN13条码'])
+            data_type.addItems(['文本(TEXT)', '整数(INTEGER)', '小数(REAL)', '日期(DATE)', '二进制(BLOB)', 'EAN13条码'])
             
             # 设置当前类型
             current_type = col_config.get('type', 'TEXT')
-            if current_type == 'EAN13':
-                data_type.setCurrentText('EAN13条码')
-            elif current_type in ['INTEGER', 'REAL', 'BLOB']:
-                data_type.setCurrentText(f'{current_type}({current_type})')
-            else:
-                data_type.setCurrentText('文本(TEXT)')
+            type_texts = {'INTEGER': '整数(INTEGER)', 'REAL': '小数(REAL)', 'DATE': '日期(DATE)',
+                          'BLOB': '二进制(BLOB)', 'EAN13': 'EAN13条码'}
+            data_type.setCurrentText(type_texts.get(current_type, '文本(TEXT)'))
             
             self.table.setCellWidget(row, 2, data_type)
             
@@ -1645,6 +3699,1086 @@ class ColumnConfigDialog(QDialog):
             self.table.setColumnWidth(i, 60)
 
 
+# 条形码/二维码渲染（模块级函数，可在工作线程中调用）
+BARCODE_HEIGHT = 100
+QRCODE_SIZE = 200
+
+
+def barcode_payload(data):
+    """
+    把任意值转换为可编码的条码内容，返回(码制, 内容)
+    对于非ASCII字符会自动转换为拼音首字母+哈希值
+    """
+    data_str = str(data)
+
+    # 检查是否包含非ASCII字符
+    requires_encoding = False
+    for char in data_str:
+        if ord(char) > 127:  # 非ASCII字符
+            requires_encoding = True
+            break
+
+    # 如果包含非条形码支持字符
+    if requires_encoding:
+        # 使用更友好的编码方式 - 首字母拼音+哈希
+        # 获取拼音首字母（非汉字段只取第一个字符，与已生成的条码保持一致）
+        pinyin_initials = ''.join(full[0] for _, full in transliterator.syllables(data_str) if full)
+
+        # 生成短哈希
+        hash_str = hashlib.md5(data_str.encode('utf-8')).hexdigest()[:6]
+
+        # 组合成最终编码
+        data_str = f"{pinyin_initials}_{hash_str}".upper()
+
+        # 确保不超过长度限制
+        data_str = data_str[:80]
+
+    # 自动选择条码类型
+    if data_str.isdigit() and len(data_str) == 13:  # EAN13标准
+        return 'ean13', data_str
+    return 'code128', data_str  # 默认使用Code128
+
+
+# 直接光栅化参数：条码模块宽度(像素)、两侧静区(模块数)、底部文字高度(像素)
+BARCODE_MODULE_WIDTH = 2
+BARCODE_QUIET_ZONE = 10
+BARCODE_TEXT_HEIGHT = 22
+
+# 模块串('1'为黑, '0'为白) -> 8位灰度像素
+_MODULE_PIXELS = bytes.maketrans(b'BW', b'\x00\xff')
+
+
+def _modules_to_scanline(modules, module_px):
+    """把模块串展开为一行灰度像素，用字符串替换批量填充，不逐像素处理"""
+    expanded = modules.replace('1', 'B' * module_px).replace('0', 'W' * module_px)
+    return expanded.encode('ascii').translate(_MODULE_PIXELS)
+
+
+def render_symbol_raster(kind, value):
+    """
+    把条形码/二维码的模块图案直接光栅化为8位灰度像素，返回(宽, 高, 像素字节, 说明文字)
+    不经过PNG编码/解码，也不创建任何Qt对象，可以在子进程中调用
+    """
+    if kind == 'barcode':
+        symbology, data_str = barcode_payload(value)
+        if symbology == 'ean13':
+            barcode = EAN13(data_str)
+        else:
+            barcode = Code128(data_str)
+
+        quiet = '0' * BARCODE_QUIET_ZONE
+        scanline = _modules_to_scanline(quiet + ''.join(barcode.build()) + quiet, BARCODE_MODULE_WIDTH)
+        width = len(scanline)
+        bar_height = BARCODE_HEIGHT - BARCODE_TEXT_HEIGHT
+        # 条码各行相同，底部留白用于绘制文字
+        pixels = scanline * bar_height + b'\xff' * (width * BARCODE_TEXT_HEIGHT)
+        return width, BARCODE_HEIGHT, pixels, barcode.get_fullcode()
+
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        border=4,
+    )
+    qr.add_data(str(value))
+    qr.make(fit=True)
+    matrix = qr.get_matrix()
+
+    # 每个模块取整数像素宽，剩余部分用白边补足到QRCODE_SIZE，所有模块大小一致
+    box_px = max(1, QRCODE_SIZE // len(matrix))
+    size = max(QRCODE_SIZE, len(matrix) * box_px)
+    pad = size - len(matrix) * box_px
+    left, top = pad // 2, pad // 2
+    margin_left, margin_right = b'\xff' * left, b'\xff' * (pad - left)
+    rows = [b'\xff' * (size * top)]
+    for matrix_row in matrix:
+        modules = ''.join('1' if module else '0' for module in matrix_row)
+        rows.append((margin_left + _modules_to_scanline(modules, box_px) + margin_right) * box_px)
+    rows.append(b'\xff' * (size * (pad - top)))
+    return size, size, b''.join(rows), ''
+
+
+def raster_to_qimage(kind, raster):
+    """把render_symbol_raster的结果转换为显示尺寸的QImage"""
+    width, height, pixels, caption = raster
+    qimage = QImage(pixels, width, height, width, QImage.Format_Grayscale8)
+    if kind == 'barcode':
+        # 复制一份，脱离Python字节缓冲区，并转换为可绘制文字的格式
+        qimage = qimage.convertToFormat(QImage.Format_RGB32)
+        if caption:
+            painter = QPainter(qimage)
+            font = QFont()
+            font.setPixelSize(BARCODE_TEXT_HEIGHT - 6)
+            painter.setFont(font)
+            painter.setPen(Qt.black)
+            painter.drawText(QRect(0, height - BARCODE_TEXT_HEIGHT, width, BARCODE_TEXT_HEIGHT),
+                             Qt.AlignCenter, caption)
+            painter.end()
+        return qimage
+    if width > QRCODE_SIZE:
+        # 模块数超过显示尺寸的超大二维码只能缩小
+        return qimage.scaled(QRCODE_SIZE, QRCODE_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    # 已是显示尺寸，复制一份脱离Python字节缓冲区
+    return qimage.copy()
+
+
+def render_symbol_batch(items):
+    """批量生成像素数据（进程池任务），items为[(类型, 值), ...]，失败的项返回None"""
+    results = []
+    for kind, value in items:
+        try:
+            results.append(render_symbol_raster(kind, value))
+        except Exception as e:
+            print(f"生成条码失败: {e}")
+            results.append(None)
+    return results
+
+
+def render_barcode_image(data):
+    """
+    生成条形码图像，支持Code128和EAN13标准
+    对于非ASCII字符会自动转换为哈希值
+    """
+    if not data:
+        return None
+
+    try:
+        return raster_to_qimage('barcode', render_symbol_raster('barcode', data))
+    except Exception as e:
+        print(f"生成条形码失败: {e}")
+        return None
+
+
+def render_qrcode_image(data):
+    """生成二维码图像"""
+    if not data:
+        return None
+
+    try:
+        return raster_to_qimage('qrcode', render_symbol_raster('qrcode', data))
+    except Exception as e:
+        print(f"生成二维码失败: {e}")
+        return None
+
+
+def render_table_image(kind, value):
+    """按类型生成表格条码列的图像，kind为'barcode'或'qrcode'"""
+    if kind == 'barcode':
+        return render_barcode_image(value)
+    return render_qrcode_image(value)
+
+
+class BarcodeImageCache:
+    """
+    条形码/二维码图像缓存，按(码制, 值, 尺寸)寻址
+    内存中保留有限大小的LRU；可选在用户数据库旁边保存PNG文件作为磁盘缓存（需显式开启）。
+    磁盘缓存只保存生成较慢的二维码（条形码重新生成比读取PNG更快），总大小超过上限时按修改时间删除最旧的文件。
+    键包含值本身，值变化后自然对应新的键，旧图像随LRU淘汰，无需逐个失效。
+    """
+
+    DISK_KINDS = ('qrcode',)
+
+    def __init__(self, disk_dir=None, max_bytes=64 * 1024 * 1024, max_disk_bytes=128 * 1024 * 1024):
+        self.disk_dir = None
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._images = OrderedDict()  # key -> QImage
+        self._total_bytes = 0
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.set_disk_dir(disk_dir)
+
+    def set_disk_dir(self, disk_dir):
+        """开启（给出目录）或关闭（None）磁盘缓存，关闭时已保存的文件保留在原处"""
+        if disk_dir:
+            try:
+                os.makedirs(disk_dir, exist_ok=True)
+                self.disk_dir = disk_dir
+                self._prune_disk()
+            except OSError as e:
+                print(f"[DEBUG] 无法创建条码缓存目录: {str(e)}")
+                self.disk_dir = None
+        else:
+            self.disk_dir = None
+
+    @staticmethod
+    def make_key(kind, value):
+        """生成缓存键(码制, 值, 尺寸)"""
+        if kind == 'barcode':
+            value_str = str(value)
+            # 与barcode_payload一致：只有13位ASCII数字使用EAN13
+            symbology = 'ean13' if value_str.isascii() and value_str.isdigit() and len(value_str) == 13 else 'code128'
+            return (symbology, value_str, BARCODE_HEIGHT)
+        return ('qrcode', str(value), QRCODE_SIZE)
+
+    def _disk_path(self, key):
+        digest = hashlib.sha1('|'.join(str(part) for part in key).encode('utf-8')).hexdigest()
+        return os.path.join(self.disk_dir, digest[:2], f"{digest}.png")
+
+    def _prune_disk(self):
+        """统计磁盘缓存大小，超过上限时删除最久未使用（修改时间最早）的文件，降到上限的80%"""
+        files = []
+        total = 0
+        for root, _, names in os.walk(self.disk_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        if total > self.max_disk_bytes:
+            files.sort()
+            target = self.max_disk_bytes * 0.8
+            for _, size, path in files:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+        with self._lock:
+            self._disk_bytes = total
+
+    def peek(self, kind, value):
+        """只查询内存缓存，不生成图像"""
+        if not value:
+            return None
+        key = self.make_key(kind, value)
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+            return image
+
+    def get_image(self, kind, value):
+        """获取图像：内存缓存 -> 磁盘缓存 -> 重新生成"""
+        if not value:
+            return None
+        key = self.make_key(kind, value)
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+                return image
+
+        image = None
+        path = self._disk_path(key) if self.disk_dir and kind in self.DISK_KINDS else None
+        if path and os.path.exists(path):
+            image = QImage(path)
+            if image.isNull():
+                image = None
+            else:
+                try:
+                    # 命中时刷新修改时间，清理时按最近使用保留
+                    os.utime(path)
+                except OSError:
+                    pass
+
+        if image is None:
+            image = render_table_image(kind, value)
+            if image is None:
+                return None
+            if path:
+                self._save_to_disk(path, image)
+
+        self._store(key, image)
+        return image
+
+    def _save_to_disk(self, path, image):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            image.save(path, 'PNG')
+            size = os.path.getsize(path)
+        except Exception as e:
+            print(f"[DEBUG] 写入条码缓存失败: {str(e)}")
+            return
+        with self._lock:
+            self._disk_bytes += size
+            over = self._disk_bytes > self.max_disk_bytes
+        if over:
+            self._prune_disk()
+
+    def _store(self, key, image):
+        with self._lock:
+            old = self._images.pop(key, None)
+            if old is not None:
+                self._total_bytes -= old.sizeInBytes()
+            self._images[key] = image
+            self._total_bytes += image.sizeInBytes()
+            # 超出容量时淘汰最久未使用的图像
+            while self._total_bytes > self.max_bytes and len(self._images) > 1:
+                _, evicted = self._images.popitem(last=False)
+                self._total_bytes -= evicted.sizeInBytes()
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self._total_bytes = 0
+
+
+class BarcodeRenderService:
+    """
+    基于进程池的批量条码生成服务，用于导出等批量操作
+    任务按块提交，返回光栅化后的灰度像素数据，支持进度回调和取消
+    """
+
+    CHUNK_SIZE = 64
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            # 统一使用spawn方式启动子进程，避免在已有线程的Qt进程中fork
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    def render_batch(self, items, progress_callback=None, cancel_event=None):
+        """
+        批量生成条码像素
+        :param items: [(类型, 值), ...]
+        :param progress_callback: progress_callback(已完成数, 总数)
+        :param cancel_event: threading.Event，置位后停止提交并取消未开始的任务
+        :return: 生成器，逐个产出(序号, 像素数据或None)
+        """
+        items = list(items)
+        total = len(items)
+        chunks = [(start, items[start:start + self.CHUNK_SIZE])
+                  for start in range(0, total, self.CHUNK_SIZE)]
+
+        try:
+            executor = self._get_executor()
+            futures = {executor.submit(render_symbol_batch, chunk): start for start, chunk in chunks}
+        except Exception as e:
+            # 进程池不可用时（例如受限环境）退回到当前线程生成
+            print(f"[DEBUG] 进程池不可用，使用单线程生成: {str(e)}")
+            futures = None
+
+        done_count = 0
+        if futures is None:
+            for start, chunk in chunks:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                for offset, raster in enumerate(render_symbol_batch(chunk)):
+                    yield start + offset, raster
+                done_count += len(chunk)
+                if progress_callback:
+                    progress_callback(done_count, total)
+            return
+
+        pending = set(futures)
+        try:
+            while pending:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                finished, pending = wait_futures(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    start = futures[future]
+                    for offset, raster in enumerate(future.result()):
+                        yield start + offset, raster
+                    done_count += len(chunks[start // self.CHUNK_SIZE][1])
+                    if progress_callback:
+                        progress_callback(done_count, total)
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class BarcodeExportWorker(QThread):
+    """在后台线程中批量生成并保存条码图片"""
+
+    progress = pyqtSignal(int, int)
+    export_finished = pyqtSignal(int, str)  # 导出数量, 错误信息
+
+    def __init__(self, render_service, items, parent=None):
+        """items: [(类型, 值, 文件名), ...]"""
+        super().__init__(parent)
+        self.render_service = render_service
+        self.items = items
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        exported_count = 0
+        try:
+            render_items = [(kind, value) for kind, value, _ in self.items]
+            results = self.render_service.render_batch(
+                render_items, lambda done, total: self.progress.emit(done, total), self.cancel_event)
+            for index, raster in results:
+                if raster is None:
+                    continue
+                kind, _, filename = self.items[index]
+                if raster_to_qimage(kind, raster).save(filename):
+                    exported_count += 1
+            self.export_finished.emit(exported_count, "")
+        except Exception as e:
+            self.export_finished.emit(exported_count, str(e))
+
+
+class DataExportWorker(QThread):
+    """在后台线程中执行数据导出，报告进度并支持取消"""
+
+    progress = pyqtSignal(int, int)
+    export_finished = pyqtSignal(int, str)  # 导出行数, 错误信息
+
+    def __init__(self, export_func, total, parent=None):
+        """export_func(progress_callback, cancel_event) 执行导出并返回导出的行数，total为预计行数"""
+        super().__init__(parent)
+        self.export_func = export_func
+        self.total = total
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        try:
+            count = self.export_func(lambda done: self.progress.emit(done, self.total), self.cancel_event)
+            self.export_finished.emit(count, "")
+        except ExportCancelled as e:
+            self.export_finished.emit(e.count, "")
+        except Exception as e:
+            self.export_finished.emit(0, str(e) or type(e).__name__)
+
+
+class SearchWorker(QThread):
+    """后台搜索线程：使用独立的数据库连接执行搜索计划，结果分页返回
+
+    只保留最新的一次搜索请求；被新请求取代的查询通过SQLite进度回调中断。
+    """
+
+    PAGE_SIZE = 500
+
+    page_ready = pyqtSignal(int, list)          # 搜索序号, 一页结果
+    search_finished = pyqtSignal(int, int, str)  # 搜索序号, 结果总数, 错误信息
+
+    def __init__(self, db_file, parent=None):
+        super().__init__(parent)
+        self.db_file = db_file
+        self._condition = threading.Condition()
+        self._request = None
+        self._generation = 0   # 最新请求的序号
+        self._active = 0       # 正在执行的请求序号
+        self._stopped = False
+
+    def submit(self, generation, plan, base_rows=None):
+        """提交搜索；base_rows不为空时在这些结果上细化，而不是重新查询数据库"""
+        with self._condition:
+            self._request = (generation, plan, base_rows)
+            self._generation = generation
+            self._condition.notify()
+
+    def cancel(self, generation):
+        """取消序号小于generation的所有搜索"""
+        with self._condition:
+            self._request = None
+            self._generation = generation
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._request = None
+            self._generation += 1
+            self._condition.notify()
+        self.wait()
+
+    def _superseded(self):
+        return self._active != self._generation
+
+    def run(self):
+        conn = open_read_connection(self.db_file)
+        # 每执行1000条虚拟机指令检查一次，被新请求取代时中断当前查询
+        conn.set_progress_handler(lambda: 1 if self._superseded() else 0, 1000)
+        try:
+            while True:
+                with self._condition:
+                    while self._request is None and not self._stopped:
+                        self._condition.wait()
+                    if self._stopped:
+                        break
+                    generation, plan, base_rows = self._request
+                    self._request = None
+                    self._active = generation
+                self._run_search(conn, generation, plan, base_rows)
+        finally:
+            conn.close()
+
+    def _run_search(self, conn, generation, plan, base_rows):
+        total = 0
+        try:
+            if base_rows is not None:
+                pages = plan.refine(base_rows, self.PAGE_SIZE)
+            else:
+                pages = plan.iter_pages(conn.cursor(), self.PAGE_SIZE)
+            for rows in pages:
+                if self._superseded():
+                    return
+                if rows:
+                    total += len(rows)
+                    self.page_ready.emit(generation, rows)
+            if not self._superseded():
+                self.search_finished.emit(generation, total, "")
+        except Exception as e:
+            # 被取代的查询会以 "interrupted" 结束，无需报告
+            if not self._superseded():
+                self.search_finished.emit(generation, total, str(e))
+
+
+class PinyinMigrationTask:
+    """后台补全已有数据的拼音列：在数据库线程上分片执行，每片运行一小段时间后重新排队
+
+    数据库线程是唯一的写入者，补全与界面提交的写入、排序索引、备份等请求依次穿插执行，
+    不再另开写连接争用数据库锁。拼音计算交给进程池，完成后在数据库线程重建全文索引。
+    progress_callback(done, total) 和 finished_callback(completed, error) 在界面线程调用。
+    """
+
+    SLICE_SECONDS = 0.5
+
+    def __init__(self, db_worker, progress_callback=None, finished_callback=None):
+        self.db_worker = db_worker
+        self.progress_callback = progress_callback
+        self.finished_callback = finished_callback
+        self.cancel_event = threading.Event()
+        self._executor = None
+        self._total = None
+        self._done = 0
+
+    def start(self):
+        self.db_worker.submit('pinyin_migration', self._run_slice, self._on_slice)
+
+    def cancel(self):
+        """停止排队新的分片，下次登录从检查点继续"""
+        self.cancel_event.set()
+
+    def close(self):
+        """关闭进程池（数据库线程结束后由界面线程调用）"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def _run_slice(self, db):
+        """在数据库线程执行一片，返回是否全部完成"""
+        if self.cancel_event.is_set():
+            return False
+        try:
+            cpu_count = os.cpu_count() or 1
+            if self._executor is None and cpu_count > 1:
+                self._executor = ProcessPoolExecutor(max_workers=min(4, cpu_count),
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            done_before = self._done
+
+            def on_progress(done, total):
+                if self._total is None:
+                    self._total = total
+                self._done = done_before + done
+
+            completed = migrate_pinyin_columns(db.conn, self._executor, progress_callback=on_progress,
+                                               cancel_event=self.cancel_event,
+                                               deadline=time.monotonic() + self.SLICE_SECONDS,
+                                               total=self._total)
+            if completed:
+                self.close()
+                # 拼音补全后在数据库线程按新的列结构重建全文索引
+                db.finish_pinyin_migration()
+            return completed
+        except BaseException:
+            self.close()
+            raise
+
+    def _on_slice(self, completed, error):
+        if error or completed:
+            if self.finished_callback:
+                self.finished_callback(bool(completed), error)
+            return
+        if self.cancel_event.is_set():
+            return
+        if self.progress_callback and self._total is not None:
+            self.progress_callback(self._done, self._total)
+        self.start()
+
+
+class DatabaseWorker(QThread):
+    """后台数据库线程：在独立连接上按队列执行请求，结果经信号回到界面线程
+
+    请求为 func(db) 形式，db 是本线程的 UserDatabase。相同键的请求在队列中合并，
+    只执行最后一次提交的内容（例如连续的统计刷新），避免堆积重复查询。
+    本线程的连接是主窗口唯一的写连接：增删改、排序索引、拼音补全、备份和恢复都在这里依次执行，
+    界面线程只通过只读连接查询。写入产生的行级变更经 data_changed 信号按顺序送回界面线程，
+    先于该请求的回调到达。
+    """
+
+    request_finished = pyqtSignal(object, object, str)  # 回调, 结果, 错误信息
+    data_changed = pyqtSignal(str, object, object)  # 操作, rowid, 修改前的行
+
+    def __init__(self, db_file, parent=None):
+        super().__init__(parent)
+        self.db_file = db_file
+        self._condition = threading.Condition()
+        self._pending = OrderedDict()  # 键 -> (func, callback)
+        self._sequence = 0
+        self._stopped = False
+        # 信号由后台线程发出，本对象属于界面线程，回调因此在界面线程执行
+        self.request_finished.connect(self._deliver)
+
+    def submit(self, key, func, callback=None):
+        """提交请求；key为None时不与其他请求合并。callback(result, error) 在界面线程调用"""
+        with self._condition:
+            if self._stopped:
+                return
+            if key is None:
+                self._sequence += 1
+                key = ('request', self._sequence)
+            self._pending[key] = (func, callback)
+            self._condition.notify()
+
+    def stop(self):
+        """不再接受新请求，执行完已排队的请求后结束线程
+
+        等待期间继续处理界面事件（请求的回调照常送达），界面不会因排队的备份等操作而无响应。
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        while not self.wait(50):
+            QApplication.processEvents()
+
+    def run(self):
+        db = UserDatabase(self.db_file, setup=False)
+        db.add_change_listener(self.data_changed.emit)
+        try:
+            while True:
+                with self._condition:
+                    while not self._pending and not self._stopped:
+                        self._condition.wait()
+                    if not self._pending:
+                        break
+                    _, (func, callback) = self._pending.popitem(last=False)
+                try:
+                    result, error = func(db), ""
+                except Exception as e:
+                    result, error = None, str(e)
+                self.request_finished.emit(callback, result, error)
+        finally:
+            db.close()
+
+    def _deliver(self, callback, result, error):
+        if callback is not None:
+            callback(result, error)
+
+
+class DataTableModel(QAbstractTableModel):
+    """数据表格模型：按rowid窗口分批加载数据，行颜色和对齐方式在data()中按需计算"""
+
+    FETCH_BATCH_SIZE = 256
+
+    # 条码列返回(类型, 值)，由BarcodeDelegate按需绘制
+    ImageValueRole = Qt.UserRole + 1
+
+    # 马卡龙色系交替行颜色
+    ROW_COLORS = [
+        QColor(MacaronColors.MINT_GREEN),    # 薄荷绿
+        QColor(MacaronColors.SKY_BLUE),      # 天空蓝
+        QColor(MacaronColors.LEMON_YELLOW),  # 柠檬黄
+        QColor(MacaronColors.LAVENDER),      # 薰衣草紫
+        QColor(MacaronColors.PEACH_ORANGE)   # 蜜桃橙
+    ]
+    TEXT_COLOR = QColor('#333333')  # 深色文字提高可读性
+
+    def __init__(self, user_db, columns_config, parent=None):
+        super().__init__(parent)
+        self.user_db = user_db
+        self.columns_config = columns_config
+
+        # 条形码和二维码列附加在数据列之后：(类型, 数据列索引)
+        self.image_columns = []
+        for idx, col in enumerate(columns_config):
+            if col.get('is_barcode', False):
+                self.image_columns.append(('barcode', idx))
+        for idx, col in enumerate(columns_config):
+            if col.get('is_qrcode', False):
+                self.image_columns.append(('qrcode', idx))
+
+        self._headers = [col['label'] for col in columns_config]
+        for kind, idx in self.image_columns:
+            suffix = '条形码' if kind == 'barcode' else '二维码'
+            self._headers.append(f"{columns_config[idx]['label']}{suffix}")
+
+        self._rows = []           # 已加载的行: (rowid, 列值...)
+        self._after_key = None    # 已加载窗口最后一行的键集分页位置键（UserDatabase.row_key）
+        self._has_more = False
+        self._rowid_ordered = False  # 行是否按rowid升序（整表浏览且未排序）
+        self._positions = None       # rowid -> 行号，非rowid顺序时按需建立
+        self._order = None           # 整表浏览时的排序 (数据列索引, 是否降序)，None为rowid顺序
+        self._text_key = None        # 排序列的文本排序键（拼音）
+
+    def reload(self, order=None):
+        """重置为整表浏览模式，数据在滚动时按需加载；order为 (数据列索引, 是否降序) 时由数据库排序"""
+        self.beginResetModel()
+        self._rows = []
+        self._after_key = None
+        self._has_more = True
+        self._rowid_ordered = order is None
+        self._positions = None
+        self._order = order
+        self._text_key = None
+        if order is not None:
+            _, self._text_key = self.user_db.sort_spec(self.columns_config[order[0]]['name'])
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def sort_order(self):
+        """当前整表浏览的排序 (数据列索引, 是否降序)，未排序时为None"""
+        return self._order
+
+    def set_rows(self, rows):
+        """显示一组已查询好的数据（例如搜索结果）"""
+        self.beginResetModel()
+        self._rows = list(rows)
+        self._has_more = False
+        self._rowid_ordered = False
+        self._positions = None
+        self._order = None
+        self.endResetModel()
+
+    def append_rows(self, rows):
+        """追加一页已查询好的数据（分页到达的搜索结果）"""
+        if not rows:
+            return
+        start = len(self._rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+        self._rows.extend(rows)
+        self._positions = None
+        self.endInsertRows()
+
+    def loaded_rows(self):
+        """当前已加载的全部行 (rowid, *values)"""
+        return list(self._rows)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._has_more
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or not self._has_more:
+            return
+
+        order_by, descending = None, False
+        if self._order is not None:
+            column, descending = self._order
+            order_by = self.columns_config[column]['name']
+        rows = self.user_db.fetch_page(order_by=order_by, after_key=self._after_key,
+                                       limit=self.FETCH_BATCH_SIZE, descending=descending)
+        if len(rows) < self.FETCH_BATCH_SIZE:
+            self._has_more = False
+        if not rows:
+            return
+
+        start = len(self._rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+        self._rows.extend(rows)
+        self._positions = None
+        self.endInsertRows()
+        self._after_key = self.user_db.row_key(rows[-1], order_by)
+
+    def _rowid_bisect(self, rowid):
+        """按rowid升序排列时，返回rowid应在的位置"""
+        low, high = 0, len(self._rows)
+        while low < high:
+            mid = (low + high) // 2
+            if self._rows[mid][0] < rowid:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def row_position(self, rowid):
+        """返回rowid所在的行号，未加载时返回None"""
+        if self._rowid_ordered:
+            pos = self._rowid_bisect(rowid)
+            if pos < len(self._rows) and self._rows[pos][0] == rowid:
+                return pos
+            return None
+        if self._positions is None:
+            self._positions = {row[0]: pos for pos, row in enumerate(self._rows)}
+        return self._positions.get(rowid)
+
+    def _order_key(self, row):
+        column = self._order[0] + 1
+        return sql_order_key(row[column] if column < len(row) else None, self._text_key)
+
+    def _precedes(self, a, b):
+        """排序浏览时行a是否排在行b之前（按 (列值, rowid) 整体升序或降序）"""
+        key_a, key_b = (self._order_key(a), a[0]), (self._order_key(b), b[0])
+        return key_a > key_b if self._order[1] else key_a < key_b
+
+    def _order_bisect(self, row):
+        low, high = 0, len(self._rows)
+        while low < high:
+            mid = (low + high) // 2
+            if self._precedes(self._rows[mid], row):
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def insert_row(self, row):
+        """插入一行：整表浏览时放到排序位置（尚未加载到的部分留给按需加载），否则追加到末尾"""
+        if self._rowid_ordered:
+            if self._has_more and self._after_key is not None and row[0] > self._after_key:
+                return
+            pos = self._rowid_bisect(row[0])
+        elif self._order is not None:
+            pos = self._order_bisect(row)
+            if self._has_more and pos == len(self._rows):
+                return
+        else:
+            pos = len(self._rows)
+        self.beginInsertRows(QModelIndex(), pos, pos)
+        self._rows.insert(pos, tuple(row))
+        self._positions = None
+        self.endInsertRows()
+
+    def update_row(self, row):
+        """替换已加载的一行，返回是否找到"""
+        pos = self.row_position(row[0])
+        if pos is None:
+            return False
+        if self._order is not None and self._order_key(self._rows[pos]) != self._order_key(row):
+            # 排序列的值变了，移动到新的位置
+            self.remove_row(row[0])
+            self.insert_row(row)
+            return True
+        self._rows[pos] = tuple(row)
+        self.dataChanged.emit(self.index(pos, 0), self.index(pos, self.columnCount() - 1))
+        return True
+
+    def remove_row(self, rowid):
+        """移除已加载的一行，返回是否找到"""
+        pos = self.row_position(rowid)
+        if pos is None:
+            return False
+        self.beginRemoveRows(QModelIndex(), pos, pos)
+        del self._rows[pos]
+        self._positions = None
+        self.endRemoveRows()
+        return True
+
+    def fetch_all(self):
+        """加载剩余的所有行"""
+        while self._has_more:
+            self.fetchMore(QModelIndex())
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        row, col = index.row(), index.column()
+        data_col_count = len(self.columns_config)
+
+        if role == Qt.BackgroundRole:
+            return self.ROW_COLORS[row % len(self.ROW_COLORS)]
+        if role == Qt.ForegroundRole:
+            return self.TEXT_COLOR
+        if role == Qt.TextAlignmentRole:
+            if col >= data_col_count:
+                return int(Qt.AlignCenter)
+            return int(Qt.AlignVCenter | Qt.AlignLeft)
+        if role == Qt.UserRole:
+            return self._rows[row][0]
+
+        values = self._rows[row][1:]
+        if col < data_col_count:
+            if role in (Qt.DisplayRole, Qt.ToolTipRole):
+                value = values[col] if col < len(values) else None
+                return "" if value is None else str(value)
+            return None
+
+        # 条形码/二维码列：只返回要编码的值，图像由委托在可见时异步生成
+        if role == self.ImageValueRole:
+            kind, value_idx = self.image_columns[col - data_col_count]
+            value = values[value_idx] if value_idx < len(values) else None
+            return (kind, value) if value else None
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self._headers[section] if section < len(self._headers) else None
+        return section + 1
+
+    def setHeaderData(self, section, orientation, value, role=Qt.EditRole):
+        if orientation != Qt.Horizontal or section >= len(self._headers):
+            return False
+        self._headers[section] = str(value)
+        self.headerDataChanged.emit(orientation, section, section)
+        return True
+
+    def rowid_at(self, row):
+        """获取指定行的rowid"""
+        if 0 <= row < len(self._rows):
+            return self._rows[row][0]
+        return None
+
+    def row_values(self, row):
+        """获取指定行的列值（不含rowid）"""
+        if 0 <= row < len(self._rows):
+            return self._rows[row][1:]
+        return None
+
+    def sort_rows(self, column, descending):
+        """对已加载的行（例如搜索结果）按数据列排序，规则与数据库排序一致，整行（含rowid）一起移动"""
+        if column >= len(self.columns_config):
+            return
+
+        _, text_key = self.user_db.sort_spec(self.columns_config[column]['name'])
+
+        def sort_key(row_data):
+            return sql_order_key(row_data[column + 1] if column + 1 < len(row_data) else None, text_key)
+
+        self.layoutAboutToBeChanged.emit()
+        self._rows.sort(key=lambda row_data: (sort_key(row_data), row_data[0]), reverse=descending)
+        self._rowid_ordered = False
+        self._positions = None
+        self.layoutChanged.emit()
+
+
+class BarcodeRenderTask(QRunnable):
+    """在线程池中生成单个条形码/二维码图像"""
+
+    def __init__(self, delegate, key):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.delegate = delegate
+        self.image_cache = delegate.image_cache
+        self.key = key
+
+    def run(self):
+        kind, value = self.key
+        image = self.image_cache.get_image(kind, value)
+        try:
+            # 跨线程发射信号，由Qt排队到界面线程处理
+            self.delegate.image_ready.emit(self.key, image)
+        except RuntimeError:
+            # 窗口已关闭，委托已被销毁
+            pass
+
+
+class BarcodeDelegate(QStyledItemDelegate):
+    """条形码/二维码列委托：只为可见行异步生成图像，生成完成前显示占位文字"""
+
+    MAX_CACHED_IMAGES = 2000
+    PLACEHOLDER_TEXT = '生成中...'
+
+    image_ready = pyqtSignal(object, object)
+
+    def __init__(self, view, image_cache, parent=None):
+        super().__init__(parent)
+        self.view = view
+        self.image_cache = image_cache
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(max(1, min(4, QThreadPool.globalInstance().maxThreadCount())))
+        self._pixmaps = {}   # (kind, value) -> QPixmap，None表示生成失败
+        self._pending = {}   # (kind, value) -> BarcodeRenderTask
+        self.image_ready.connect(self._on_image_ready)
+        # 滚动后取消尚未开始的任务，只保留当前可见行的请求
+        view.verticalScrollBar().valueChanged.connect(self.cancel_pending)
+
+    def paint(self, painter, option, index):
+        image_value = index.data(DataTableModel.ImageValueRole)
+        if not image_value:
+            super().paint(painter, option, index)
+            return
+
+        # 绘制背景和选中状态
+        opt = QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        style = opt.widget.style() if opt.widget else QApplication.style()
+        style.drawPrimitive(QStyle.PE_PanelItemViewItem, opt, painter, opt.widget)
+
+        pixmap = self._pixmaps.get(image_value)
+        if pixmap is None and image_value not in self._pixmaps:
+            # 内存缓存命中时直接绘制，无需排队生成
+            image = self.image_cache.peek(*image_value)
+            if image is not None:
+                pixmap = self._remember(image_value, image)
+        rect = option.rect.adjusted(2, 2, -2, -2)
+        if pixmap is not None:
+            scaled = pixmap.size().scaled(rect.size(), Qt.KeepAspectRatio)
+            if scaled.width() > pixmap.width() or scaled.height() > pixmap.height():
+                scaled = pixmap.size()
+            target = QRect(0, 0, scaled.width(), scaled.height())
+            target.moveCenter(rect.center())
+            painter.drawPixmap(target, pixmap)
+        elif image_value not in self._pixmaps:
+            painter.save()
+            painter.setPen(QColor('#999999'))
+            painter.drawText(rect, Qt.AlignCenter, self.PLACEHOLDER_TEXT)
+            painter.restore()
+            self.request_image(image_value)
+
+    def sizeHint(self, option, index):
+        image_value = index.data(DataTableModel.ImageValueRole)
+        if image_value and image_value[0] == 'qrcode':
+            return QSize(200, 200)
+        return QSize(220, 100)
+
+    def request_image(self, key):
+        """提交异步生成请求（同一值只生成一次）"""
+        if key in self._pending:
+            return
+        task = BarcodeRenderTask(self, key)
+        self._pending[key] = task
+        self.thread_pool.start(task)
+
+    def cancel_pending(self, *args):
+        """取消尚未开始执行的生成任务"""
+        for key, task in list(self._pending.items()):
+            if self.thread_pool.tryTake(task):
+                del self._pending[key]
+
+    def pixmap_for(self, key):
+        """获取已生成的图像，未生成时返回None"""
+        return self._pixmaps.get(key)
+
+    def clear(self):
+        self.cancel_pending()
+        self._pixmaps.clear()
+
+    def shutdown(self):
+        """关闭窗口前停止所有生成任务"""
+        self.cancel_pending()
+        self.thread_pool.waitForDone(2000)
+
+    def _remember(self, key, image):
+        if len(self._pixmaps) >= self.MAX_CACHED_IMAGES:
+            self._pixmaps.clear()
+        pixmap = QPixmap.fromImage(image) if image is not None else None
+        self._pixmaps[key] = pixmap
+        return pixmap
+
+    def _on_image_ready(self, key, image):
+        self._pending.pop(key, None)
+        self._remember(key, image)
+        self.view.viewport().update()
+
+
 class MainWindow(QMainWindow):
     def __init__(self, username, db_file, settings, user_manager, parent_window=None):
         super().__init__()
@@ -1662,19 +4796,57 @@ class MainWindow(QMainWindow):
         self.user_db = UserDatabase(db_file)
         if not self.columns_config:
             self.columns_config = self.user_db.get_columns_config()
+        # 单字拼音表持久化在用户数据库旁边，构建索引前载入
+        self.pinyin_table_file = os.path.join(os.path.dirname(os.path.abspath(db_file)), 'pinyin_chars.json')
+        transliterator.load_char_table(self.pinyin_table_file)
+
+        # 条形码/二维码图像缓存；磁盘缓存在“工具”菜单中开启，放在用户数据库旁边
+        self.image_cache_dir = os.path.join(os.path.dirname(os.path.abspath(db_file)), 'barcode_cache')
+        disk_cache_enabled = self.user_db.get_config_value(IMAGE_DISK_CACHE_KEY) == '1'
+        self.image_cache = BarcodeImageCache(self.image_cache_dir if disk_cache_enabled else None)
+        # 批量导出使用的进程池（首次使用时才启动）
+        self.render_service = BarcodeRenderService()
+        self.export_worker = None
+        
+        # 即时搜索：输入停顿后在后台线程执行，新输入会取消未完成的搜索
+        self.search_worker = SearchWorker(db_file, self)
+        self.search_worker.page_ready.connect(self.on_search_page)
+        self.search_worker.search_finished.connect(self.on_search_finished)
+        self.search_worker.start()
+        self.search_generation = 0
+        self.search_plan = None        # 当前显示结果对应的搜索计划
+        self.search_complete = False   # 当前结果是否已全部到达（可用于细化）
+        self.search_keyword = ""
+        self.search_received = 0
+        
+        # 写入以及统计、备份、恢复等耗时操作在后台数据库线程执行（唯一的写连接）
+        self.db_worker = DatabaseWorker(db_file, self)
+        self.db_worker.start()
+        # 拼音首字母索引在数据库线程构建（之后随该线程的写入增量更新），完成前首字母搜索退回LIKE/全文索引
+        self.db_worker.submit('initials_index', lambda db: db.build_initials_index(), self.on_initials_index_ready)
+        self.stats = None          # 最近一次统计结果，单行修改时增量修补
+        self.record_count = None
+        self.browse_order = None   # 整表浏览的排序 (数据列索引, 是否降序)，刷新数据时保持
         
         self.init_ui()
         
+        # 单行增删改后只刷新对应的行和统计，不重新加载整表
+        self.db_worker.data_changed.connect(self.on_data_changed)
+        
+        # 拼音列未补全时在后台继续（从检查点续跑）
+        self.pinyin_task = None
+        self.start_pinyin_migration()
+        
         icon_path = resource_path('icon.ico')
         if os.path.exists('icon.ico'):
             self.setWindowIcon(QIcon('icon.ico'))
 
         # 初始化时自动创建备份
-        self.user_db.backup_database(backup_type="auto")
+        self.auto_backup()
         
         # 设置定时备份
         self.backup_timer = QTimer(self)
-        self.backup_timer.timeout.connect(lambda: self.user_db.backup_database(backup_type="auto"))
+        self.backup_timer.timeout.connect(self.auto_backup)
         self.backup_timer.start(2 * 60 * 60 * 1000)  # 2小时备份一次
     
     def init_ui(self):
@@ -1704,8 +4876,18 @@ class MainWindow(QMainWindow):
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText('输入关键词搜索所有列...')
         self.search_input.returnPressed.connect(self.search_data)
+        self.search_input.textChanged.connect(self.on_search_text_changed)
         search_layout.addWidget(self.search_input)
         
+        self.instant_search_check = QCheckBox('即时搜索')
+        self.instant_search_check.setChecked(True)
+        search_layout.addWidget(self.instant_search_check)
+        
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(300)
+        self.search_timer.timeout.connect(self.run_instant_search)
+        
         self.search_btn = QPushButton('搜索所有列')
         self.search_btn.clicked.connect(self.search_data)
         search_layout.addWidget(self.search_btn)
@@ -1720,12 +4902,41 @@ class MainWindow(QMainWindow):
         # 数据显示区域
         self.tab_widget = QTabWidget()
         
-        # 数据表格
-        self.data_table = QTableWidget()
+        # 数据表格（模型/视图，数据按需加载）
+        self.data_table = QTableView()
+        self.data_model = DataTableModel(self.user_db, self.columns_config, self)
+        self.data_table.setModel(self.data_model)
+
+        # 条形码/二维码列由委托按可见行异步绘制
+        self.barcode_delegate = BarcodeDelegate(self.data_table, self.image_cache, self)
+        for offset in range(len(self.data_model.image_columns)):
+            self.data_table.setItemDelegateForColumn(len(self.columns_config) + offset, self.barcode_delegate)
         self.data_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.data_table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.data_table.doubleClicked.connect(self.show_item_detail)
-        self.data_table.itemSelectionChanged.connect(self.table_selection_changed)
+        self.data_table.selectionModel().selectionChanged.connect(self.table_selection_changed)
+
+        # 条形码/二维码列使用固定行高，避免逐行计算内容高度
+        image_kinds = {kind for kind, _ in self.data_model.image_columns}
+        if 'qrcode' in image_kinds:
+            self.data_table.verticalHeader().setDefaultSectionSize(205)
+        elif 'barcode' in image_kinds:
+            self.data_table.verticalHeader().setDefaultSectionSize(105)
+
+        # 调整表格样式
+        self.data_table.setStyleSheet("""
+            QTableView {
+                border: 1px solid #E0E0E0;
+                gridline-color: #E0E0E0;
+                font-size: 12px;
+            }
+            QHeaderView::section {
+                background-color: #F5F5F5;
+                padding: 5px;
+                border: 1px solid #E0E0E0;
+                font-weight: bold;
+            }
+        """)
 
         # 添加右键菜单支持
         self.data_table.setContextMenuPolicy(Qt.CustomContextMenu)
@@ -1752,6 +4963,11 @@ class MainWindow(QMainWindow):
         self.setStatusBar(self.status_bar)
         self.update_status_bar()
         
+        # 拼音补全进度（后台任务运行时显示）
+        self.pinyin_progress_label = QLabel()
+        self.pinyin_progress_label.hide()
+        self.status_bar.addPermanentWidget(self.pinyin_progress_label)
+        
         # 加载数据
         self.load_data()
 
@@ -1802,78 +5018,34 @@ class MainWindow(QMainWindow):
         
         if new_order is None:
             # 取消排序，恢复原始顺序
-            self.load_data()
-            return
-        
-        # 执行排序
-        self.perform_sorting(column_index, new_order)
-
-    def perform_sorting(self, column_index, order):
-        """执行实际的表格排序"""
-        try:
-            # 获取当前显示的所有数据（包括搜索后的数据）
-            row_count = self.data_table.rowCount()
-            if row_count == 0:
-                return
-            
-            # 收集所有行的数据和rowid
-            rows_data = []
-            for row in range(row_count):
-                row_data = []
-                rowid = None
-                
-                # 获取该行的所有单元格数据
-                for col in range(self.data_table.columnCount()):
-                    item = self.data_table.item(row, col)
-                    if item:
-                        if col == 0:  # 第一列保存rowid
-                            rowid = item.data(Qt.UserRole)
-                        row_data.append(item.text())
-                    else:
-                        # 处理有widget的单元格（条形码/二维码列）
-                        widget = self.data_table.cellWidget(row, col)
-                        if widget and isinstance(widget, QLabel):
-                            # 对于图像列，我们可以跳过排序或者使用特定值
-                            row_data.append("")  # 图像列不参与排序
-                        else:
-                            row_data.append("")
-                
-                if rowid is not None:
-                    rows_data.append((rowid, row_data))
-            
-            # 根据指定列进行排序
-            def sort_key(item):
-                text = item[1][column_index] if column_index < len(item[1]) else ""
-                
-                # 尝试转换为数字进行排序
-                try:
-                    if text.replace('.', '').replace('-', '').isdigit():
-                        return float(text) if '.' in text else int(text)
-                except:
-                    pass
-                
-                # 返回文本（支持中文排序）
-                return text
-            
-            # 执行排序
-            reverse = (order == 'desc')
-            rows_data.sort(key=sort_key, reverse=reverse)
-            
-            # 更新表格显示
-            self.data_table.setSortingEnabled(False)  # 暂时禁用内置排序
-            
-            for row, (rowid, row_data) in enumerate(rows_data):
-                for col, text in enumerate(row_data):
-                    if col < self.data_table.columnCount():
-                        item = self.data_table.item(row, col)
-                        if item:
-                            item.setText(text)
-            
+            self.browse_order = None
+            self.update_header_sort_indicator(column_index, None)
+            self.load_data()
+            return
+        
+        # 执行排序
+        self.perform_sorting(column_index, new_order)
+
+    def perform_sorting(self, column_index, order):
+        """执行实际的表格排序：整表浏览时由数据库 ORDER BY 排序并分页加载，搜索结果在内存中排序"""
+        try:
+            if column_index >= len(self.columns_config):
+                return
+
+            self.browse_order = (column_index, order == 'desc')
+            if self.search_plan is None:
+                self.data_model.reload(self.browse_order)
+            else:
+                # 整行数据（包括rowid和条码列）随排序一起移动
+                self.data_model.sort_rows(column_index, order == 'desc')
+
+            # 统计排序次数，经常排序的列在后台建立索引
+            column = self.columns_config[column_index]['name']
+            self.db_worker.submit(None, lambda db: db.record_sort(column))
+
             # 更新表头显示排序指示器
             self.update_header_sort_indicator(column_index, order)
-            
-            self.data_table.setSortingEnabled(True)
-            
+
         except Exception as e:
             print(f"排序失败: {str(e)}")
 
@@ -1938,6 +5110,12 @@ class MainWindow(QMainWindow):
         settings_action.triggered.connect(self.show_user_settings)
         tools_menu.addAction(settings_action)
         
+        disk_cache_action = QAction('二维码图片磁盘缓存', self)
+        disk_cache_action.setCheckable(True)
+        disk_cache_action.setChecked(self.image_cache.disk_dir is not None)
+        disk_cache_action.toggled.connect(self.set_image_disk_cache)
+        tools_menu.addAction(disk_cache_action)
+        
         # 帮助菜单
         help_menu = menubar.addMenu('帮助')
         
@@ -1945,6 +5123,13 @@ class MainWindow(QMainWindow):
         about_action.triggered.connect(self.show_about)
         help_menu.addAction(about_action)
     
+    def set_image_disk_cache(self, enabled):
+        """开启/关闭二维码磁盘缓存：立即对本窗口生效，设置由数据库线程写入config"""
+        self.image_cache.set_disk_dir(self.image_cache_dir if enabled else None)
+        value = '1' if enabled else '0'
+        self.db_worker.submit(IMAGE_DISK_CACHE_KEY, lambda db: db.set_config_value(IMAGE_DISK_CACHE_KEY, value))
+        self.status_bar.showMessage('已开启二维码磁盘缓存' if enabled else '已关闭二维码磁盘缓存', 3000)
+    
     def create_tool_bar(self):
         toolbar = QToolBar("主工具栏")
         self.addToolBar(toolbar)
@@ -1979,118 +5164,39 @@ class MainWindow(QMainWindow):
         toolbar.addAction(export_action)
     
     def load_data(self):
+        self.cancel_search()
         try:
-            # 设置表头
-            headers = [col['label'] for col in self.columns_config]
-            
-            # 添加条形码和二维码列
-            barcode_cols = [col for col in self.columns_config if col.get('is_barcode', False)]
-            qrcode_cols = [col for col in self.columns_config if col.get('is_qrcode', False)]
-            
-            for col in barcode_cols:
-                headers.append(f"{col['label']}条形码")
-            
-            for col in qrcode_cols:
-                headers.append(f"{col['label']}二维码")
-            
-            self.data_table.setColumnCount(len(headers))
-            self.data_table.setHorizontalHeaderLabels(headers)
-            
-            # 加载数据
-            data = self.user_db.get_all_data()
-            self.data_table.setRowCount(len(data))
-            
-            # 马卡龙色系交替行颜色
-            colors = [
-                MacaronColors.MINT_GREEN,    # 薄荷绿
-                MacaronColors.SKY_BLUE,      # 天空蓝
-                MacaronColors.LEMON_YELLOW,  # 柠檬黄
-                MacaronColors.LAVENDER,      # 薰衣草紫
-                MacaronColors.PEACH_ORANGE   # 蜜桃橙
-            ]
-            
-            for row_idx, row_data in enumerate(data):
-                # rowid是第一个元素
-                rowid = row_data[0]
-                row_values = row_data[1:]
-                
-                # 设置交替行背景色
-                color = colors[row_idx % len(colors)]
-                for col_idx in range(len(headers)):
-                    item = QTableWidgetItem(str(row_values[col_idx]) if col_idx < len(row_values) else QTableWidgetItem(""))
-                    item.setData(Qt.UserRole, rowid)  # 保存rowid
-                    
-                    # 设置背景色和文本颜色
-                    item.setBackground(QColor(color))
-                    item.setForeground(QColor('#333333'))  # 深色文字提高可读性
-                    
-                    # 设置对齐方式
-                    item.setTextAlignment(Qt.AlignVCenter | Qt.AlignLeft)
-                    
-                    self.data_table.setItem(row_idx, col_idx, item)
-                
-                # 添加条形码
-                col_offset = len(self.columns_config)
-                for col in barcode_cols:
-                    barcode_value = row_values[self.columns_config.index(col)]
-                    barcode_img = self.generate_barcode(barcode_value)
-                    if barcode_img:
-                        label = QLabel()
-                        label.setPixmap(QPixmap.fromImage(barcode_img))
-                        label.setAlignment(Qt.AlignCenter)
-                        label.setStyleSheet(f"background-color: {color};")
-                        self.data_table.setCellWidget(row_idx, col_offset, label)
-                    col_offset += 1
-                
-                # 添加二维码
-                for col in qrcode_cols:
-                    qrcode_value = row_values[self.columns_config.index(col)]
-                    qrcode_img = self.generate_qrcode(qrcode_value)
-                    if qrcode_img:
-                        label = QLabel()
-                        label.setPixmap(QPixmap.fromImage(qrcode_img))
-                        label.setAlignment(Qt.AlignCenter)
-                        label.setStyleSheet(f"background-color: {color};")
-                        self.data_table.setCellWidget(row_idx, col_offset, label)
-                    col_offset += 1
-            
-            # 调整表格样式
-            self.data_table.setStyleSheet("""
-                QTableWidget {
-                    border: 1px solid #E0E0E0;
-                    gridline-color: #E0E0E0;
-                    font-size: 12px;
-                }
-                QHeaderView::section {
-                    background-color: #F5F5F5;
-                    padding: 5px;
-                    border: 1px solid #E0E0E0;
-                    font-weight: bold;
-                }
-            """)
-            
+            # 重置模型，数据在滚动时按rowid（或当前排序列）分批加载
+            self.data_model.reload(self.browse_order)
             self.data_table.resizeColumnsToContents()
-            self.data_table.resizeRowsToContents()
-            
+
             # 更新统计信息
             self.update_stats()
             self.update_status_bar()
-            
+
         except Exception as e:
             print(f"[DEBUG] 加载数据失败: {str(e)}")
             QMessageBox.critical(self, '错误', f'加载数据失败: {str(e)}')
 
     
     def update_stats(self):
+        """在后台线程计算统计数据，完成后刷新统计页（连续刷新只执行最后一次）"""
+        numeric_columns = [col['name'] for col in self.columns_config if col['type'] in ['INTEGER', 'REAL']]
+        self.db_worker.submit('stats', lambda db: db.get_stats(numeric_columns), self.show_stats)
+
+    def show_stats(self, stats, error):
+        if error:
+            print(f"[DEBUG] 统计数据失败: {error}")
+            return
+        self.stats = stats
+        total_count, column_stats = stats
+        
         # 清除之前的统计内容
         for i in reversed(range(self.stats_layout.count())): 
             item = self.stats_layout.itemAt(i)
             if item and item.widget():
                 item.widget().setParent(None)
         
-        # 获取数据总数
-        total_count = self.user_db.get_data_count()
-        
         # 创建统计信息
         stats_group = QGroupBox('数据统计')
         stats_form = QFormLayout()
@@ -2100,9 +5206,8 @@ class MainWindow(QMainWindow):
         # 添加列统计
         for col in self.columns_config:
             if col['type'] in ['INTEGER', 'REAL']:
-                # 计算数值列的总和、平均值等
-                self.user_db.cursor.execute(f'SELECT SUM({col["name"]}), AVG({col["name"]}), MIN({col["name"]}), MAX({col["name"]}) FROM data')
-                result = self.user_db.cursor.fetchone()
+                # 数值列的总和、平均值等
+                result = column_stats.get(col['name'])
                 
                 if result and result[0] is not None:
                     stats_form.addRow(QLabel(f'{col["label"]} 统计:'))
@@ -2121,8 +5226,107 @@ class MainWindow(QMainWindow):
         
         self.stats_layout.addStretch()
     
+    def on_data_changed(self, op, rowid, old_row):
+        """单行写入后的增量刷新：更新表格中的这一行、修补统计数据"""
+        new_row = None if op == 'delete' else self.user_db.get_data_by_id(rowid)
+        
+        if new_row is None:
+            self.data_model.remove_row(rowid)
+        elif self.search_plan is None:
+            if op == 'insert':
+                self.data_model.insert_row(new_row)
+            else:
+                self.data_model.update_row(new_row)
+        elif self.search_plan.matches(new_row, self.user_db.initials_index):
+            # 搜索结果中只保留仍满足条件的行
+            if not self.data_model.update_row(new_row):
+                self.data_model.insert_row(new_row)
+        else:
+            self.data_model.remove_row(rowid)
+        
+        self.patch_stats(old_row, new_row)
+
+    def patch_stats(self, old_row, new_row):
+        """按单行变化修补记录数和数值列统计；无法增量计算时（如删除了最小/最大值）在后台重新统计"""
+        if self.record_count is not None:
+            self.show_record_count(self.record_count + (new_row is not None) - (old_row is not None), "")
+        if self.stats is None:
+            self.update_stats()
+            return
+        
+        total_count, column_stats = self.stats
+        total_count += (new_row is not None) - (old_row is not None)
+        patched = {}
+        for col_idx, col in enumerate(self.columns_config):
+            if col['name'] not in column_stats:
+                continue
+            total, avg, low, high, filled = column_stats[col['name']]
+            old = old_row[col_idx + 1] if old_row and col_idx + 1 < len(old_row) else None
+            new = new_row[col_idx + 1] if new_row and col_idx + 1 < len(new_row) else None
+            if old == new:
+                patched[col['name']] = column_stats[col['name']]
+                continue
+            if any(value is not None and not isinstance(value, (int, float)) for value in (old, new)):
+                self.update_stats()
+                return
+            if old is not None:
+                if old == low or old == high:
+                    self.update_stats()
+                    return
+                total -= old
+                filled -= 1
+            if new is not None:
+                total = new if not filled else total + new
+                filled += 1
+                low = new if low is None else min(low, new)
+                high = new if high is None else max(high, new)
+            if filled:
+                avg = total / filled
+            else:
+                total = avg = low = high = None
+            patched[col['name']] = (total, avg, low, high, filled)
+        self.show_stats((total_count, patched), "")
+
+    def on_initials_index_ready(self, index, error):
+        """数据库线程构建的拼音首字母索引（自带锁）交给界面线程的搜索计划共用"""
+        if error:
+            print(f"[DEBUG] 构建拼音索引失败: {error}")
+            return
+        self.user_db.initials_index = index
+
+    def start_pinyin_migration(self):
+        """启动后台拼音补全任务"""
+        if not self.user_db.pinyin_migration_pending or self.pinyin_task is not None:
+            return
+        self.pinyin_task = PinyinMigrationTask(self.db_worker, self.on_pinyin_migration_progress,
+                                               self.on_pinyin_migration_finished)
+        self.pinyin_progress_label.setText('正在生成拼音字段...')
+        self.pinyin_progress_label.show()
+        self.pinyin_task.start()
+
+    def on_pinyin_migration_progress(self, done, total):
+        percent = done * 100 // total if total else 100
+        self.pinyin_progress_label.setText(f'正在生成拼音字段: {done}/{total} ({percent}%)')
+
+    def on_pinyin_migration_finished(self, completed, error):
+        self.pinyin_task = None
+        self.pinyin_progress_label.hide()
+        if error:
+            print(f"[DEBUG] 生成拼音字段失败: {error}")
+            return
+        if completed:
+            # 全文索引已在数据库线程重建，这里只启用本实例的拼音搜索
+            self.user_db.finish_pinyin_migration()
+            print("[DEBUG] 已完成现有数据的拼音字段生成")
+
     def update_status_bar(self):
-        count = self.user_db.get_data_count()
+        self.db_worker.submit('count', lambda db: db.get_data_count(), self.show_record_count)
+
+    def show_record_count(self, count, error):
+        if error:
+            print(f"[DEBUG] 获取记录数失败: {error}")
+            return
+        self.record_count = count
         self.status_bar.showMessage(f'用户: {self.username} | 总记录数: {count}')
 
     def search_data(self):
@@ -2138,72 +5342,12 @@ class MainWindow(QMainWindow):
         try:
             # 使用增强搜索方法
             data = self.user_db.search_data_enhanced(keyword)
-            self.data_table.setRowCount(len(data))
-            
-            # 马卡龙色系交替行颜色
-            colors = [
-                MacaronColors.MINT_GREEN,    # 薄荷绿
-                MacaronColors.SKY_BLUE,      # 天空蓝
-                MacaronColors.LEMON_YELLOW,  # 柠檬黄
-                MacaronColors.LAVENDER,      # 薰衣草紫
-                MacaronColors.PEACH_ORANGE   # 蜜桃橙
-            ]
-            
-            for row_idx, row_data in enumerate(data):
-                # rowid是第一个元素
-                rowid = row_data[0]
-                row_values = row_data[1:]
-                
-                # 设置交替行背景色
-                color = colors[row_idx % len(colors)]
-                for col_idx, value in enumerate(row_values):
-                    if col_idx < len(self.columns_config):  # 只处理数据列，不处理条码列
-                        item = QTableWidgetItem(str(value))
-                        item.setData(Qt.UserRole, rowid)  # 保存rowid
-                        
-                        # 设置背景色和文本颜色
-                        item.setBackground(QColor(color))
-                        item.setForeground(QColor('#333333'))  # 深色文字提高可读性
-                        
-                        # 设置对齐方式
-                        item.setTextAlignment(Qt.AlignVCenter | Qt.AlignLeft)
-                        
-                        self.data_table.setItem(row_idx, col_idx, item)
-                
-                # 添加条形码
-                col_offset = len(self.columns_config)
-                barcode_cols = [col for col in self.columns_config if col.get('is_barcode', False)]
-                for col in barcode_cols:
-                    barcode_value = row_values[self.columns_config.index(col)]
-                    barcode_img = self.generate_barcode(barcode_value)
-                    if barcode_img:
-                        label = QLabel()
-                        label.setPixmap(QPixmap.fromImage(barcode_img))
-                        label.setAlignment(Qt.AlignCenter)
-                        label.setStyleSheet(f"background-color: {color};")
-                        self.data_table.setCellWidget(row_idx, col_offset, label)
-                    col_offset += 1
-                
-                # 添加二维码
-                qrcode_cols = [col for col in self.columns_config if col.get('is_qrcode', False)]
-                for col in qrcode_cols:
-                    qrcode_value = row_values[self.columns_config.index(col)]
-                    qrcode_img = self.generate_qrcode(qrcode_value)
-                    if qrcode_img:
-                        label = QLabel()
-                        label.setPixmap(QPixmap.fromImage(qrcode_img))
-                        label.setAlignment(Qt.AlignCenter)
-                        label.setStyleSheet(f"background-color: {color};")
-                        self.data_table.setCellWidget(row_idx, col_offset, label)
-                    col_offset += 1
-            
+            self.data_model.set_rows(data)
             self.data_table.resizeColumnsToContents()
-            self.data_table.resizeRowsToContents()
             
             # 显示搜索结果的详细信息
-            from pypinyin import lazy_pinyin, Style
-            pinyin_full = ''.join(lazy_pinyin(keyword))
-            pinyin_initials = ''.join(lazy_pinyin(keyword, style=Style.FIRST_LETTER))
+            pinyin_full = transliterator.full(keyword)
+            pinyin_initials = transliterator.initials(keyword)
             
             search_info = f'找到 {len(data)} 条匹配记录'
             if pinyin_full and pinyin_full != keyword:
@@ -2217,217 +5361,124 @@ class MainWindow(QMainWindow):
             QMessageBox.critical(self, '错误', f'搜索失败: {str(e)}')
 
     def search_all_columns(self):
-        """搜索所有列的内容 - 增强版支持拼音"""
+        """搜索所有列的内容 - 增强版支持拼音，在后台线程执行，结果分页显示"""
+        self.search_timer.stop()
         keyword = self.search_input.text().strip()
         if not keyword:
             self.load_data()
             return
         
         try:
-            # 使用增强的全列搜索方法
-            data = self.user_db.search_data_all_columns_enhanced(keyword)
-            self.display_search_results(data, keyword)
-            
+            # 使用增强的全列搜索策略生成搜索计划
+            plan = self.user_db.build_search_plan(keyword)
         except Exception as e:
             QMessageBox.critical(self, '错误', f'搜索失败: {str(e)}')
-
-    def display_search_results(self, data, keyword):
-        """显示搜索结果"""
-        self.data_table.setRowCount(len(data))
-        
-        # 马卡龙色系交替行颜色
-        colors = [
-            MacaronColors.MINT_GREEN,    # 薄荷绿
-            MacaronColors.SKY_BLUE,      # 天空蓝
-            MacaronColors.LEMON_YELLOW,  # 柠檬黄
-            MacaronColors.LAVENDER,      # 薰衣草紫
-            MacaronColors.PEACH_ORANGE   # 蜜桃橙
-        ]
-        
-        for row_idx, row_data in enumerate(data):
-            # rowid是第一个元素
-            rowid = row_data[0]
-            row_values = row_data[1:]
-            
-            # 设置交替行背景色
-            color = colors[row_idx % len(colors)]
-            
-            # 高亮显示匹配的文本
-            for col_idx, value in enumerate(row_values):
-                if col_idx < len(self.columns_config):  # 只处理数据列
-                    display_text = str(value) if value else ""
-                    
-                    # 高亮匹配的关键词
-                    if keyword.lower() in str(value).lower():
-                        display_text = self.highlight_keyword(str(value), keyword)
-                    
-                    item = QTableWidgetItem(display_text)
-                    item.setData(Qt.UserRole, rowid)
-                    
-                    # 设置背景色和文本颜色
-                    item.setBackground(QColor(color))
-                    item.setForeground(QColor('#333333'))
-                    
-                    # 设置对齐方式
-                    item.setTextAlignment(Qt.AlignVCenter | Qt.AlignLeft)
-                    
-                    self.data_table.setItem(row_idx, col_idx, item)
-            
-            # 添加条形码和二维码（与原来相同）
-            self.add_barcode_qrcode_to_table(row_idx, row_values, color)
-        
-        self.data_table.resizeColumnsToContents()
-        self.data_table.resizeRowsToContents()
+            return
         
-        # 更新状态栏
-        self.status_bar.showMessage(f'找到 {len(data)} 条包含 "{keyword}" 的记录')
+        # 新关键词只会缩小上一次的结果时，直接在已有结果中过滤
+        base_rows = None
+        if self.search_complete and plan.can_refine(self.search_plan):
+            base_rows = self.data_model.loaded_rows()
+        
+        self.search_generation += 1
+        self.search_plan = plan
+        self.search_complete = False
+        self.search_keyword = keyword
+        self.search_received = 0
+        self.search_worker.submit(self.search_generation, plan, base_rows)
+        self.status_bar.showMessage(f'正在搜索 "{keyword}"...')
+
+    def on_search_text_changed(self, text):
+        """输入变化时重新计时，停顿后再搜索"""
+        if self.instant_search_check.isChecked():
+            self.search_timer.start()
+
+    def run_instant_search(self):
+        # 清空关键词且当前已显示全部数据时无需重新加载
+        if not self.search_input.text().strip() and self.search_plan is None:
+            return
+        self.search_all_columns()
 
-    def highlight_keyword(self, text, keyword):
-        """在文本中高亮显示关键词"""
-        # 这里可以返回带HTML格式的文本，但QTableWidgetItem不支持HTML
-        # 所以返回原始文本，高亮效果可以在单元格渲染器中实现
-        return text
+    def cancel_search(self):
+        """取消未完成的搜索，之后到达的结果将被忽略"""
+        self.search_timer.stop()
+        self.search_generation += 1
+        self.search_worker.cancel(self.search_generation)
+        self.search_plan = None
+        self.search_complete = False
 
-    def add_barcode_qrcode_to_table(self, row_idx, row_values, color):
-        """为表格行添加条形码和二维码"""
-        col_offset = len(self.columns_config)
-        
-        # 添加条形码
-        barcode_cols = [col for col in self.columns_config if col.get('is_barcode', False)]
-        for col in barcode_cols:
-            barcode_value = row_values[self.columns_config.index(col)]
-            barcode_img = self.generate_barcode(barcode_value)
-            if barcode_img:
-                label = QLabel()
-                label.setPixmap(QPixmap.fromImage(barcode_img))
-                label.setAlignment(Qt.AlignCenter)
-                label.setStyleSheet(f"background-color: {color};")
-                self.data_table.setCellWidget(row_idx, col_offset, label)
-            col_offset += 1
-        
-        # 添加二维码
-        qrcode_cols = [col for col in self.columns_config if col.get('is_qrcode', False)]
-        for col in qrcode_cols:
-            qrcode_value = row_values[self.columns_config.index(col)]
-            qrcode_img = self.generate_qrcode(qrcode_value)
-            if qrcode_img:
-                label = QLabel()
-                label.setPixmap(QPixmap.fromImage(qrcode_img))
-                label.setAlignment(Qt.AlignCenter)
-                label.setStyleSheet(f"background-color: {color};")
-                self.data_table.setCellWidget(row_idx, col_offset, label)
-            col_offset += 1
-
-
-
-    def display_search_results(self, data, keyword):
-        """显示搜索结果"""
-        self.data_table.setRowCount(len(data))
-        
-        # 马卡龙色系交替行颜色
-        colors = [
-            MacaronColors.MINT_GREEN,    # 薄荷绿
-            MacaronColors.SKY_BLUE,      # 天空蓝
-            MacaronColors.LEMON_YELLOW,  # 柠檬黄
-            MacaronColors.LAVENDER,      # 薰衣草紫
-            MacaronColors.PEACH_ORANGE   # 蜜桃橙
-        ]
-        
-        for row_idx, row_data in enumerate(data):
-            # rowid是第一个元素
-            rowid = row_data[0]
-            row_values = row_data[1:]
-            
-            # 设置交替行背景色
-            color = colors[row_idx % len(colors)]
-            
-            # 高亮显示匹配的文本
-            for col_idx, value in enumerate(row_values):
-                if col_idx < len(self.columns_config):  # 只处理数据列
-                    display_text = str(value) if value else ""
-                    
-                    # 高亮匹配的关键词
-                    if keyword.lower() in str(value).lower():
-                        display_text = self.highlight_keyword(str(value), keyword)
-                    
-                    item = QTableWidgetItem(display_text)
-                    item.setData(Qt.UserRole, rowid)
-                    
-                    # 设置背景色和文本颜色
-                    item.setBackground(QColor(color))
-                    item.setForeground(QColor('#333333'))
-                    
-                    # 设置对齐方式
-                    item.setTextAlignment(Qt.AlignVCenter | Qt.AlignLeft)
-                    
-                    self.data_table.setItem(row_idx, col_idx, item)
-            
-            # 添加条形码和二维码（与原来相同）
-            self.add_barcode_qrcode_to_table(row_idx, row_values, color)
-        
-        self.data_table.resizeColumnsToContents()
-        self.data_table.resizeRowsToContents()
+    def on_search_page(self, generation, rows):
+        if generation != self.search_generation:
+            return
+        if self.search_received == 0:
+            self.data_model.set_rows(rows)
+            self.data_table.resizeColumnsToContents()
+        else:
+            self.data_model.append_rows(rows)
+        self.search_received += len(rows)
+        self.status_bar.showMessage(f'正在搜索 "{self.search_keyword}"... 已找到 {self.search_received} 条')
+
+    def on_search_finished(self, generation, total, error):
+        if generation != self.search_generation:
+            return
+        if error:
+            self.search_plan = None
+            QMessageBox.critical(self, '错误', f'搜索失败: {error}')
+            return
+        if self.search_received == 0:
+            self.data_model.set_rows([])
+        self.search_complete = True
         
         # 更新状态栏
-        self.status_bar.showMessage(f'找到 {len(data)} 条包含 "{keyword}" 的记录')
+        self.status_bar.showMessage(f'找到 {total} 条包含 "{self.search_keyword}" 的记录')
 
     def highlight_keyword(self, text, keyword):
         """在文本中高亮显示关键词"""
-        # 这里可以返回带HTML格式的文本，但QTableWidgetItem不支持HTML
+        # 这里可以返回带HTML格式的文本，但表格单元格不支持HTML
         # 所以返回原始文本，高亮效果可以在单元格渲染器中实现
         return text
 
-    def add_barcode_qrcode_to_table(self, row_idx, row_values, color):
-        """为表格行添加条形码和二维码"""
-        col_offset = len(self.columns_config)
-        
-        # 添加条形码
-        barcode_cols = [col for col in self.columns_config if col.get('is_barcode', False)]
-        for col in barcode_cols:
-            barcode_value = row_values[self.columns_config.index(col)]
-            barcode_img = self.generate_barcode(barcode_value)
-            if barcode_img:
-                label = QLabel()
-                label.setPixmap(QPixmap.fromImage(barcode_img))
-                label.setAlignment(Qt.AlignCenter)
-                label.setStyleSheet(f"background-color: {color};")
-                self.data_table.setCellWidget(row_idx, col_offset, label)
-            col_offset += 1
-        
-        # 添加二维码
-        qrcode_cols = [col for col in self.columns_config if col.get('is_qrcode', False)]
-        for col in qrcode_cols:
-            qrcode_value = row_values[self.columns_config.index(col)]
-            qrcode_img = self.generate_qrcode(qrcode_value)
-            if qrcode_img:
-                label = QLabel()
-                label.setPixmap(QPixmap.fromImage(qrcode_img))
-                label.setAlignment(Qt.AlignCenter)
-                label.setStyleSheet(f"background-color: {color};")
-                self.data_table.setCellWidget(row_idx, col_offset, label)
-            col_offset += 1
-
-
-
-
     def clear_search(self):
         self.search_input.clear()
         self.load_data()
     
-    def table_selection_changed(self):
+    def table_selection_changed(self, *args):
         selected_rows = self.data_table.selectionModel().selectedRows()
         if selected_rows:
             row = selected_rows[0].row()
-            rowid_item = self.data_table.item(row, 0)
-            if rowid_item:
-                self.current_rowid = rowid_item.data(Qt.UserRole)
+            self.current_rowid = self.data_model.rowid_at(row)
+            if self.current_rowid is not None:
                 print(f"[DEBUG] Selected row ID: {self.current_rowid}")
             else:
-                self.current_rowid = None
                 print("[DEBUG] No row ID item found")
         else:
             self.current_rowid = None
 
+    def selected_rows(self):
+        """获取选中的行号（已排序）"""
+        return sorted({index.row() for index in self.data_table.selectionModel().selectedIndexes()})
+
+    def selected_cells(self):
+        """获取选中的单元格(行, 列)列表"""
+        indexes = self.data_table.selectionModel().selectedIndexes()
+        return sorted((index.row(), index.column()) for index in indexes)
+
+    def cell_text(self, row, col):
+        """获取单元格显示文本"""
+        text = self.data_model.data(self.data_model.index(row, col), Qt.DisplayRole)
+        return text if text else ""
+
+    def header_text(self, col):
+        """获取表头文本"""
+        header = self.data_model.headerData(col, Qt.Horizontal)
+        return str(header) if header is not None else ""
+
+    def generate_table_image(self, kind, value):
+        """为表格条码列生成图像"""
+        if kind == 'barcode':
+            return self.generate_barcode(value)
+        return self.generate_qrcode(value)
+
 
     
     def edit_selected_data(self):
@@ -2438,13 +5489,7 @@ class MainWindow(QMainWindow):
             return
         
         row = selected_rows[0].row()
-        rowid_item = self.data_table.item(row, 0)
-        
-        if not rowid_item:
-            QMessageBox.warning(self, '警告', '无法获取行ID')
-            return
-        
-        self.current_rowid = rowid_item.data(Qt.UserRole)
+        self.current_rowid = self.data_model.rowid_at(row)
         if not self.current_rowid:
             QMessageBox.warning(self, '警告', '获取的行ID无效')
             return
@@ -2473,15 +5518,9 @@ class MainWindow(QMainWindow):
                         QMessageBox.warning(self, '警告', f"{col['label']} 的值必须唯一")
                         return
             
-            try:
-                # 更新数据
-                if self.user_db.update_data(self.current_rowid, new_data):
-                    QMessageBox.information(self, '成功', '数据更新成功')
-                    self.load_data()
-                else:
-                    QMessageBox.warning(self, '警告', '更新数据失败')
-            except Exception as e:
-                QMessageBox.warning(self, '错误', f'更新数据失败: {str(e)}')
+            # 更新数据
+            rowid = self.current_rowid
+            self.submit_write(lambda db: db.update_data(rowid, new_data), '更新')
 
 
 
@@ -2501,15 +5540,8 @@ class MainWindow(QMainWindow):
                         QMessageBox.warning(self, '警告', f"{col['label']} 的值必须唯一")
                         return
             
-            try:
-                # 插入数据
-                if self.user_db.insert_data(data):
-                    QMessageBox.information(self, '成功', '数据添加成功')
-                    self.load_data()
-                else:
-                    QMessageBox.warning(self, '警告', '添加数据失败')
-            except Exception as e:
-                QMessageBox.warning(self, '错误', f'添加数据失败: {str(e)}')
+            # 插入数据
+            self.submit_write(lambda db: db.insert_data(data), '添加')
 
     
     def update_data(self):
@@ -2548,19 +5580,15 @@ class MainWindow(QMainWindow):
                     self.input_widgets[col['name']].setStyleSheet("background-color: #FFCDD2;")
                     return
         
-        try:
-            # 更新数据
-            if self.user_db.update_data(self.current_rowid, data):
-                QMessageBox.information(self, '成功', '数据更新成功')
-                # 重置状态并刷新数据
-                self.current_rowid = None
-                self.clear_inputs()
-                self.load_data()
-                self.update_btn.setEnabled(False)
-            else:
-                QMessageBox.warning(self, '警告', '更新数据失败')
-        except Exception as e:
-            QMessageBox.warning(self, '错误', f'更新数据失败: {str(e)}')
+        def reset_inputs():
+            # 重置状态
+            self.current_rowid = None
+            self.clear_inputs()
+            self.update_btn.setEnabled(False)
+        
+        # 更新数据（表格中的行由变更通知刷新）
+        rowid = self.current_rowid
+        self.submit_write(lambda db: db.update_data(rowid, data), '更新', reset_inputs)
 
     
     def delete_data(self):
@@ -2570,19 +5598,25 @@ class MainWindow(QMainWindow):
             return
         
         row = selected_rows[0].row()
-        rowid = self.data_table.item(row, 0).data(Qt.UserRole)
+        rowid = self.data_model.rowid_at(row)
         
         reply = QMessageBox.question(self, '确认', '确定要删除这条数据吗?', 
                                    QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
-            try:
-                if self.user_db.delete_data(rowid):
-                    QMessageBox.information(self, '成功', '数据删除成功')
-                    self.load_data()
-                else:
-                    QMessageBox.warning(self, '警告', '删除数据失败')
-            except Exception as e:
-                QMessageBox.warning(self, '错误', f'删除数据失败: {str(e)}')
+            self.submit_write(lambda db: db.delete_data(rowid), '删除')
+
+    def submit_write(self, func, action, on_success=None):
+        """在数据库线程上执行单行写入，完成后提示结果（表格和统计由先到达的变更通知刷新）"""
+        def finished(result, error):
+            if error:
+                QMessageBox.warning(self, '错误', f'{action}数据失败: {error}')
+            elif result:
+                if on_success is not None:
+                    on_success()
+                QMessageBox.information(self, '成功', f'数据{action}成功')
+            else:
+                QMessageBox.warning(self, '警告', f'{action}数据失败')
+        self.db_worker.submit(None, func, finished)
     
     def clear_inputs(self):
         for widget in self.input_widgets.values():
@@ -2601,7 +5635,7 @@ class MainWindow(QMainWindow):
         
         # 获取选中数据
         row = index.row()
-        rowid = self.data_table.item(row, 0).data(Qt.UserRole)
+        rowid = self.data_model.rowid_at(row)
         data = self.user_db.get_data_by_id(rowid)
         print(f"[DEBUG] Selected row ID: {rowid}")
 
@@ -2751,46 +5785,141 @@ class MainWindow(QMainWindow):
         if not path:
             return
         
-        try:
-            values = data[2:]
-            
-            # 导出条形码
-            barcode_cols = [col for col in self.columns_config if col.get('is_barcode', False)]
-            for col in barcode_cols:
-                col_idx = self.columns_config.index(col)
-                if col_idx < len(values) and values[col_idx]:
-                    img = self.generate_barcode(values[col_idx])
-                    if img:
-                        filename = f"{path}/{col['name']}_barcode.png"
-                        img.save(filename)
-            
-            # 导出二维码
-            qrcode_cols = [col for col in self.columns_config if col.get('is_qrcode', False)]
-            for col in qrcode_cols:
-                col_idx = self.columns_config.index(col)
-                if col_idx < len(values) and values[col_idx]:
-                    img = self.generate_qrcode(values[col_idx])
-                    if img:
-                        filename = f"{path}/{col['name']}_qrcode.png"
-                        img.save(filename)
-            
-            QMessageBox.information(self, "成功", f"图片已保存到：\n{path}")
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"导出失败：{str(e)}")
+        values = data[1:]  # 跳过rowid
+        items = []
+        for kind, col_idx in self.data_model.image_columns:
+            if col_idx < len(values) and values[col_idx]:
+                col = self.columns_config[col_idx]
+                items.append((kind, values[col_idx], f"{path}/{col['name']}_{kind}.png"))
+        
+        self.start_image_export(items, path)
+
+    def start_image_export(self, items, path):
+        """在后台批量生成并保存条码图片，显示进度并支持取消"""
+        if not items:
+            QMessageBox.information(self, "提示", "没有可导出的条形码/二维码")
+            return
+        
+        progress_dialog = QProgressDialog("正在生成图片...", "取消", 0, len(items), self)
+        progress_dialog.setWindowTitle("导出图片")
+        progress_dialog.setWindowModality(Qt.WindowModal)
+        progress_dialog.setMinimumDuration(500)
+        
+        worker = BarcodeExportWorker(self.render_service, items, self)
+        worker.progress.connect(lambda done, total: progress_dialog.setValue(done))
+        progress_dialog.canceled.connect(worker.cancel)
+        
+        def on_finished(exported_count, error):
+            cancelled = worker.cancel_event.is_set()
+            progress_dialog.canceled.disconnect(worker.cancel)
+            progress_dialog.close()
+            self.export_worker = None
+            worker.deleteLater()
+            if error:
+                QMessageBox.critical(self, "错误", f"导出失败：{error}")
+            elif cancelled:
+                QMessageBox.information(self, "已取消", f"已导出 {exported_count} 张图片到：\n{path}")
+            else:
+                QMessageBox.information(self, "成功", f"已导出 {exported_count} 张图片到：\n{path}")
+        
+        worker.export_finished.connect(on_finished)
+        self.export_worker = worker
+        worker.start()
 
     
+    TABLE_EXPORT_FILTERS = ('CSV文件 (*.csv);;GZIP压缩CSV (*.csv.gz);;Zstandard压缩CSV (*.csv.zst);;'
+                            'Excel工作簿 (*.xlsx);;所有文件 (*)')
+    DATA_EXPORT_FILTERS = ('CSV文件 (*.csv);;GZIP压缩CSV (*.csv.gz);;Zstandard压缩CSV (*.csv.zst);;'
+                           'Excel工作簿 (*.xlsx);;Parquet文件 (*.parquet);;Arrow IPC文件 (*.arrow);;所有文件 (*)')
+
+    def ask_export_filename(self, title, filters):
+        """选择导出文件名；没有写扩展名时按所选的文件类型补全（如 .csv.gz）"""
+        filename, selected_filter = QFileDialog.getSaveFileName(self, title, '', filters)
+        if filename and not os.path.splitext(filename)[1]:
+            match = re.search(r'\(\*(\.[^)\s]+)\)', selected_filter or '')
+            if match:
+                filename += match.group(1)
+        return filename
+
+    def start_data_export(self, export_func, total, filename):
+        """在后台执行数据导出，显示进度并支持取消；export_func(progress_callback, cancel_event) 返回导出行数"""
+        if self.export_worker is not None:
+            QMessageBox.warning(self, '警告', '已有导出任务正在进行，请稍候')
+            return
+        
+        progress_dialog = QProgressDialog('正在导出数据...', '取消', 0, max(total, 1), self)
+        progress_dialog.setWindowTitle('导出数据')
+        progress_dialog.setWindowModality(Qt.WindowModal)
+        progress_dialog.setMinimumDuration(500)
+        
+        worker = DataExportWorker(export_func, total, self)
+        worker.progress.connect(lambda done, total: progress_dialog.setValue(min(done, total)))
+        progress_dialog.canceled.connect(worker.cancel)
+        
+        def on_finished(exported_count, error):
+            cancelled = worker.cancel_event.is_set()
+            progress_dialog.canceled.disconnect(worker.cancel)
+            progress_dialog.close()
+            self.export_worker = None
+            worker.deleteLater()
+            if error:
+                QMessageBox.critical(self, '错误', f'导出失败: {error}')
+            elif cancelled:
+                QMessageBox.information(self, '已取消', '导出已取消，未生成文件')
+            else:
+                QMessageBox.information(self, '成功', f'已导出 {exported_count} 行数据到 {filename}')
+        
+        worker.export_finished.connect(on_finished)
+        self.export_worker = worker
+        worker.start()
+
+    def table_export_func(self, filename, headers, rows, writer=write_csv_export):
+        """按扩展名选择导出方式：.xlsx写Excel工作簿（表头为列标签），其他用writer写CSV/JSON（可按扩展名压缩）"""
+        if filename.lower().endswith('.xlsx'):
+            labels = [col['label'] for col in self.columns_config]
+            types = [col.get('type', 'TEXT') for col in self.columns_config]
+            return lambda progress, cancel_event: write_xlsx_export(
+                filename, labels, rows, types, progress, cancel_event)
+        compression = export_compression(filename)
+        return lambda progress, cancel_event: writer(filename, headers, rows, compression, progress, cancel_event)
+
     def export_data(self):
-        filename, _ = QFileDialog.getSaveFileName(self, '导出数据', '', 'CSV文件 (*.csv);;所有文件 (*)')
+        """在后台流式导出全部数据：CSV（按扩展名可选gzip/zstd压缩）、Excel工作簿或Parquet/Arrow IPC列式文件"""
+        filename = self.ask_export_filename('导出数据', self.DATA_EXPORT_FILTERS)
         if not filename:
             return
         
+        file_format = arrow_export_format(filename)
         try:
-            if self.user_db.export_to_csv(filename):
-                QMessageBox.information(self, '成功', f'数据已导出到 {filename}')
+            if file_format is None:
+                headers = self.user_db.schema.data_columns
+                rows = self.user_db.export_rows()
             else:
-                QMessageBox.warning(self, '警告', '导出数据失败')
+                fields = self.arrow_export_fields()
+                rows = self.user_db.export_rows(columns=[name for name, _, _ in fields])
+            total = self.user_db.get_data_count()
         except Exception as e:
             QMessageBox.critical(self, '错误', f'导出数据失败: {str(e)}')
+            return
+        
+        if file_format is None:
+            export_func = self.table_export_func(filename, headers, rows)
+        else:
+            export_func = lambda progress, cancel_event: write_arrow_export(
+                filename, fields, rows, file_format, progress, cancel_event)
+        self.start_data_export(export_func, total, filename)
+
+    def arrow_export_fields(self):
+        """列式导出的字段 [(列名, 列类型, 标签), ...]，有拼音首字母列时询问是否一并导出"""
+        fields = [(col['name'], col.get('type', 'TEXT'), col.get('label', col['name'])) for col in self.columns_config]
+        pinyin_columns = self.user_db.schema.pinyin_columns
+        if pinyin_columns and not self.user_db.pinyin_migration_pending:
+            reply = QMessageBox.question(self, '导出数据', '是否同时导出拼音首字母列？',
+                                         QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            if reply == QMessageBox.Yes:
+                fields.extend((pinyin_columns[name], 'TEXT', f"{label}(拼音首字母)")
+                              for name, col_type, label in list(fields) if col_type == 'TEXT' and name in pinyin_columns)
+        return fields
     
     def show_user_settings(self):
         settings = self.user_manager.get_user_settings(self.username)
@@ -2877,7 +6006,7 @@ class MainWindow(QMainWindow):
         reply = QMessageBox.question(self, '确认', '确定要退出当前用户吗?', 
                                    QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
-            self.user_db.close()
+            # 数据库在closeEvent中等后台线程结束后关闭，排队的回调仍可读取数据
             if self.parent_window:  # 检查父窗口是否存在
                 self.parent_window.show()
             self.close()
@@ -2887,91 +6016,10 @@ class MainWindow(QMainWindow):
         生成条形码图像，支持Code128和EAN13标准
         对于非ASCII字符会自动转换为哈希值
         """
-        if not data:
-            return None
-        
-        try:
-            data_str = str(data)
-            
-            # 检查是否包含非ASCII字符
-            requires_encoding = False
-            for char in data_str:
-                if ord(char) > 127:  # 非ASCII字符
-                    requires_encoding = True
-                    break
-            
-            # 如果包含非条形码支持字符
-            if requires_encoding:
-                # 使用更友好的编码方式 - 首字母拼音+哈希
-                from pypinyin import lazy_pinyin
-                import hashlib
-                
-                # 获取拼音首字母
-                pinyin_initials = ''.join([x[0] for x in lazy_pinyin(data_str) if x])
-                
-                # 生成短哈希
-                hash_str = hashlib.md5(data_str.encode('utf-8')).hexdigest()[:6]
-                
-                # 组合成最终编码
-                data_str = f"{pinyin_initials}_{hash_str}".upper()
-                
-                # 确保不超过长度限制
-                data_str = data_str[:80]
-            
-            # 自动选择条码类型
-            if data_str.isdigit() and len(data_str) == 13:  # EAN13标准
-                barcode = EAN13(data_str, writer=ImageWriter())
-            else:  # 默认使用Code128
-                barcode = Code128(data_str, writer=ImageWriter())
-            
-            buffer = io.BytesIO()
-            barcode.write(buffer)
-            
-            img = Image.open(buffer)
-            img = img.convert("RGBA")
-            
-            # 调整大小
-            width, height = img.size
-            new_height = 100
-            new_width = int(width * (new_height / height))
-            
-            data = img.tobytes("raw", "RGBA")
-            qimage = QImage(data, img.size[0], img.size[1], QImage.Format_RGBA8888)
-            
-            return qimage.scaled(new_width, new_height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        
-        except Exception as e:
-            print(f"生成条形码失败: {e}")
-            return None
-
+        return self.image_cache.get_image('barcode', data)
 
-
-    
     def generate_qrcode(self, data):
-        if not data:
-            return None
-        
-        try:
-            data_str = str(data)
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(data_str)
-            qr.make(fit=True)
-            
-            img = qr.make_image(fill_color="black", back_color="white")
-            
-            img = img.convert("RGBA")
-            data = img.tobytes("raw", "RGBA")
-            qimage = QImage(data, img.size[0], img.size[1], QImage.Format_RGBA8888)
-            
-            return qimage.scaled(200, 200, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        except Exception as e:
-            print(f"生成二维码失败: {e}")
-            return None
+        return self.image_cache.get_image('qrcode', data)
 
     def print_item_detail(self, data):
         """打印数据详情"""
@@ -3300,22 +6348,20 @@ class MainWindow(QMainWindow):
 
     def copy_selected_data(self):
         """复制选中数据到剪贴板"""
-        selected_items = self.data_table.selectedItems()
-        if not selected_items:
+        selected_cells = self.selected_cells()
+        if not selected_cells:
             return
         
         # 获取选中的行和列
-        rows = set(item.row() for item in selected_items)
-        cols = set(item.column() for item in selected_items)
+        rows = set(row for row, _ in selected_cells)
+        cols = set(col for _, col in selected_cells)
         
         # 构建要复制的文本
         text = ""
         for row in sorted(rows):
             row_text = []
             for col in sorted(cols):
-                item = self.data_table.item(row, col)
-                if item:
-                    row_text.append(item.text())
+                row_text.append(self.cell_text(row, col))
             text += "\t".join(row_text) + "\n"
         
         # 复制到剪贴板
@@ -3335,72 +6381,46 @@ class MainWindow(QMainWindow):
         # 获取选中行的rowid
         rowids = []
         for row in selected_rows:
-            rowid_item = self.data_table.item(row.row(), 0)
-            if rowid_item:
-                rowids.append(rowid_item.data(Qt.UserRole))
+            rowid = self.data_model.rowid_at(row.row())
+            if rowid is not None:
+                rowids.append(rowid)
         
         if not rowids:
             QMessageBox.warning(self, '警告', '无法获取选中行的ID')
             return
         
         # 获取导出文件名
-        filename, _ = QFileDialog.getSaveFileName(
-            self, '导出选中数据', '', 
-            'CSV文件 (*.csv);;文本文件 (*.txt);;所有文件 (*)'
-        )
+        filename = self.ask_export_filename(
+            '导出选中数据', 'CSV文件 (*.csv);;文本文件 (*.txt);;GZIP压缩CSV (*.csv.gz);;Excel工作簿 (*.xlsx);;所有文件 (*)')
         
         if not filename:
             return
         
-        try:
-            # 获取选中行数据
-            data = []
-            for rowid in rowids:
-                row_data = self.user_db.get_data_by_id(rowid)
-                if row_data:
-                    data.append(row_data[1:])  # 跳过rowid
-            
-            if not data:
-                QMessageBox.warning(self, '警告', '没有数据可导出')
-                return
-            
-            # 获取列名
-            columns = [col['name'] for col in self.columns_config]
-            
-            # 写入文件
-            with open(filename, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(columns)
-                writer.writerows(data)
-            
-            QMessageBox.information(self, '成功', f'已导出 {len(data)} 行数据到 {filename}')
-        except Exception as e:
-            QMessageBox.critical(self, '错误', f'导出失败: {str(e)}')
+        self.export_selected_rows(filename, rowids, [col['name'] for col in self.columns_config])
 
 
     def copy_selected_text(self):
         """复制选中单元格文本"""
-        selected_items = self.data_table.selectedItems()
-        if not selected_items:
+        selected_cells = self.selected_cells()
+        if not selected_cells:
             return
         
-        text = "\n".join(item.text() for item in selected_items)
+        text = "\n".join(self.cell_text(row, col) for row, col in selected_cells)
         clipboard = QApplication.clipboard()
         clipboard.setText(text)
         self.status_bar.showMessage("已复制选中文本", 2000)
 
     def copy_selected_row(self):
         """复制整行数据"""
-        selected_rows = {item.row() for item in self.data_table.selectedItems()}
+        selected_rows = self.selected_rows()
         if not selected_rows:
             return
         
         text = ""
-        for row in sorted(selected_rows):
+        for row in selected_rows:
             row_data = []
-            for col in range(self.data_table.columnCount()):
-                item = self.data_table.item(row, col)
-                row_data.append(item.text() if item else "")
+            for col in range(self.data_model.columnCount()):
+                row_data.append(self.cell_text(row, col))
             text += "\t".join(row_data) + "\n"
         
         clipboard = QApplication.clipboard()
@@ -3409,25 +6429,23 @@ class MainWindow(QMainWindow):
 
     def copy_selected_with_headers(self):
         """复制选中数据带表头"""
-        selected_items = self.data_table.selectedItems()
-        if not selected_items:
+        selected_cells = self.selected_cells()
+        if not selected_cells:
             return
         
         # 获取选中区域的行列范围
-        rows = sorted({item.row() for item in selected_items})
-        cols = sorted({item.column() for item in selected_items})
+        rows = sorted({row for row, _ in selected_cells})
+        cols = sorted({col for _, col in selected_cells})
         
         # 获取表头
-        headers = [self.data_table.horizontalHeaderItem(col).text() 
-                for col in cols if self.data_table.horizontalHeaderItem(col)]
+        headers = [self.header_text(col) for col in cols]
         
         # 获取数据
         data = []
         for row in rows:
             row_data = []
             for col in cols:
-                item = self.data_table.item(row, col)
-                row_data.append(item.text() if item else "")
+                row_data.append(self.cell_text(row, col))
             data.append(row_data)
         
         # 构建文本
@@ -3438,87 +6456,50 @@ class MainWindow(QMainWindow):
         clipboard.setText(text)
         self.status_bar.showMessage("已复制带表头数据", 2000)
 
+    def selected_rowids(self):
+        """获取选中行的rowid（按表格中的顺序）"""
+        rowids = (self.data_model.rowid_at(row) for row in self.selected_rows())
+        return [rowid for rowid in rowids if rowid is not None]
+
+    def export_selected_rows(self, filename, rowids, headers, writer=write_csv_export):
+        """从数据库读取选中行的数据列，在后台写入导出文件（不经过表格显示文本）"""
+        try:
+            rows = self.user_db.export_rows(rowids)
+        except Exception as e:
+            QMessageBox.critical(self, '错误', f'导出失败: {str(e)}')
+            return
+        self.start_data_export(self.table_export_func(filename, headers, rows, writer), len(rowids), filename)
+
     def export_selected_to_csv(self):
         """导出选中数据为CSV"""
-        selected_rows = {item.row() for item in self.data_table.selectedItems()}
-        if not selected_rows:
+        rowids = self.selected_rowids()
+        if not rowids:
             QMessageBox.warning(self, '警告', '请先选择要导出的数据')
             return
         
-        filename, _ = QFileDialog.getSaveFileName(
-            self, '导出为CSV', '', 'CSV文件 (*.csv);;所有文件 (*)')
+        filename = self.ask_export_filename('导出为CSV', self.TABLE_EXPORT_FILTERS)
         if not filename:
             return
         
-        try:
-            # 获取表头
-            headers = []
-            for col in range(self.data_table.columnCount()):
-                header = self.data_table.horizontalHeaderItem(col)
-                if header:
-                    headers.append(header.text())
-            
-            # 获取数据
-            data = []
-            for row in sorted(selected_rows):
-                row_data = []
-                for col in range(self.data_table.columnCount()):
-                    item = self.data_table.item(row, col)
-                    row_data.append(item.text() if item else "")
-                data.append(row_data)
-            
-            # 写入文件
-            with open(filename, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(headers)
-                writer.writerows(data)
-            
-            QMessageBox.information(self, '成功', f'已导出 {len(selected_rows)} 行数据到 {filename}')
-        except Exception as e:
-            QMessageBox.critical(self, '错误', f'导出失败: {str(e)}')
+        self.export_selected_rows(filename, rowids, [col['label'] for col in self.columns_config])
 
     def export_selected_to_json(self):
         """导出选中数据为JSON"""
-        selected_rows = {item.row() for item in self.data_table.selectedItems()}
-        if not selected_rows:
+        rowids = self.selected_rowids()
+        if not rowids:
             QMessageBox.warning(self, '警告', '请先选择要导出的数据')
             return
         
-        filename, _ = QFileDialog.getSaveFileName(
-            self, '导出为JSON', '', 'JSON文件 (*.json);;所有文件 (*)')
+        filename = self.ask_export_filename('导出为JSON', 'JSON文件 (*.json);;GZIP压缩JSON (*.json.gz);;所有文件 (*)')
         if not filename:
             return
         
-        try:
-            # 获取表头
-            headers = []
-            for col in range(self.data_table.columnCount()):
-                header = self.data_table.horizontalHeaderItem(col)
-                if header:
-                    headers.append(header.text())
-            
-            # 构建数据字典列表
-            data = []
-            for row in sorted(selected_rows):
-                row_data = {}
-                for col in range(self.data_table.columnCount()):
-                    header = self.data_table.horizontalHeaderItem(col)
-                    if header:
-                        item = self.data_table.item(row, col)
-                        row_data[header.text()] = item.text() if item else ""
-                data.append(row_data)
-            
-            # 写入文件
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            
-            QMessageBox.information(self, '成功', f'已导出 {len(selected_rows)} 行数据到 {filename}')
-        except Exception as e:
-            QMessageBox.critical(self, '错误', f'导出失败: {str(e)}')
+        self.export_selected_rows(filename, rowids, [col['label'] for col in self.columns_config],
+                                  writer=write_json_export)
 
     def export_selected_images(self):
         """导出选中行的条形码/二维码图片"""
-        selected_rows = {item.row() for item in self.data_table.selectedItems()}
+        selected_rows = self.selected_rows()
         if not selected_rows:
             QMessageBox.warning(self, '警告', '请先选择要导出的行')
             return
@@ -3528,62 +6509,47 @@ class MainWindow(QMainWindow):
             return
         
         try:
-            exported_count = 0
-            for row in sorted(selected_rows):
-                rowid = self.data_table.item(row, 0).data(Qt.UserRole)
-                if not rowid:
-                    continue
-                
-                data = self.user_db.get_data_by_id(rowid)
-                if not data:
+            items = []
+            for row in selected_rows:
+                values = self.data_model.row_values(row)
+                if not values:
                     continue
                 
-                # 导出条形码
-                barcode_cols = [col for col in self.columns_config if col.get('is_barcode', False)]
-                for col in barcode_cols:
-                    col_idx = self.columns_config.index(col)
-                    if col_idx < len(data)-1 and data[col_idx+1]:  # +1跳过rowid
-                        img = self.generate_barcode(data[col_idx+1])
-                        if img:
-                            filename = f"{path}/row{row}_{col['name']}_barcode.png"
-                            img.save(filename)
-                            exported_count += 1
-                
-                # 导出二维码
-                qrcode_cols = [col for col in self.columns_config if col.get('is_qrcode', False)]
-                for col in qrcode_cols:
-                    col_idx = self.columns_config.index(col)
-                    if col_idx < len(data)-1 and data[col_idx+1]:  # +1跳过rowid
-                        img = self.generate_qrcode(data[col_idx+1])
-                        if img:
-                            filename = f"{path}/row{row}_{col['name']}_qrcode.png"
-                            img.save(filename)
-                            exported_count += 1
-            
-            QMessageBox.information(self, "成功", f"已导出 {exported_count} 张图片到：\n{path}")
+                for kind, col_idx in self.data_model.image_columns:
+                    if col_idx < len(values) and values[col_idx]:
+                        col = self.columns_config[col_idx]
+                        items.append((kind, values[col_idx], f"{path}/row{row}_{col['name']}_{kind}.png"))
+            
+            self.start_image_export(items, path)
         except Exception as e:
             QMessageBox.critical(self, "错误", f"导出失败：{str(e)}")
 
     def get_cell_image(self, row, col):
         """获取单元格中的图像内容"""
-        widget = self.data_table.cellWidget(row, col)
-        if widget and isinstance(widget, QLabel):
-            return widget.pixmap()
+        image_value = self.data_model.data(self.data_model.index(row, col), DataTableModel.ImageValueRole)
+        if not image_value:
+            return None
+        pixmap = self.barcode_delegate.pixmap_for(image_value)
+        if pixmap is None:
+            image = self.generate_table_image(*image_value)
+            pixmap = QPixmap.fromImage(image) if image else None
+        if pixmap and not pixmap.isNull():
+            return pixmap
         return None
 
 
 
     def copy_selected_as_image(self):
         """将选中内容复制为图片到剪贴板（包含条形码和二维码）"""
-        selected_items = self.data_table.selectedItems()
-        if not selected_items:
+        selected_cells = self.selected_cells()
+        if not selected_cells:
             QMessageBox.warning(self, '警告', '请先选择要复制的内容')
             return
         
         try:
             # 获取选中的行和列范围
-            rows = sorted({item.row() for item in selected_items})
-            cols = sorted({item.column() for item in selected_items})
+            rows = sorted({row for row, _ in selected_cells})
+            cols = sorted({col for _, col in selected_cells})
             
             # 计算要渲染的区域大小
             width = sum(self.data_table.columnWidth(col) for col in cols)
@@ -3602,7 +6568,7 @@ class MainWindow(QMainWindow):
             # 绘制表头
             x_offset = 0
             for col in cols:
-                header = self.data_table.horizontalHeaderItem(col)
+                header = self.header_text(col)
                 col_width = self.data_table.columnWidth(col)
                 
                 if header:
@@ -3610,7 +6576,7 @@ class MainWindow(QMainWindow):
                                     self.data_table.horizontalHeader().height())
                     painter.fillRect(header_rect, QColor('#F5F5F5'))
                     painter.drawRect(header_rect)
-                    painter.drawText(header_rect, Qt.AlignCenter, header.text())
+                    painter.drawText(header_rect, Qt.AlignCenter, header)
                 
                 x_offset += col_width
             
@@ -3622,11 +6588,11 @@ class MainWindow(QMainWindow):
                 
                 for col in cols:
                     col_width = self.data_table.columnWidth(col)
-                    item = self.data_table.item(row, col)
+                    text = self.cell_text(row, col)
                     
                     # 绘制单元格背景和边框
                     cell_rect = QRect(x_offset, y_offset, col_width, row_height)
-                    bg_color = item.background() if item else QColor('#FFFFFF')
+                    bg_color = self.data_model.data(self.data_model.index(row, col), Qt.BackgroundRole) or QColor('#FFFFFF')
                     painter.fillRect(cell_rect, bg_color)
                     painter.drawRect(cell_rect)
                     
@@ -3641,10 +6607,10 @@ class MainWindow(QMainWindow):
                             cell_image.height()
                         )
                         painter.drawPixmap(img_rect, cell_image)
-                    elif item:
+                    elif text:
                         # 绘制文本
                         text_rect = cell_rect.adjusted(5, 0, -5, 0)
-                        painter.drawText(text_rect, Qt.AlignLeft | Qt.AlignVCenter, item.text())
+                        painter.drawText(text_rect, Qt.AlignLeft | Qt.AlignVCenter, text)
                     
                     x_offset += col_width
                 
@@ -3667,16 +6633,41 @@ class MainWindow(QMainWindow):
 
 
     def closeEvent(self, event):
-        # 退出前进行一次备份
-        self.user_db.backup_database(backup_type="auto")
+        self.search_timer.stop()
+        self.search_worker.stop()
+        if self.pinyin_task is not None:
+            # 中断后下次登录从检查点继续
+            self.pinyin_task.cancel()
+        self.barcode_delegate.shutdown()
+        if self.export_worker is not None and self.export_worker.isRunning():
+            self.export_worker.cancel()
+            self.export_worker.wait()
+        self.render_service.shutdown()
+        self.backup_timer.stop()
+        # 退出前进行一次增量备份（数据未变化时直接跳过）：与尚未执行的定时备份合并，
+        # 由数据库线程执行，stop() 等待队列执行完毕，期间界面事件照常处理
+        self.auto_backup()
+        self.db_worker.stop()
+        if self.pinyin_task is not None:
+            self.pinyin_task.close()
+        transliterator.save_char_table(self.pinyin_table_file)
         self.user_db.close()
         if self.parent_window and not self.parent_window.isVisible():
             self.parent_window.show()
         event.accept()
 
+    def auto_backup(self):
+        """在后台线程自动备份（尚未执行的自动备份只保留一次）"""
+        self.db_worker.submit('auto_backup', lambda db: db.backup_database(backup_type="auto"))
+
     def manual_backup(self):
-        """手动备份数据库"""
-        backup_path = self.user_db.backup_database(backup_type="manual")
+        """手动备份数据库（后台执行，完成后提示）"""
+        self.status_bar.showMessage('正在备份数据库...')
+        self.db_worker.submit(None, lambda db: db.backup_database(backup_type="manual"),
+                              self.on_manual_backup_finished)
+
+    def on_manual_backup_finished(self, backup_path, error):
+        self.status_bar.clearMessage()
         if backup_path:
             QMessageBox.information(self, '成功', f'数据库已备份到:\n{backup_path}')
         else:
@@ -3713,7 +6704,10 @@ class MainWindow(QMainWindow):
             
             # 备份大小
             size_mb = backup["size"] / (1024 * 1024)
-            self.backup_table.setItem(row, 2, QTableWidgetItem(f"{size_mb:.2f} MB"))
+            size_text = f"{size_mb:.2f} MB"
+            if backup.get("incremental"):
+                size_text += f" (增量，新增 {backup['stored'] / (1024 * 1024):.2f} MB)"
+            self.backup_table.setItem(row, 2, QTableWidgetItem(size_text))
             
             # 包含数据范围 (需要分析备份文件)
             date_range = self.get_backup_date_range(backup["path"])
@@ -3793,6 +6787,9 @@ class MainWindow(QMainWindow):
     
     def get_backup_date_range(self, backup_path):
         """获取备份文件中包含的数据日期范围"""
+        # 增量快照需要先从块存储还原，列表中不逐个还原
+        if backup_path.endswith(SNAPSHOT_SUFFIX):
+            return "未知"
         try:
             temp_conn = sqlite3.connect(backup_path)
             cursor = temp_conn.cursor()
@@ -3814,11 +6811,19 @@ class MainWindow(QMainWindow):
                                    '确定要从该备份恢复数据库吗?\n恢复前会创建回滚备份。',
                                    QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
-            if self.user_db.restore_from_backup(backup_path):
-                QMessageBox.information(self, '成功', '数据库恢复成功!\n请重新启动应用使更改生效。')
-                self.close()
-            else:
-                QMessageBox.warning(self, '警告', '数据库恢复失败')
+            self.status_bar.showMessage('正在恢复数据库...')
+            self.db_worker.submit(None, lambda db: db.restore_from_backup(backup_path),
+                                  self.on_restore_finished)
+
+    def on_restore_finished(self, restored, error):
+        self.status_bar.clearMessage()
+        if restored:
+            # 数据已在后台写回同一文件，本连接的表结构缓存需要重新读取
+            self.user_db.invalidate_schema()
+            QMessageBox.information(self, '成功', '数据库恢复成功!\n请重新启动应用使更改生效。')
+            self.close()
+        else:
+            QMessageBox.warning(self, '警告', '数据库恢复失败')
 
 class EditDataDialog(QDialog):
     def __init__(self, columns_config, current_data=None, parent=None):
@@ -3917,6 +6922,9 @@ def resource_path(relative_path):
 
 
 if __name__ == '__main__':
+    # 打包后的程序使用进程池时需要
+    multiprocessing.freeze_support()
+
     app = QApplication(sys.argv)
     
     # 设置应用程序样式